@@ -14,44 +14,1278 @@ bl_info = {
 }
 
 import bpy
+import bmesh
+import gpu
+import numpy
+import bisect
+import collections
+import functools
+import itertools
+import linecache
+import selectors
 import socket
+import struct
+import sys
 import json
+import queue
 import threading
+import time
 import traceback
+import types
+import fnmatch
+import hashlib
+import math
+import re
 import base64
+import array
 import tempfile
 import os
-from mathutils import Vector
+import zlib
+from multiprocessing import shared_memory
+from mathutils import Matrix, Vector
 
 
 # Global server instance
 _server_instance = None
 
+# Seconds a socket thread waits for the main thread to run its command
+COMMAND_TIMEOUT = 180.0
+
+# Interval of the main-thread dispatch timer while commands are coming in.
+# Blender's event loop sleeps a few milliseconds between iterations
+# anyway, so this only bounds how late a freshly queued command can be
+# picked up.
+DISPATCH_INTERVAL = 0.001
+
+# Once no command has run for DISPATCH_IDLE_AFTER seconds the timer only
+# wakes every DISPATCH_IDLE_INTERVAL, so an idle server costs Blender next
+# to nothing; the first command after a pause waits at most that long.
+DISPATCH_IDLE_AFTER = 1.0
+DISPATCH_IDLE_INTERVAL = 0.05
+
+# After running a command the timer is re-armed immediately for this many
+# seconds, since agents tend to send commands back to back
+DISPATCH_HOT_WINDOW = 0.05
+
+# Maximum seconds spent draining the queue in one timer tick, so a burst
+# of commands cannot freeze the UI
+DISPATCH_BUDGET = 0.05
+
+
+# Protocol v2: a client opens with PROTOCOL_MAGIC plus one version byte and
+# the server answers with the magic and the version it will speak. After
+# that every message is a FRAME_HEADER (JSON length, binary length) followed
+# by the UTF-8 JSON body and an optional raw binary tail. Clients whose first
+# byte is anything else keep the newline-delimited JSON protocol.
+PROTOCOL_MAGIC = b"BMCP"
+PROTOCOL_VERSION = 2
+FRAME_HEADER = struct.Struct("!II")
+MAX_FRAME_SIZE = 1 << 30
+
+# Initial size of each connection's receive buffer
+RECV_BUFFER_SIZE = 64 * 1024
+
+# Default limit on simultaneously open client connections
+MAX_CONNECTIONS = 64
+
+# Optional Unix domain socket path for same-host clients, served alongside TCP
+BLENDER_SOCKET = os.environ.get("BLENDER_SOCKET")
+
+# Transform attributes addressable by set_transforms / get_transforms
+TRANSFORM_ATTRIBUTES = {
+    "location": "location",
+    "rotation": "rotation_euler",
+    "scale": "scale",
+}
+
+# From this share of bpy.data.objects on, transforms are read and written
+# with one foreach_get/foreach_set over the whole collection instead of
+# per-object attribute access
+TRANSFORM_BULK_FRACTION = 0.25
+
+# Geometry arrays get_mesh_data can export:
+# name -> (array typecode, dtype, components per element)
+MESH_ATTRIBUTES = {
+    "positions": ('f', "float32", 3),
+    "normals": ('f', "float32", 3),
+    "triangles": ('i', "uint32", 3),
+    "triangle_loops": ('i', "uint32", 3),
+    "uvs": ('f', "float32", 2),
+}
+
+# Bytes per partial response when get_mesh_data streams its buffers
+MESH_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Parameters and defaults of each create_object primitive, matching the
+# bpy.ops.mesh.primitive_*_add operators
+PRIMITIVE_DEFAULTS = {
+    "cube": {"size": 2.0},
+    "sphere": {"radius": 1.0, "segments": 32, "ring_count": 16},
+    "cylinder": {"radius": 1.0, "depth": 2.0, "vertices": 32},
+    "cone": {"radius": 1.0, "depth": 2.0, "vertices": 32},
+    "plane": {"size": 2.0},
+    "torus": {"major_radius": 1.0, "minor_radius": 0.25, "major_segments": 48, "minor_segments": 12},
+}
+
+# Shared materials are named by this prefix plus a hash of their properties
+MATERIAL_POOL_PREFIX = "MCP_Material_"
+
+# Custom properties marking the materials this addon created: pooled
+# materials keep their spec as JSON, per-object ones their object's name.
+# Only marked materials are ever removed as orphans.
+MATERIAL_SPEC_PROPERTY = "mcp_material_spec"
+MATERIAL_OWNER_PROPERTY = "mcp_material_owner"
+
+# Scalar material properties: parameter -> Principled BSDF input
+MATERIAL_PROPERTIES = {
+    "metallic": "Metallic",
+    "roughness": "Roughness",
+}
+
+# Shared geometry-nodes group used by create_instances' "geometry_nodes" mode
+INSTANCER_NODE_GROUP = ".MCP_Instancer"
+
+# Compiled execute_code sources kept, least recently used evicted first
+CODE_CACHE_SIZE = 256
+
+# Named execute_code sessions kept alive, least recently used evicted first
+MAX_SESSIONS = 16
+
+# Approximate bytes a session namespace may hold before it is discarded
+SESSION_MEMORY_LIMIT = 256 * 1024 * 1024
+
+# Finished render jobs remembered for get_job_status
+MAX_RENDER_JOBS = 100
+
+# Seconds a started render may go without a render handler firing before
+# the job is considered lost
+RENDER_START_TIMEOUT = 10.0
+
+# Scene change entries kept for get_scene_changes; clients further behind
+# than this are told to resync with get_scene_info
+SCENE_CHANGE_LOG_SIZE = 10000
+
+# Upper bounds in seconds of the latency histogram buckets kept by get_metrics
+METRIC_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+# Command types listed in the panel's metrics summary
+PANEL_METRICS_ROWS = 5
+
+# Seconds between redraws of the panel while its metrics change
+PANEL_REDRAW_INTERVAL = 1.0
+
+# zlib level for viewport screenshots; speed matters more than size here
+PNG_COMPRESSION = 1
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _png_chunk(tag, data):
+    return struct.pack("!I", len(data)) + tag + data + struct.pack("!I", zlib.crc32(tag + data))
+
+
+def _encode_png(pixels, width, height, bottom_up=True):
+    """Encode 8-bit RGBA pixels as a PNG entirely in memory"""
+    stride = width * 4
+    source = memoryview(pixels).cast('B')
+    # Each scanline is prefixed with filter type 0 (None)
+    rows = bytearray((stride + 1) * height)
+    for y in range(height):
+        src = (height - 1 - y if bottom_up else y) * stride
+        dst = y * (stride + 1) + 1
+        rows[dst:dst + stride] = source[src:src + stride]
+
+    header = struct.pack("!IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return b"".join((
+        PNG_SIGNATURE,
+        _png_chunk(b"IHDR", header),
+        _png_chunk(b"IDAT", zlib.compress(rows, PNG_COMPRESSION)),
+        _png_chunk(b"IEND", b""),
+    ))
+
+
+# Per-object fields that scene and object queries can project
+_OBJECT_FIELDS = {
+    "name": lambda obj: obj.name,
+    "type": lambda obj: obj.type,
+    "location": lambda obj: list(obj.location),
+    "rotation": lambda obj: list(obj.rotation_euler),
+    "rotation_euler": lambda obj: list(obj.rotation_euler),
+    "scale": lambda obj: list(obj.scale),
+    "dimensions": lambda obj: list(obj.dimensions),
+    "visible": lambda obj: not obj.hide_get(),
+    "parent": lambda obj: obj.parent.name if obj.parent else None,
+    "collections": lambda obj: [collection.name for collection in obj.users_collection],
+    "data": lambda obj: obj.data.name if obj.data else None,
+    "vertices": lambda obj: len(obj.data.vertices),
+    "edges": lambda obj: len(obj.data.edges),
+    "faces": lambda obj: len(obj.data.polygons),
+}
+
+# Fields only reported for mesh objects
+_MESH_FIELDS = frozenset(("vertices", "edges", "faces"))
+
+SCENE_OBJECT_FIELDS = ("name", "type", "location", "rotation", "scale", "visible")
+OBJECT_INFO_FIELDS = (
+    "name", "type", "location", "rotation_euler", "scale", "dimensions", "visible",
+    "vertices", "edges", "faces",
+)
+
+
+def _field_getters(fields):
+    """Resolve requested field names to (name, getter, mesh_only) triples"""
+    unknown = [field for field in fields if field not in _OBJECT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(_OBJECT_FIELDS)}")
+    return [(field, _OBJECT_FIELDS[field], field in _MESH_FIELDS) for field in fields]
+
+
+def _is_count(value):
+    """True for a non-negative int (not a bool) such as an offset or limit"""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def _describe_object(obj, getters):
+    is_mesh = obj.type == 'MESH' and obj.data is not None
+    return {
+        field: get(obj)
+        for field, get, mesh_only in getters
+        if is_mesh or not mesh_only
+    }
+
+
+def _viewport_projection(region, projection, width, height):
+    """A 3D view region's projection matrix refitted to a width x height image
+
+    window_matrix is built for the region's aspect ratio, so drawing it
+    into an offscreen of another shape stretches the picture. One axis is
+    widened instead, keeping everything visible in the region in frame.
+    """
+    if not region.width or not region.height:
+        return projection
+    region_aspect = region.width / region.height
+    aspect = width / height
+    if aspect >= region_aspect:
+        scale = (region_aspect / aspect, 1.0, 1.0, 1.0)
+    else:
+        scale = (1.0, aspect / region_aspect, 1.0, 1.0)
+    return Matrix.Diagonal(scale) @ projection
+
+
+def _packed_array(value, typecode, length=None, blob=None):
+    """Decode packed numeric input into an array of the given typecode
+
+    Accepts a flat or nested list of numbers, {"base64": ...} or
+    {"blob_offset": n, "length": values} pointing into the request's binary
+    tail. Packed data is little-endian with 4-byte items (float32, int32 or
+    uint32), the native layout on every platform Blender ships for. If
+    length is given the result must have exactly that many values.
+    """
+    if isinstance(value, dict):
+        if "base64" in value:
+            data = base64.b64decode(value["base64"])
+        elif "blob_offset" in value:
+            if blob is None:
+                raise ValueError("blob_offset given but the request has no binary data")
+            start = value["blob_offset"]
+            count = value.get("length", length)
+            data = blob[start:start + count * 4] if count is not None else blob[start:]
+        else:
+            raise ValueError("Packed values need 'base64' or 'blob_offset'")
+        values = array.array(typecode)
+        values.frombytes(data[:len(data) - len(data) % values.itemsize])
+    elif value and isinstance(value[0], (list, tuple)):
+        values = array.array(typecode, [v for item in value for v in item])
+    else:
+        values = array.array(typecode, value)
+
+    if length is not None and len(values) != length:
+        raise ValueError(f"Expected {length} values, got {len(values)}")
+    return values
+
+
+def _float_array(value, length=None, blob=None):
+    """Decode packed float32 input, see _packed_array"""
+    return _packed_array(value, 'f', length, blob)
+
+
+def _encode_floats(values, encoding):
+    """Encode an array('f') for a JSON response"""
+    if encoding == "base64":
+        return {"base64": base64.b64encode(values.tobytes()).decode('ascii')}
+    return values.tolist()
+
+
+class _ClientConnection:
+    """Buffers and message codec for one non-blocking client socket"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.version = None  # None until detected, then 1 (newline JSON) or 2
+        self.buffer = bytearray(RECV_BUFFER_SIZE)
+        self.start = 0  # first unconsumed byte
+        self.end = 0  # end of received data
+        self.scanned = 0  # legacy mode: bytes already searched for a newline
+
+        self.outbound = collections.deque()  # memoryviews waiting to be sent
+        self.inflight = 0  # commands queued but not yet answered
+        self.eof = False  # client finished sending
+        self.closed = False
+        self.on_ready = None  # selector callback
+
+        # Shared memory segments holding blobs until the client releases them
+        self.segments = {}
+
+    def receive(self):
+        """Read available data straight into the buffer; returns bytes read"""
+        if self.start == self.end:
+            self.start = self.end = self.scanned = 0
+        elif self.end == len(self.buffer):
+            self._reserve(len(self.buffer) - self.start + 1)
+        count = self.sock.recv_into(memoryview(self.buffer)[self.end:])
+        self.end += count
+        return count
+
+    def _reserve(self, size):
+        """Make room for a message of `size` bytes starting at self.start"""
+        pending = self.end - self.start
+        if self.start:
+            self.buffer[:pending] = self.buffer[self.start:self.end]
+            self.scanned = max(0, self.scanned - self.start)
+            self.start = 0
+            self.end = pending
+        if size > len(self.buffer):
+            self.buffer.extend(bytes(max(size, 2 * len(self.buffer)) - len(self.buffer)))
+
+    def messages(self):
+        """Yield every complete command in the buffer"""
+        while True:
+            if self.version is None and not self._negotiate():
+                return
+            if self.version == 1:
+                command = self._next_line()
+            else:
+                command = self._next_frame()
+            if command is None:
+                return
+            yield command
+
+    def _negotiate(self):
+        available = self.end - self.start
+        if not available:
+            return False
+
+        magic_len = len(PROTOCOL_MAGIC)
+        head = bytes(self.buffer[self.start:self.start + min(available, magic_len)])
+        if not PROTOCOL_MAGIC.startswith(head):
+            self.version = 1
+            self.scanned = self.start
+            return True
+        if available <= magic_len:
+            return False
+
+        self.version = min(self.buffer[self.start + magic_len], PROTOCOL_VERSION)
+        self.start += magic_len + 1
+        self.write(PROTOCOL_MAGIC + bytes([self.version]))
+        return True
+
+    def _next_line(self):
+        while True:
+            newline = self.buffer.find(b"\n", self.scanned, self.end)
+            if newline < 0:
+                self.scanned = self.end
+                return None
+
+            line = bytes(self.buffer[self.start:newline])
+            self.start = self.scanned = newline + 1
+            if line.strip():
+                command = json.loads(line)
+                # Newline-JSON clients send binary request data base64 encoded
+                params = command.get("params") if isinstance(command, dict) else None
+                if isinstance(params, dict) and isinstance(params.get("_blob"), dict):
+                    params["_blob"] = base64.b64decode(params["_blob"]["base64"])
+                return command
+
+    def _next_frame(self):
+        available = self.end - self.start
+        if available < FRAME_HEADER.size:
+            return None
+
+        json_len, blob_len = FRAME_HEADER.unpack_from(self.buffer, self.start)
+        total = FRAME_HEADER.size + json_len + blob_len
+        if total > MAX_FRAME_SIZE:
+            raise ValueError(f"Frame of {total} bytes exceeds the {MAX_FRAME_SIZE} byte limit")
+        if available < total:
+            # Grow once to the full frame size so the rest lands in place
+            self._reserve(total)
+            return None
+
+        body_start = self.start + FRAME_HEADER.size
+        blob_start = body_start + json_len
+        command = json.loads(bytes(self.buffer[body_start:blob_start]))
+        if blob_len and isinstance(command, dict):
+            params = command.setdefault("params", {})
+            if isinstance(params, dict):
+                params["_blob"] = bytes(self.buffer[blob_start:blob_start + blob_len])
+        self.start += total
+        return command
+
+    def send(self, response, blob_transport=None):
+        """Serialize a response for this connection's protocol and queue it
+
+        A bytes-like "blob" in the response travels as the frame's binary
+        tail in v2, in a shared memory segment when the command asked for
+        blob_transport "shm", or base64 encoded for newline-JSON clients.
+        Stage "timings" of traced commands get the encoding time added.
+        """
+        blob = response.pop("blob", None)
+        timings = response.pop("timings", None)
+        if blob is not None:
+            if blob_transport == "shm" and len(blob):
+                response["blob"] = self._share(blob)
+                blob = None
+            elif self.version == 1:
+                response["blob"] = {"base64": base64.b64encode(blob).decode('ascii'), "size": len(blob)}
+                blob = None
+            else:
+                response["blob"] = {"size": len(blob)}
+
+        started = time.perf_counter()
+        if timings:
+            response["timings"] = timings
+        body = json.dumps(response).encode('utf-8')
+        if timings:
+            # The encoding time is only known once encoded: splice it into
+            # the timings object, which is the last key and ends the body
+            elapsed = (time.perf_counter() - started) * 1000.0
+            body = body[:-2] + b', "serialize": %.3f}}' % elapsed
+
+        if self.version == 1:
+            self.write(body + b"\n")
+            return
+
+        blob_len = len(blob) if blob is not None else 0
+        self.write(FRAME_HEADER.pack(len(body), blob_len) + body)
+        if blob_len:
+            self.write(blob)
+
+    def _share(self, blob):
+        """Copy a blob into a new shared memory segment and describe it"""
+        segment = shared_memory.SharedMemory(create=True, size=len(blob))
+        segment.buf[:len(blob)] = blob
+        self.segments[segment.name] = segment
+        return {"shm": segment.name, "size": len(blob)}
+
+    def release(self, names):
+        """Free shared memory segments the client has finished reading"""
+        for name in names:
+            segment = self.segments.pop(name, None)
+            if segment:
+                segment.close()
+                segment.unlink()
+
+    def write(self, data):
+        self.outbound.append(memoryview(data))
+
+    def flush(self):
+        """Send as much queued output as the socket takes; True once drained"""
+        while self.outbound:
+            view = self.outbound[0]
+            try:
+                sent = self.sock.send(view)
+            except (BlockingIOError, InterruptedError):
+                return False
+            if sent < len(view):
+                self.outbound[0] = view[sent:]
+                return False
+            self.outbound.popleft()
+        return True
+
+
+class _PendingCommand:
+    """A command queued for main-thread execution"""
+
+    __slots__ = ("command", "callback", "deadline", "response", "done", "cancelled",
+                 "queued_at", "read_time", "queue_time", "handler_time", "serialize_time")
+
+    def __init__(self, command, callback=None):
+        self.command = command
+        self.callback = callback
+        self.deadline = time.monotonic() + COMMAND_TIMEOUT
+        self.response = None
+        self.done = threading.Event()
+        self.cancelled = False
+        # Stage timings for _Metrics, in perf_counter seconds
+        self.queued_at = time.perf_counter()
+        self.read_time = 0.0
+        self.queue_time = 0.0
+        self.handler_time = 0.0
+        self.serialize_time = 0.0
+
+    def finish(self, response):
+        """Store the response, tagged with the request ID, and notify the waiter"""
+        if "id" in self.command:
+            response["id"] = self.command["id"]
+        self.response = response
+        self.done.set()
+        if self.callback:
+            self.callback(self, response)
+
+    def emit(self, response):
+        """Send an intermediate "partial" response of a streaming command"""
+        response["status"] = "partial"
+        if "id" in self.command:
+            response["id"] = self.command["id"]
+        if self.callback:
+            self.callback(self, response)
+
+
+class _Histogram:
+    """Latency histogram over METRIC_BUCKETS, plus an overflow bucket"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(METRIC_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(METRIC_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile, capped at the maximum"""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(METRIC_BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        ms = lambda seconds: round(seconds * 1000.0, 3)
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total / self.count) if self.count else 0.0,
+            "p50_ms": ms(self.quantile(0.5)),
+            "p95_ms": ms(self.quantile(0.95)),
+            "p99_ms": ms(self.quantile(0.99)),
+            "max_ms": ms(self.max),
+        }
+
+
+class _Metrics:
+    """Per command type counters and latency histograms for get_metrics
+
+    Each stage is timed where it happens: "read" receives and decodes the
+    request on the I/O thread, "queue" waits for the main-thread timer,
+    "handler" runs the handler (every slice of a streaming command) and
+    "serialize" encodes the response on the I/O thread.
+    """
+
+    STAGES = ("read", "queue", "handler", "serialize")
+
+    def __init__(self):
+        # Observed from the I/O and main threads
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.commands = {}
+            self.since = time.time()
+            # Bumped on every change, so the panel knows when to redraw
+            self.version = getattr(self, "version", 0) + 1
+
+    def _entry(self, command_type):
+        entry = self.commands.get(command_type)
+        if entry is None:
+            entry = self.commands[command_type] = {
+                "count": 0,
+                "errors": 0,
+                "stages": {stage: _Histogram() for stage in self.STAGES},
+            }
+        return entry
+
+    def observe(self, command_type, stage, seconds):
+        with self.lock:
+            self._entry(command_type)["stages"][stage].observe(seconds)
+
+    def finished(self, command_type, response, handler_time=None):
+        """Count a completed command and record its handler time"""
+        with self.lock:
+            entry = self._entry(command_type)
+            entry["count"] += 1
+            self.version += 1
+            if response.get("status") == "error":
+                entry["errors"] += 1
+            if handler_time is not None:
+                entry["stages"]["handler"].observe(handler_time)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "since": self.since,
+                "commands": {
+                    command_type: {
+                        "count": entry["count"],
+                        "errors": entry["errors"],
+                        "stages": {stage: histogram.summary() for stage, histogram in entry["stages"].items()},
+                    }
+                    for command_type, entry in sorted(self.commands.items())
+                },
+            }
+
+    def prometheus(self, gauges=None):
+        """Render the metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP blendermcp_commands_total Commands completed by type.",
+            "# TYPE blendermcp_commands_total counter",
+        ]
+        with self.lock:
+            commands = sorted(self.commands.items())
+            for command_type, entry in commands:
+                lines.append(f'blendermcp_commands_total{{type="{command_type}"}} {entry["count"]}')
+
+            lines += [
+                "# HELP blendermcp_command_errors_total Commands that returned an error by type.",
+                "# TYPE blendermcp_command_errors_total counter",
+            ]
+            for command_type, entry in commands:
+                lines.append(f'blendermcp_command_errors_total{{type="{command_type}"}} {entry["errors"]}')
+
+            lines += [
+                "# HELP blendermcp_stage_seconds Time spent per command in each dispatch stage.",
+                "# TYPE blendermcp_stage_seconds histogram",
+            ]
+            for command_type, entry in commands:
+                for stage, histogram in entry["stages"].items():
+                    labels = f'type="{command_type}",stage="{stage}"'
+                    cumulative = 0
+                    for bound, count in zip(METRIC_BUCKETS, histogram.counts):
+                        cumulative += count
+                        lines.append(f'blendermcp_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'blendermcp_stage_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f'blendermcp_stage_seconds_sum{{{labels}}} {histogram.total:.9f}')
+                    lines.append(f'blendermcp_stage_seconds_count{{{labels}}} {histogram.count}')
+
+        for name, (help_text, value) in (gauges or {}).items():
+            lines += [
+                f"# HELP blendermcp_{name} {help_text}",
+                f"# TYPE blendermcp_{name} gauge",
+                f"blendermcp_{name} {value}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def summary_rows(self, limit=PANEL_METRICS_ROWS):
+        """(type, count, p95 queue ms, p95 handler ms) of the busiest command types"""
+        with self.lock:
+            busiest = sorted(self.commands.items(), key=lambda item: -item[1]["count"])[:limit]
+            return [
+                (
+                    command_type,
+                    entry["count"],
+                    entry["stages"]["queue"].quantile(0.95) * 1000.0,
+                    entry["stages"]["handler"].quantile(0.95) * 1000.0,
+                )
+                for command_type, entry in busiest
+            ]
+
+
+class _SceneChangeTracker:
+    """Object-level change log fed by depsgraph updates
+
+    Every recorded change gets the next scene version. The newest
+    SCENE_CHANGE_LOG_SIZE entries are kept; a client asking for changes
+    since a version that has already been dropped must resync.
+
+    Depsgraph updates report modified objects but not additions or
+    removals, so the scene's object names are re-scanned only when the
+    object count changes or an updated object has an unknown name (a new
+    or renamed object).
+    """
+
+    def __init__(self, size=SCENE_CHANGE_LOG_SIZE):
+        self.version = 0
+        self.log = collections.deque(maxlen=size)
+        # Highest version no longer in the log
+        self.dropped = 0
+        self.scene_name = None
+        self.names = set()
+        # Bound methods stored once so they can be removed from the handler lists
+        self.on_depsgraph_update = self._on_depsgraph_update
+        self.on_load = self._on_load
+
+    def start(self):
+        self._rescan(bpy.context.scene, reset=True)
+        handlers = bpy.app.handlers
+        if self.on_depsgraph_update not in handlers.depsgraph_update_post:
+            handlers.depsgraph_update_post.append(self.on_depsgraph_update)
+        if self.on_load not in handlers.load_post:
+            handlers.load_post.append(self.on_load)
+
+    def stop(self):
+        handlers = bpy.app.handlers
+        if self.on_depsgraph_update in handlers.depsgraph_update_post:
+            handlers.depsgraph_update_post.remove(self.on_depsgraph_update)
+        if self.on_load in handlers.load_post:
+            handlers.load_post.remove(self.on_load)
+
+    def _record(self, kind, name):
+        if len(self.log) == self.log.maxlen:
+            self.dropped = self.log[0][0]
+        self.version += 1
+        self.log.append((self.version, kind, name))
+
+    def _reset(self):
+        """Invalidate everything recorded so far"""
+        self.version += 1
+        self.dropped = self.version
+        self.log.clear()
+
+    def _rescan(self, scene, reset=False):
+        names = {obj.name for obj in scene.objects}
+        if reset or scene.name != self.scene_name:
+            if self.scene_name is not None:
+                self._reset()
+            self.scene_name = scene.name
+        else:
+            for name in names - self.names:
+                self._record("added", name)
+            for name in self.names - names:
+                self._record("removed", name)
+        self.names = names
+
+    @bpy.app.handlers.persistent
+    def _on_depsgraph_update(self, scene, depsgraph):
+        if scene.name != self.scene_name or len(scene.objects) != len(self.names):
+            self._rescan(scene)
+
+        for update in depsgraph.updates:
+            if update.id.id_type != 'OBJECT':
+                continue
+            name = update.id.name
+            if name not in self.names:
+                self._rescan(scene)
+            if name in self.names:
+                self._record("modified", name)
+
+    @bpy.app.handlers.persistent
+    def _on_load(self, *args):
+        self._rescan(bpy.context.scene, reset=True)
+
+    def changes_since(self, since_version):
+        """Net added/removed/modified object names after since_version"""
+        if since_version < self.dropped or since_version > self.version:
+            return {
+                "version": self.version,
+                "scene": self.scene_name,
+                "resync_required": True,
+            }
+
+        added, removed, modified = set(), set(), set()
+        # The log is ordered, so skip from the newest end
+        entries = []
+        for entry in reversed(self.log):
+            if entry[0] <= since_version:
+                break
+            entries.append(entry)
+
+        for version, kind, name in reversed(entries):
+            if kind == "added":
+                if name in removed:
+                    # Deleted and re-created: the client still has an object of that name
+                    removed.discard(name)
+                    modified.add(name)
+                else:
+                    added.add(name)
+            elif kind == "removed":
+                modified.discard(name)
+                if name in added:
+                    added.discard(name)
+                else:
+                    removed.add(name)
+            elif name not in added:
+                modified.add(name)
+
+        return {
+            "version": self.version,
+            "scene": self.scene_name,
+            "resync_required": False,
+            "added": sorted(added),
+            "removed": sorted(removed),
+            "modified": sorted(modified),
+        }
+
+
+def _approximate_size(namespace):
+    """Rough byte size of a namespace's values, sampling large containers"""
+    total = 0
+    for key, value in namespace.items():
+        if key == "__builtins__" or isinstance(value, types.ModuleType):
+            continue
+        total += sys.getsizeof(value)
+        if isinstance(value, dict):
+            items = list(itertools.islice(value.items(), 100))
+            if items:
+                sampled = sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in items)
+                total += sampled * len(value) // len(items)
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            items = list(itertools.islice(value, 100))
+            if items:
+                total += sum(map(sys.getsizeof, items)) * len(value) // len(items)
+    return total
+
+
+_JSON_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "array": list,
+    "object": dict,
+    "null": type(None),
+}
+
+
+def _validate_args(schema, value, path="args"):
+    """Check value against a JSON-schema subset and return it with defaults filled
+
+    Supports type, enum, properties, required, additionalProperties (false)
+    and items; other keywords are ignored.
+    """
+    expected = schema.get("type")
+    if expected is not None:
+        types_ = expected if isinstance(expected, list) else [expected]
+        unknown = [name for name in types_ if name not in _JSON_TYPES]
+        if unknown:
+            raise ValueError(f"{path}: unsupported schema type {unknown[0]}")
+        if not any(
+            isinstance(value, _JSON_TYPES[name]) and not (isinstance(value, bool) and name in ("integer", "number"))
+            for name in types_
+        ):
+            raise ValueError(f"{path}: expected {' or '.join(types_)}, got {type(value).__name__}")
+
+    if "enum" in schema and value not in schema["enum"]:
+        raise ValueError(f"{path}: {value!r} is not one of {schema['enum']}")
+
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        missing = [key for key in schema.get("required", []) if key not in value]
+        if missing:
+            raise ValueError(f"{path}: missing required {', '.join(missing)}")
+        if schema.get("additionalProperties") is False:
+            extra = [key for key in value if key not in properties]
+            if extra:
+                raise ValueError(f"{path}: unexpected {', '.join(extra)}")
+        value = dict(value)
+        for key, subschema in properties.items():
+            if key in value:
+                value[key] = _validate_args(subschema, value[key], f"{path}.{key}")
+            elif "default" in subschema:
+                value[key] = subschema["default"]
+    elif isinstance(value, list) and isinstance(schema.get("items"), dict):
+        value = [_validate_args(schema["items"], item, f"{path}[{index}]") for index, item in enumerate(value)]
+    return value
+
+
+def _json_safe(value, depth=0):
+    """Convert a script result into JSON-serializable data
+
+    Vectors, matrices and other sequences become lists, datablocks and
+    other bpy structs their names, bytes base64; anything else its str().
+    """
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return value if math.isfinite(value) else str(value)
+    if depth >= 32:
+        return str(value)
+    if isinstance(value, dict):
+        return {str(key): _json_safe(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"base64": base64.b64encode(bytes(value)).decode('ascii')}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_json_safe(item, depth + 1) for item in value]
+    if hasattr(value, "bl_rna"):
+        return getattr(value, "name", None) or str(value)
+    try:
+        return [_json_safe(item, depth + 1) for item in value]
+    except TypeError:
+        return str(value)
+
+
+class _CodeRunner:
+    """Compiled-code cache and persistent namespaces for execute_code
+
+    Sources are compiled once and cached by SHA-256, so a client can rerun
+    code by hash without resending it. Named sessions keep their namespace
+    between calls; an unnamed call gets a fresh namespace as before.
+    """
+
+    def __init__(self, cache_size=CODE_CACHE_SIZE, max_sessions=MAX_SESSIONS, memory_limit=SESSION_MEMORY_LIMIT):
+        self.cache_size = cache_size
+        self.max_sessions = max_sessions
+        self.memory_limit = memory_limit
+        self.compiled = collections.OrderedDict()
+        self.sessions = collections.OrderedDict()
+        # Registered scripts: name -> (code hash, code object, params schema)
+        self.scripts = {}
+
+    def compile(self, code=None, code_hash=None):
+        """Return (hash, code object), compiling and caching the source if needed"""
+        if code is not None:
+            code_hash = hashlib.sha256(code.encode('utf-8')).hexdigest()
+        compiled = self.compiled.get(code_hash)
+        if compiled is not None:
+            self.compiled.move_to_end(code_hash)
+            return code_hash, compiled
+        if code is None:
+            raise ValueError(f"Code {code_hash} is not cached; send the source again")
+
+        # Register the source so tracebacks can show the failing lines
+        filename = f"<mcp:{code_hash[:12]}>"
+        compiled = compile(code, filename, "exec")
+        linecache.cache[filename] = (len(code), None, code.splitlines(True), filename)
+        self.compiled[code_hash] = compiled
+        while len(self.compiled) > self.cache_size:
+            evicted, old = self.compiled.popitem(last=False)
+            linecache.cache.pop(old.co_filename, None)
+        return code_hash, compiled
+
+    def namespace(self, session=None):
+        """A fresh namespace, or the persistent one of a named session"""
+        if session is None:
+            return self._new_namespace()
+        namespace = self.sessions.get(session)
+        if namespace is None:
+            namespace = self.sessions[session] = self._new_namespace()
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        else:
+            self.sessions.move_to_end(session)
+        return namespace
+
+    def _new_namespace(self):
+        return {
+            "bpy": bpy,
+            "C": bpy.context,
+            "D": bpy.data,
+        }
+
+    def reset(self, session):
+        return self.sessions.pop(session, None) is not None
+
+    def register(self, name, code, schema):
+        """Compile a named script; it stays registered until replaced"""
+        code_hash, compiled = self.compile(code)
+        self.scripts[name] = (code_hash, compiled, schema)
+        return code_hash
+
+    def run(self, name, args):
+        """Run a registered script with validated args; returns its result"""
+        script = self.scripts.get(name)
+        if script is None:
+            raise ValueError(f"Script '{name}' is not registered")
+        code_hash, compiled, schema = script
+        namespace = self._new_namespace()
+        namespace["args"] = _validate_args(schema, args)
+        exec(compiled, namespace)
+        return namespace.get("result")
+
+    def check_memory(self, session):
+        """Drop a session that outgrew the memory limit; return its approximate size"""
+        size = _approximate_size(self.sessions[session])
+        if size > self.memory_limit:
+            del self.sessions[session]
+            raise MemoryError(
+                f"Session '{session}' holds about {size} bytes, over the {self.memory_limit} byte limit; it was reset"
+            )
+        return size
+
+
+class _RenderJobs:
+    """Queue of background renders tracked through Blender's render handlers
+
+    Jobs start one at a time from a timer with render.render('INVOKE_DEFAULT'),
+    which runs as a window-manager job while the UI and the command
+    dispatcher keep running. render_pre/post/stats/complete/cancel update
+    the running job. In background mode there is no job system, so the
+    render runs synchronously when the job starts.
+    """
+
+    def __init__(self):
+        self.jobs = collections.OrderedDict()
+        self.queue = collections.deque()
+        self.current = None
+        # Window the running render was started from
+        self.window = None
+        self.ids = itertools.count(1)
+        self.handlers = {
+            "render_pre": self._on_render_pre,
+            "render_post": self._on_render_post,
+            "render_stats": self._on_render_stats,
+            "render_complete": self._on_render_complete,
+            "render_cancel": self._on_render_cancel,
+        }
+        # Stored once: bpy.app.timers compares callbacks by identity
+        self._pump_timer = self._pump
+
+    def start(self):
+        for name, handler in self.handlers.items():
+            handlers = getattr(bpy.app.handlers, name)
+            if handler not in handlers:
+                handlers.append(handler)
+
+    def stop(self):
+        for name, handler in self.handlers.items():
+            handlers = getattr(bpy.app.handlers, name)
+            if handler in handlers:
+                handlers.remove(handler)
+        if bpy.app.timers.is_registered(self._pump_timer):
+            bpy.app.timers.unregister(self._pump_timer)
+
+    def submit(self, settings):
+        job = {
+            "id": f"render-{next(self.ids)}",
+            "status": "queued",
+            "settings": settings,
+            "progress": 0.0,
+            "frames_done": 0,
+            "outputs": [],
+            "created": time.time(),
+            "started": None,
+            "finished": None,
+            "error": None,
+            "cancel_requested": False,
+        }
+        self.jobs[job["id"]] = job
+        self.queue.append(job)
+        self._forget_old_jobs()
+        if not bpy.app.timers.is_registered(self._pump_timer):
+            bpy.app.timers.register(self._pump_timer, first_interval=0.0, persistent=True)
+        return job
+
+    def cancel(self, job):
+        """Cancel a queued job or stop a running one; False if it cannot be stopped
+
+        Blender has no API to stop a render job, so a running one is
+        stopped by simulating Esc in the window it was started from. That
+        needs Blender started with --enable-event-simulate; otherwise the
+        render keeps going until Esc is pressed by hand.
+        """
+        if job["status"] == "queued":
+            self.queue.remove(job)
+            self._finish(job, "cancelled")
+        elif job["status"] == "running" and job is self.current:
+            job["cancel_requested"] = True
+            window = self.window or bpy.context.window_manager.windows[0]
+            try:
+                window.event_simulate(type='ESC', value='PRESS')
+                window.event_simulate(type='ESC', value='RELEASE')
+            except (AttributeError, RuntimeError):
+                return False
+            # render_cancel marks the job cancelled once the render stops
+        return True
+
+    def _forget_old_jobs(self):
+        done = [job_id for job_id, job in self.jobs.items() if job["finished"] is not None]
+        for job_id in done[:max(0, len(done) - MAX_RENDER_JOBS)]:
+            del self.jobs[job_id]
+
+    def _finish(self, job, status, error=None):
+        job["status"] = status
+        job["error"] = error
+        job["finished"] = time.time()
+        if status == "finished":
+            job["progress"] = 1.0
+        if job is self.current:
+            self.current = None
+
+    def _pump(self):
+        """Timer: watch the running job and start the next queued one"""
+        job = self.current
+        if job is not None:
+            if (not bpy.app.is_job_running('RENDER') and job["frames_done"] == 0
+                    and time.time() - job["started"] > RENDER_START_TIMEOUT):
+                self._finish(job, "failed", "Render did not start")
+            return 0.1
+
+        if not self.queue:
+            return None
+        job = self.current = self.queue.popleft()
+        try:
+            self._launch(job)
+        except Exception as e:
+            self._finish(job, "failed", str(e))
+        return 0.1
+
+    def _launch(self, job):
+        settings = job["settings"]
+        scene = bpy.context.scene
+        scene.render.filepath = settings["output_path"]
+        if "resolution_x" in settings:
+            scene.render.resolution_x = settings["resolution_x"]
+        if "resolution_y" in settings:
+            scene.render.resolution_y = settings["resolution_y"]
+        if "samples" in settings and hasattr(scene, "cycles"):
+            scene.cycles.samples = settings["samples"]
+
+        animation = settings.get("animation", False)
+        if animation:
+            job["frame_total"] = scene.frame_end - scene.frame_start + 1
+        else:
+            job["frame_total"] = 1
+        job["status"] = "running"
+        job["started"] = time.time()
+
+        if bpy.app.background:
+            bpy.ops.render.render(animation=animation, write_still=not animation)
+            if job is self.current:
+                # Handlers have run synchronously; finish in case they did not
+                self._finish(job, "finished")
+            return
+
+        window = self.window = bpy.context.window_manager.windows[0]
+        with bpy.context.temp_override(window=window):
+            result = bpy.ops.render.render('INVOKE_DEFAULT', animation=animation, write_still=not animation)
+        if 'CANCELLED' in result:
+            self._finish(job, "failed", "Render could not be started")
+
+    @bpy.app.handlers.persistent
+    def _on_render_pre(self, scene, *args):
+        if self.current is not None:
+            self.current["frame"] = scene.frame_current
+
+    @bpy.app.handlers.persistent
+    def _on_render_post(self, scene, *args):
+        job = self.current
+        if job is None:
+            return
+        job["frames_done"] += 1
+        job["outputs"].append(
+            scene.render.frame_path(frame=scene.frame_current)
+            if job["settings"].get("animation") else job["settings"]["output_path"]
+        )
+        job["progress"] = min(1.0, job["frames_done"] / job["frame_total"])
+
+    @bpy.app.handlers.persistent
+    def _on_render_stats(self, stats, *args):
+        # e.g. "Fra:1 | Mem:120M | Scene | Sample 12/128"; refine progress within the frame
+        job = self.current
+        if job is None:
+            return
+        match = _RENDER_SAMPLE_PATTERN.search(stats)
+        if match:
+            done, total = int(match.group(1)), int(match.group(2))
+            if total:
+                job["progress"] = min(1.0, (job["frames_done"] + done / total) / job["frame_total"])
+
+    @bpy.app.handlers.persistent
+    def _on_render_complete(self, scene, *args):
+        if self.current is not None:
+            self._finish(self.current, "finished")
+
+    @bpy.app.handlers.persistent
+    def _on_render_cancel(self, scene, *args):
+        if self.current is not None:
+            self._finish(self.current, "cancelled")
+
+    def describe(self, job):
+        info = {key: value for key, value in job.items() if key != "settings"}
+        info["output_path"] = job["settings"]["output_path"]
+        if job["status"] == "queued":
+            info["queue_position"] = self.queue.index(job)
+        return info
+
+
+_RENDER_SAMPLE_PATTERN = re.compile(r"(?:Sample|Rendered|Path Tracing Sample)\s+(\d+)\s*/\s*(\d+)")
+
 
 class BlenderMCPServer:
     """Socket server running inside Blender to handle MCP commands"""
 
-    def __init__(self, host="localhost", port=9876):
+    def __init__(self, host="localhost", port=9876, max_connections=MAX_CONNECTIONS, socket_path=BLENDER_SOCKET):
         self.host = host
         self.port = port
+        self.max_connections = max_connections
+        self.socket_path = socket_path
         self.server_socket = None
+        self.unix_socket = None
         self.running = False
         self.thread = None
 
+        # One I/O thread multiplexes the listener and every client socket.
+        # Other threads hand it responses through self.outbox and wake its
+        # select() by writing a byte to the wakeup socket pair.
+        self.selector = None
+        self.connections = set()
+        self.outbox = collections.deque()
+        self._wakeup_recv = None
+        self._wakeup_send = None
+
+        # Commands waiting for the main thread, drained by one persistent timer.
+        # The bound method is stored once because bpy.app.timers compares
+        # callbacks by identity.
+        self.command_queue = queue.Queue()
+        self._dispatch_timer = self._dispatch_commands
+        self._last_dispatch = 0.0
+
+        # Streaming commands: (pending, generator) pairs advanced one slice
+        # per timer tick. Handlers opt in by returning a generator that
+        # yields partial responses and returns the final one.
+        self.streams = collections.deque()
+
+        # Asynchronous render jobs
+        self.render_jobs = _RenderJobs()
+
+        # Compiled code and persistent session namespaces for execute_code
+        self.code_runner = _CodeRunner()
+
+        # Object changes recorded from depsgraph updates for get_scene_changes
+        self.scene_changes = _SceneChangeTracker()
+
+        # Per command type counters and stage latencies for get_metrics
+        self.metrics = _Metrics()
+        self._panel_version = self.metrics.version
+        self._panel_redrawn_at = 0.0
+
         # Command handlers
         self.handlers = {
             "get_scene_info": self._handle_get_scene_info,
             "get_object_info": self._handle_get_object_info,
+            "get_scene_changes": self._handle_get_scene_changes,
+            "get_mesh_data": self._handle_get_mesh_data,
             "create_object": self._handle_create_object,
+            "create_mesh": self._handle_create_mesh,
+            "create_instances": self._handle_create_instances,
             "delete_object": self._handle_delete_object,
             "move_object": self._handle_move_object,
             "scale_object": self._handle_scale_object,
             "rotate_object": self._handle_rotate_object,
+            "set_transforms": self._handle_set_transforms,
+            "get_transforms": self._handle_get_transforms,
             "execute_code": self._handle_execute_code,
+            "register_script": self._handle_register_script,
+            "run_script": self._handle_run_script,
+            "list_scripts": self._handle_list_scripts,
             "get_viewport_screenshot": self._handle_get_viewport_screenshot,
             "set_material": self._handle_set_material,
+            "set_materials": self._handle_set_materials,
             "render_scene": self._handle_render_scene,
+            "get_job_status": self._handle_get_job_status,
+            "cancel_job": self._handle_cancel_job,
             "save_file": self._handle_save_file,
+            "batch": self._handle_batch,
+            "get_metrics": self._handle_get_metrics,
         }
 
     def start(self):
@@ -64,129 +1298,410 @@ class BlenderMCPServer:
             self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.server_socket.bind((self.host, self.port))
-            self.server_socket.listen(5)
-            self.server_socket.settimeout(1.0)
+            self.server_socket.listen(128)
+            self.server_socket.setblocking(False)
+
+            self._wakeup_recv, self._wakeup_send = socket.socketpair()
+            self._wakeup_recv.setblocking(False)
+            self._wakeup_send.setblocking(False)
+
+            self.selector = selectors.DefaultSelector()
+            self.selector.register(self.server_socket, selectors.EVENT_READ, self._accept_clients)
+
+            if self.socket_path:
+                self._listen_unix()
+            self.selector.register(self._wakeup_recv, selectors.EVENT_READ, self._send_responses)
             self.running = True
 
+            if not bpy.app.timers.is_registered(self._dispatch_timer):
+                bpy.app.timers.register(self._dispatch_timer, first_interval=0.0, persistent=True)
+            self.scene_changes.start()
+            self.render_jobs.start()
+
             print(f"Blender MCP Server started on {self.host}:{self.port}")
+            if self.unix_socket:
+                print(f"Blender MCP Server listening on {self.socket_path}")
 
-            # Start server loop in daemon thread
-            self.thread = threading.Thread(target=self._server_loop, daemon=True)
+            # Start the I/O loop in a daemon thread
+            self.thread = threading.Thread(target=self._io_loop, daemon=True)
             self.thread.start()
 
         except Exception as e:
             print(f"Failed to start server: {e}")
             self.running = False
+            self._close_sockets()
 
     def stop(self):
         """Stop the socket server"""
         self.running = False
-        if self.server_socket:
-            try:
-                self.server_socket.close()
-            except:
-                pass
-        print("Blender MCP Server stopped")
 
-    def _server_loop(self):
-        """Main server loop accepting connections"""
-        while self.running:
+        if bpy.app.timers.is_registered(self._dispatch_timer):
+            bpy.app.timers.unregister(self._dispatch_timer)
+        self.scene_changes.stop()
+        self.render_jobs.stop()
+
+        # Answer commands that will never run or finish
+        while self.streams:
+            pending, stream = self.streams.popleft()
+            stream.close()
+            pending.finish({"status": "error", "message": "Server stopped"})
+        while True:
             try:
-                client_socket, addr = self.server_socket.accept()
-                print(f"Client connected from {addr}")
-
-                # Handle client in separate thread
-                client_thread = threading.Thread(
-                    target=self._handle_client,
-                    args=(client_socket,),
-                    daemon=True
-                )
-                client_thread.start()
+                pending = self.command_queue.get_nowait()
+            except queue.Empty:
+                break
+            pending.finish({"status": "error", "message": "Server stopped"})
 
-            except socket.timeout:
-                continue
-            except Exception as e:
-                if self.running:
-                    print(f"Server error: {e}")
+        if self.thread:
+            self._wakeup()
+            self.thread.join(timeout=1.0)
+            self.thread = None
 
-    def _handle_client(self, client_socket):
-        """Handle individual client connection"""
-        buffer = ""
-        try:
-            while True:
-                data = client_socket.recv(4096).decode('utf-8')
-                if not data:
-                    break
+        print("Blender MCP Server stopped")
 
-                buffer += data
+    def _listen_unix(self):
+        """Also accept same-host clients on a Unix domain socket"""
+        if not hasattr(socket, "AF_UNIX"):
+            print("Unix domain sockets are not supported on this platform, using TCP only")
+            return
 
-                # Try to parse complete JSON commands
-                while buffer:
-                    try:
-                        command, idx = json.JSONDecoder().raw_decode(buffer)
-                        buffer = buffer[idx:].lstrip()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)  # stale socket from a previous session
+        self.unix_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.unix_socket.bind(self.socket_path)
+        self.unix_socket.listen(128)
+        self.unix_socket.setblocking(False)
+        self.selector.register(self.unix_socket, selectors.EVENT_READ, self._accept_clients)
+
+    def _wakeup(self):
+        """Interrupt the I/O thread's select() from any thread"""
+        wakeup_send = self._wakeup_send
+        if wakeup_send is None:
+            return
+        try:
+            wakeup_send.send(b"\0")
+        except (BlockingIOError, OSError):
+            # Buffer full means a wakeup is already pending
+            pass
 
-                        # Process command
-                        response = self._process_command(command)
+    def _io_loop(self):
+        """I/O thread: accept clients, read commands and write responses"""
+        try:
+            while self.running:
+                for key, events in self.selector.select():
+                    key.data(key.fileobj, events)
+        except Exception as e:
+            if self.running:
+                print(f"Server error: {e}")
+                traceback.print_exc()
+        finally:
+            self._close_sockets()
 
-                        # Send response
-                        response_json = json.dumps(response) + "\n"
-                        client_socket.sendall(response_json.encode('utf-8'))
+    def _close_sockets(self):
+        for connection in list(self.connections):
+            self._close_client(connection)
+        for sock in (self.server_socket, self.unix_socket, self._wakeup_recv, self._wakeup_send):
+            if sock:
+                try:
+                    sock.close()
+                except:
+                    pass
+        if self.unix_socket and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        if self.selector:
+            self.selector.close()
+        self.selector = self.server_socket = self.unix_socket = None
+        self._wakeup_recv = self._wakeup_send = None
+
+    def _accept_clients(self, server_socket, events):
+        while True:
+            try:
+                client_socket, addr = server_socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                print(f"Accept error: {e}")
+                return
+
+            if len(self.connections) >= self.max_connections:
+                print(f"Rejected client from {addr}: {self.max_connections} connections open")
+                try:
+                    client_socket.send(b'{"status": "error", "message": "Too many connections"}\n')
+                except OSError:
+                    pass
+                client_socket.close()
+                continue
 
-                    except json.JSONDecodeError:
-                        # Incomplete JSON, wait for more data
-                        break
+            print(f"Client connected from {addr or server_socket.getsockname()}")
+            client_socket.setblocking(False)
+            connection = _ClientConnection(client_socket)
+            connection.on_ready = functools.partial(self._service_client, connection)
+            self.connections.add(connection)
+            self.selector.register(client_socket, selectors.EVENT_READ, connection.on_ready)
+
+    def _service_client(self, connection, client_socket, events):
+        """Handle readiness on a client socket
+
+        Commands are queued as soon as they arrive, so a client may pipeline
+        many requests; each response is written when its command completes.
+        Clients tag requests with an "id" to match the responses. Requests
+        carrying a "trace" get the addon's stage "timings" (ms) back.
+        """
+        try:
+            if events & selectors.EVENT_READ:
+                started = time.perf_counter()
+                try:
+                    count = connection.receive()
+                except (BlockingIOError, InterruptedError):
+                    count = None
+
+                if count == 0:
+                    connection.eof = True
+                else:
+                    callback = functools.partial(self._queue_response, connection)
+                    for command in connection.messages():
+                        if isinstance(command, dict) and "release_shm" in command:
+                            connection.release(command.pop("release_shm"))
+                        connection.inflight += 1
+                        # The first command of a read also pays for the recv
+                        read_time = time.perf_counter() - started
+                        pending = self._submit_command(command, callback)
+                        pending.read_time = read_time
+                        self.metrics.observe(self._metric_type(pending.command), "read", read_time)
+                        started = time.perf_counter()
+
+            self._update_client(connection)
 
         except Exception as e:
             print(f"Client handler error: {e}")
             traceback.print_exc()
-        finally:
-            client_socket.close()
+            self._close_client(connection)
 
-    def _process_command(self, command):
-        """Process a command and return response"""
-        try:
-            cmd_type = command.get("type")
-            params = command.get("params", {})
+    def _update_client(self, connection):
+        """Flush output and adjust the selector interest, or close when done"""
+        drained = connection.flush()
+        if connection.eof and not connection.inflight and drained:
+            self._close_client(connection)
+            return
 
-            if cmd_type not in self.handlers:
-                return {
-                    "status": "error",
-                    "message": f"Unknown command: {cmd_type}"
+        events = 0 if connection.eof else selectors.EVENT_READ
+        if not drained:
+            events |= selectors.EVENT_WRITE
+
+        try:
+            key = self.selector.get_key(connection.sock)
+        except KeyError:
+            key = None
+
+        if not events:
+            # Half-closed client waiting for responses; the outbox wakes us
+            if key:
+                self.selector.unregister(connection.sock)
+        elif key is None:
+            self.selector.register(connection.sock, events, connection.on_ready)
+        elif key.events != events:
+            self.selector.modify(connection.sock, events, connection.on_ready)
+
+    def _close_client(self, connection):
+        if connection.closed:
+            return
+        connection.closed = True
+        connection.release(list(connection.segments))
+        self.connections.discard(connection)
+        try:
+            self.selector.unregister(connection.sock)
+        except (KeyError, ValueError):
+            pass
+        connection.sock.close()
+
+    def _queue_response(self, connection, pending, response):
+        """Hand a command's response to the I/O thread; safe from any thread"""
+        self.outbox.append((connection, pending, response))
+        self._wakeup()
+
+    def _send_responses(self, wakeup_socket, events):
+        """Serialize finished responses on the I/O thread and start sending them"""
+        try:
+            while wakeup_socket.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+        touched = set()
+        while self.outbox:
+            connection, pending, response = self.outbox.popleft()
+            if response.get("status") != "partial":
+                connection.inflight -= 1
+            if connection.closed:
+                # Stop streaming to a client that is gone
+                pending.cancelled = True
+                continue
+            if "trace" in pending.command and response.get("status") != "partial":
+                response["timings"] = {
+                    "read": round(pending.read_time * 1000.0, 3),
+                    "queue": round(pending.queue_time * 1000.0, 3),
+                    "handler": round(pending.handler_time * 1000.0, 3),
                 }
+            started = time.perf_counter()
+            connection.send(response, pending.command.get("blob_transport"))
+            pending.serialize_time += time.perf_counter() - started
+            if response.get("status") != "partial":
+                self.metrics.observe(self._metric_type(pending.command), "serialize", pending.serialize_time)
+            touched.add(connection)
+
+        for connection in touched:
+            try:
+                self._update_client(connection)
+            except Exception as e:
+                print(f"Client handler error: {e}")
+                self._close_client(connection)
+
+    def _metric_type(self, command):
+        """Metrics label of a command; unknown types share one label"""
+        cmd_type = command.get("type")
+        return cmd_type if cmd_type in self.handlers else "unknown"
+
+    def _submit_command(self, command, callback=None):
+        """Queue a command for the main thread; returns its _PendingCommand"""
+        if not isinstance(command, dict):
+            pending = _PendingCommand({}, callback)
+            self._finish(pending, {"status": "error", "message": "Command must be a JSON object"})
+            return pending
+
+        pending = _PendingCommand(command, callback)
+        cmd_type = command.get("type")
+        if cmd_type not in self.handlers:
+            self._finish(pending, {
+                "status": "error",
+                "message": f"Unknown command: {cmd_type}"
+            })
+            return pending
 
-            # Execute handler in main thread
-            result = {"status": "pending"}
-            result_container = [result]
+        self.command_queue.put(pending)
+        return pending
 
-            def execute_in_main_thread():
-                try:
-                    handler = self.handlers[cmd_type]
-                    result_container[0] = handler(params)
-                except Exception as e:
-                    result_container[0] = {
-                        "status": "error",
-                        "message": str(e),
-                        "traceback": traceback.format_exc()
-                    }
+    def _process_command(self, command):
+        """Queue a command for the main thread and wait for its response"""
+        pending = self._submit_command(command)
 
-            # Schedule execution in Blender's main thread
-            bpy.app.timers.register(execute_in_main_thread, first_interval=0.0)
-
-            # Wait for execution (with timeout)
-            import time
-            timeout = 180
-            start_time = time.time()
-            while result_container[0]["status"] == "pending":
-                time.sleep(0.1)
-                if time.time() - start_time > timeout:
-                    return {
-                        "status": "error",
-                        "message": "Command execution timeout"
-                    }
+        if not pending.done.wait(COMMAND_TIMEOUT):
+            # Skip it if the main thread has not picked it up yet
+            pending.cancelled = True
+            return {
+                "status": "error",
+                "message": "Command execution timeout"
+            }
+
+        return pending.response
+
+    def _dispatch_commands(self):
+        """Persistent main-thread timer: run queued commands and signal completion"""
+        if not self.running:
+            return None
 
-            return result_container[0]
+        now = time.perf_counter()
+        deadline = now + DISPATCH_BUDGET
+        while now < deadline:
+            try:
+                pending = self.command_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if pending.cancelled:
+                continue
+            pending.queue_time = now - pending.queued_at
+            self.metrics.observe(self._metric_type(pending.command), "queue", pending.queue_time)
+            if time.monotonic() > pending.deadline:
+                self._finish(pending, {"status": "error", "message": "Command execution timeout"})
+                continue
+
+            response = self._execute_command(pending.command)
+            finished = time.perf_counter()
+            pending.handler_time += finished - now
+            if isinstance(response, types.GeneratorType):
+                self.streams.append((pending, response))
+            else:
+                self._finish(pending, response)
+            now = self._last_dispatch = time.perf_counter()
+
+        # Advance every streaming command by one slice, round robin
+        for _ in range(len(self.streams)):
+            if time.perf_counter() >= deadline:
+                break
+            pending, stream = self.streams.popleft()
+            if self._advance_stream(pending, stream):
+                self.streams.append((pending, stream))
+            self._last_dispatch = time.perf_counter()
+
+        self._redraw_panel()
+
+        if self.streams or not self.command_queue.empty():
+            # Work left, come back on the next tick
+            return 0.0
+        idle = time.perf_counter() - self._last_dispatch
+        if idle < DISPATCH_HOT_WINDOW:
+            return 0.0
+        if idle < DISPATCH_IDLE_AFTER:
+            return DISPATCH_INTERVAL
+        return DISPATCH_IDLE_INTERVAL
+
+    def _redraw_panel(self):
+        """Tag the 3D view sidebars for redraw so the panel's metrics stay live"""
+        version = self.metrics.version
+        now = time.monotonic()
+        if version == self._panel_version or now - self._panel_redrawn_at < PANEL_REDRAW_INTERVAL:
+            return
+        self._panel_version = version
+        self._panel_redrawn_at = now
 
+        window_manager = bpy.context.window_manager
+        if window_manager is None:
+            return
+        for window in window_manager.windows:
+            for area in window.screen.areas:
+                if area.type != 'VIEW_3D':
+                    continue
+                for region in area.regions:
+                    if region.type == 'UI':
+                        region.tag_redraw()
+
+    def _advance_stream(self, pending, stream):
+        """Run one slice of a streaming command; returns True if it has more"""
+        if pending.cancelled:
+            stream.close()
+            return False
+
+        started = time.perf_counter()
+        try:
+            partial = next(stream)
+        except StopIteration as stop:
+            pending.handler_time += time.perf_counter() - started
+            self._finish(pending, stop.value or {"status": "success", "result": {}})
+            return False
+        except Exception as e:
+            pending.handler_time += time.perf_counter() - started
+            self._finish(pending, {
+                "status": "error",
+                "message": str(e),
+                "traceback": traceback.format_exc()
+            })
+            return False
+
+        pending.handler_time += time.perf_counter() - started
+        pending.emit(partial)
+        return True
+
+    def _finish(self, pending, response):
+        """Complete a command and count it in the metrics"""
+        ran = pending.handler_time > 0.0
+        self.metrics.finished(self._metric_type(pending.command), response, pending.handler_time if ran else None)
+        pending.finish(response)
+
+    def _execute_command(self, command):
+        """Run a command handler; must be called from the main thread"""
+        try:
+            handler = self.handlers[command.get("type")]
+            return handler(command.get("params", {}))
         except Exception as e:
             return {
                 "status": "error",
@@ -197,35 +1712,115 @@ class BlenderMCPServer:
     # Command Handlers
 
     def _handle_get_scene_info(self, params):
-        """Get information about the current scene"""
+        """Get information about the current scene
+
+        Objects can be filtered by "types", "collection" and a
+        "name_pattern" glob, and "fields" selects what is reported per
+        object. The result can be paged with "offset"/"limit" or the opaque
+        "cursor" returned as next_cursor (send the same filters again).
+        With "stream" the page is sent as partial responses of
+        "chunk_size" objects, one chunk per main-thread tick, followed by a
+        final response without objects.
+        """
         scene = bpy.context.scene
+        getters = _field_getters(params.get("fields") or SCENE_OBJECT_FIELDS)
+
+        objects = scene.objects
+        if params.get("collection"):
+            collection = bpy.data.collections.get(params["collection"])
+            if not collection:
+                return {"status": "error", "message": f"Collection '{params['collection']}' not found"}
+            objects = collection.all_objects
+
+        types_filter = params.get("types")
+        name_pattern = params.get("name_pattern")
+        if types_filter or name_pattern or objects is not scene.objects:
+            types_filter = set(types_filter) if types_filter else None
+            match = re.compile(fnmatch.translate(name_pattern)).match if name_pattern else None
+            objects = [
+                obj for obj in objects
+                if (types_filter is None or obj.type in types_filter)
+                and (match is None or match(obj.name))
+            ]
+        total = len(objects)
+
+        offset = params.get("offset", 0)
+        if params.get("cursor"):
+            try:
+                cursor = json.loads(base64.urlsafe_b64decode(params["cursor"]))
+                offset = cursor["offset"]
+            except (ValueError, KeyError, TypeError):
+                return {"status": "error", "message": "Invalid cursor"}
+            if not _is_count(offset):
+                return {"status": "error", "message": "Invalid cursor"}
+            if cursor.get("scene") != scene.name:
+                return {"status": "error", "message": "Cursor belongs to a different scene"}
+        elif not _is_count(offset):
+            return {"status": "error", "message": "offset must be a non-negative integer"}
+
+        limit = params.get("limit")
+        if limit is not None and not _is_count(limit):
+            return {"status": "error", "message": "limit must be a non-negative integer"}
+        chunk_size = params.get("chunk_size", 1000)
+        if not _is_count(chunk_size) or chunk_size < 1:
+            return {"status": "error", "message": "chunk_size must be a positive integer"}
+        stop = total if limit is None else min(total, offset + limit)
+        next_cursor = None
+        if stop < total:
+            next_cursor = base64.urlsafe_b64encode(
+                json.dumps({"scene": scene.name, "offset": stop}).encode('utf-8')
+            ).decode('ascii')
 
-        objects = []
-        for obj in scene.objects:
-            objects.append({
-                "name": obj.name,
-                "type": obj.type,
-                "location": list(obj.location),
-                "rotation": list(obj.rotation_euler),
-                "scale": list(obj.scale),
-                "visible": not obj.hide_get(),
-            })
-
-        return {
-            "status": "success",
-            "result": {
-                "name": scene.name,
-                "frame_current": scene.frame_current,
-                "frame_start": scene.frame_start,
-                "frame_end": scene.frame_end,
-                "render_engine": scene.render.engine,
-                "objects": objects,
-                "object_count": len(objects),
-            }
+        info = {
+            "name": scene.name,
+            "frame_current": scene.frame_current,
+            "frame_start": scene.frame_start,
+            "frame_end": scene.frame_end,
+            "render_engine": scene.render.engine,
+            "total": total,
+            "offset": offset,
+            "next_cursor": next_cursor,
         }
 
+        if params.get("stream"):
+            # Stream from a snapshot: the live scene.objects can shift between ticks
+            return self._stream_scene_objects(list(objects[offset:stop]), offset, chunk_size, getters, info)
+
+        described = self._describe_objects(objects[offset:stop], getters)
+        info["objects"] = described
+        info["object_count"] = len(described)
+        return {"status": "success", "result": info}
+
+    def _stream_scene_objects(self, objects, offset, chunk_size, getters, info):
+        """Generator handler yielding scene objects in chunks
+
+        objects is the page snapshotted before the first yield; offset is
+        the index of its first object in the scene's list.
+        """
+        sent = 0
+        chunks = 0
+        for chunk_start in range(0, len(objects), chunk_size):
+            described = self._describe_objects(objects[chunk_start:chunk_start + chunk_size], getters)
+            sent += len(described)
+            chunks += 1
+            yield {"result": {"objects": described, "offset": offset + chunk_start}}
+
+        info["object_count"] = sent
+        info["chunks"] = chunks
+        return {"status": "success", "result": info}
+
+    def _describe_objects(self, objects, getters):
+        described = []
+        for obj in objects:
+            try:
+                described.append(_describe_object(obj, getters))
+            except ReferenceError:
+                # Snapshots may hold objects deleted between stream slices
+                continue
+        return described
+
     def _handle_get_object_info(self, params):
-        """Get detailed information about a specific object"""
+        """Get detailed information about a specific object, limited to "fields" if given"""
         obj_name = params.get("name")
         if not obj_name:
             return {"status": "error", "message": "Object name required"}
@@ -234,82 +1829,568 @@ class BlenderMCPServer:
         if not obj:
             return {"status": "error", "message": f"Object '{obj_name}' not found"}
 
+        getters = _field_getters(params.get("fields") or OBJECT_INFO_FIELDS)
+        return {"status": "success", "result": _describe_object(obj, getters)}
+
+    def _handle_get_scene_changes(self, params):
+        """Objects added, removed or modified since "since_version"
+
+        Without since_version only the current version is returned, as a
+        starting point. When resync_required is set the changes are no
+        longer known and the client should re-read get_scene_info.
+        """
+        tracker = self.scene_changes
+        since_version = params.get("since_version")
+        if since_version is None:
+            return {"status": "success", "result": {"version": tracker.version, "scene": tracker.scene_name}}
+        return {"status": "success", "result": tracker.changes_since(int(since_version))}
+
+    def _handle_get_mesh_data(self, params):
+        """Export mesh geometry as packed binary arrays
+
+        "attributes" picks from MESH_ATTRIBUTES (default positions, normals
+        and triangles). Triangles index vertices; triangle_loops index the
+        per-loop uvs. With "evaluated" the mesh after modifiers is used.
+        The arrays are read with foreach_get and returned as one blob
+        described by "layout", or with "stream" as partial responses of
+        "chunk_size" bytes each, sent over several main-thread ticks.
+        """
+        obj_name = params.get("name")
+        if not obj_name:
+            return {"status": "error", "message": "Object name required"}
+
+        obj = bpy.data.objects.get(obj_name)
+        if not obj:
+            return {"status": "error", "message": f"Object '{obj_name}' not found"}
+
+        attributes = params.get("attributes") or ["positions", "normals", "triangles"]
+        unknown = [name for name in attributes if name not in MESH_ATTRIBUTES]
+        if unknown:
+            return {"status": "error", "message": f"Unknown attributes: {', '.join(unknown)}. Available: {', '.join(MESH_ATTRIBUTES)}"}
+        chunk_size = params.get("chunk_size", MESH_CHUNK_SIZE)
+        if not _is_count(chunk_size) or chunk_size < 1:
+            return {"status": "error", "message": "chunk_size must be a positive integer"}
+
+        evaluated = params.get("evaluated", False)
+        if evaluated:
+            obj_eval = obj.evaluated_get(bpy.context.evaluated_depsgraph_get())
+            mesh = obj_eval.to_mesh()
+        elif obj.type == 'MESH':
+            mesh = obj.data
+        else:
+            return {"status": "error", "message": f"Object '{obj_name}' is not a mesh; use evaluated to convert it"}
+
+        try:
+            arrays = self._read_mesh_arrays(mesh, attributes, params.get("uv_layer"))
+        finally:
+            if evaluated:
+                obj_eval.to_mesh_clear()
+
         info = {
             "name": obj.name,
-            "type": obj.type,
-            "location": list(obj.location),
-            "rotation_euler": list(obj.rotation_euler),
-            "scale": list(obj.scale),
-            "dimensions": list(obj.dimensions),
-            "visible": not obj.hide_get(),
+            "evaluated": bool(evaluated),
+            "vertex_count": arrays.pop("_vertex_count"),
+            "triangle_count": arrays.pop("_triangle_count"),
+            "loop_count": arrays.pop("_loop_count"),
         }
 
-        # Add mesh-specific info
-        if obj.type == 'MESH' and obj.data:
-            info["vertices"] = len(obj.data.vertices)
-            info["edges"] = len(obj.data.edges)
-            info["faces"] = len(obj.data.polygons)
-
+        layout = {}
+        offset = 0
+        for name in attributes:
+            typecode, dtype, components = MESH_ATTRIBUTES[name]
+            size = len(arrays[name]) * arrays[name].itemsize
+            layout[name] = {"offset": offset, "size": size, "dtype": dtype, "components": components}
+            offset += size
+        info["layout"] = layout
+        info["size"] = offset
+
+        if params.get("stream"):
+            return self._stream_mesh_data(arrays, attributes, chunk_size, info)
+
+        blob = b"".join(arrays[name].tobytes() for name in attributes)
+        return {"status": "success", "result": info, "blob": blob}
+
+    def _read_mesh_arrays(self, mesh, attributes, uv_layer=None):
+        """foreach_get the requested attributes of a mesh into arrays"""
+        vertex_count = len(mesh.vertices)
+        loop_count = len(mesh.loops)
+        wanted = set(attributes)
+        if wanted & {"triangles", "triangle_loops"}:
+            mesh.calc_loop_triangles()
+        triangle_count = len(mesh.loop_triangles)
+
+        arrays = {
+            "_vertex_count": vertex_count,
+            "_triangle_count": triangle_count,
+            "_loop_count": loop_count,
+        }
+        for name in attributes:
+            typecode, dtype, components = MESH_ATTRIBUTES[name]
+            if name == "positions":
+                values = array.array(typecode, bytes(vertex_count * components * 4))
+                mesh.vertices.foreach_get("co", values)
+            elif name == "normals":
+                values = array.array(typecode, bytes(vertex_count * components * 4))
+                mesh.vertex_normals.foreach_get("vector", values)
+            elif name == "triangles":
+                values = array.array(typecode, bytes(triangle_count * components * 4))
+                mesh.loop_triangles.foreach_get("vertices", values)
+            elif name == "triangle_loops":
+                values = array.array(typecode, bytes(triangle_count * components * 4))
+                mesh.loop_triangles.foreach_get("loops", values)
+            else:
+                layer = mesh.uv_layers.get(uv_layer) if uv_layer else mesh.uv_layers.active
+                if layer is None:
+                    raise ValueError(f"Mesh '{mesh.name}' has no UV layer {uv_layer or ''}".rstrip())
+                values = array.array(typecode, bytes(loop_count * components * 4))
+                layer.uv.foreach_get("vector", values)
+            arrays[name] = values
+        return arrays
+
+    def _stream_mesh_data(self, arrays, attributes, chunk_size, info):
+        """Generator handler sending the mesh buffers in chunks
+
+        Each partial response carries one chunk as its blob with the byte
+        "offset" it starts at in the layout, so the client can assemble the
+        buffers in a preallocated array.
+        """
+        offset = 0
+        chunks = 0
+        for name in attributes:
+            data = memoryview(arrays[name]).cast('B')
+            for start in range(0, len(data), chunk_size):
+                chunk = data[start:start + chunk_size]
+                chunks += 1
+                yield {"result": {"offset": offset + start}, "blob": chunk}
+            offset += len(data)
+
+        info["chunks"] = chunks
         return {"status": "success", "result": info}
 
     def _handle_create_object(self, params):
-        """Create a new object"""
+        """Create a new object
+
+        Primitives are copied from a template mesh built once per parameter
+        set with bmesh, so no operator runs. Like the operators, the new
+        object ends up the only selected one and active. The bpy.ops
+        primitive operators remain as a fallback if building the template
+        fails.
+        """
         obj_type = params.get("type", "cube").lower()
         name = params.get("name")
         location = params.get("location", [0, 0, 0])
 
-        # Create object based on type
+        if obj_type not in PRIMITIVE_DEFAULTS:
+            return {"status": "error", "message": f"Unknown object type: {obj_type}"}
+        settings = {
+            key: params.get(key, default)
+            for key, default in PRIMITIVE_DEFAULTS[obj_type].items()
+        }
+
+        try:
+            template = self._primitive_template(obj_type, settings)
+        except Exception as e:
+            print(f"Building {obj_type} template failed, using the operator: {e}")
+            obj = self._create_primitive_with_operator(obj_type, settings, location)
+        else:
+            mesh = template.copy()
+            mesh.name = obj_type.capitalize()
+            obj = bpy.data.objects.new(mesh.name, mesh)
+            obj.location = location
+            bpy.context.collection.objects.link(obj)
+            view_layer_objects = bpy.context.view_layer.objects
+            for selected in list(view_layer_objects.selected):
+                selected.select_set(False)
+            view_layer_objects.active = obj
+            obj.select_set(True)
+
+        # Rename if name provided
+        if name:
+            obj.name = name
+
+        return {
+            "status": "success",
+            "result": {
+                "name": obj.name,
+                "type": obj.type,
+                "location": list(obj.location)
+            }
+        }
+
+    def _primitive_template(self, obj_type, settings):
+        """Get or build the hidden template mesh for a primitive and its settings
+
+        Templates have no users, so Blender drops them when the file is
+        saved and reopened; a template missing from bpy.data.meshes is
+        simply built again.
+        """
+        key = json.dumps([obj_type, settings], sort_keys=True).encode('utf-8')
+        template_name = f".MCP_Template_{obj_type}_{hashlib.sha1(key).hexdigest()[:12]}"
+        mesh = bpy.data.meshes.get(template_name)
+        if mesh is not None:
+            return mesh
+
+        mesh = bpy.data.meshes.new(template_name)
+        try:
+            if obj_type == "torus":
+                self._build_torus(mesh, **settings)
+            else:
+                self._build_bmesh_primitive(mesh, obj_type, settings)
+        except Exception:
+            bpy.data.meshes.remove(mesh)
+            raise
+        return mesh
+
+    def _build_bmesh_primitive(self, mesh, obj_type, settings):
+        """Fill mesh with the bmesh op behind the matching primitive operator"""
+        bm = bmesh.new()
+        try:
+            # The create ops only write UVs into an existing layer
+            bm.loops.layers.uv.new("UVMap")
+            if obj_type == "cube":
+                bmesh.ops.create_cube(bm, size=settings["size"], calc_uvs=True)
+            elif obj_type == "sphere":
+                bmesh.ops.create_uvsphere(
+                    bm,
+                    u_segments=settings["segments"],
+                    v_segments=settings["ring_count"],
+                    radius=settings["radius"],
+                    calc_uvs=True,
+                )
+            elif obj_type in ("cylinder", "cone"):
+                bmesh.ops.create_cone(
+                    bm,
+                    cap_ends=True,
+                    segments=settings["vertices"],
+                    radius1=settings["radius"],
+                    radius2=settings["radius"] if obj_type == "cylinder" else 0.0,
+                    depth=settings["depth"],
+                    calc_uvs=True,
+                )
+            elif obj_type == "plane":
+                # create_grid's size is the half width, like the operator passes it
+                bmesh.ops.create_grid(bm, x_segments=1, y_segments=1, size=settings["size"] / 2.0, calc_uvs=True)
+            bm.to_mesh(mesh)
+        finally:
+            bm.free()
+
+    def _build_torus(self, mesh, major_radius, minor_radius, major_segments, minor_segments):
+        """Fill mesh with a quad torus around Z; there is no bmesh op for it"""
+        positions = array.array('f')
+        for i in range(major_segments):
+            u = 2.0 * math.pi * i / major_segments
+            for j in range(minor_segments):
+                v = 2.0 * math.pi * j / minor_segments
+                ring = major_radius + minor_radius * math.cos(v)
+                positions.extend((ring * math.cos(u), ring * math.sin(u), minor_radius * math.sin(v)))
+
+        # Quads wind (u, v) -> (u+1, v) -> (u+1, v+1) -> (u, v+1), facing outwards
+        corners = ((0, 0), (1, 0), (1, 1), (0, 1))
+        indices = array.array('i', [
+            (i + di) % major_segments * minor_segments + (j + dj) % minor_segments
+            for i in range(major_segments)
+            for j in range(minor_segments)
+            for di, dj in corners
+        ])
+        loop_starts = array.array('i', range(0, len(indices), 4))
+        self._fill_mesh(mesh, positions, indices, loop_starts)
+
+        # Unwrapped UVs: corners past the seam get u or v of 1.0
+        uvs = array.array('f', [
+            value
+            for i in range(major_segments)
+            for j in range(minor_segments)
+            for di, dj in corners
+            for value in ((i + di) / major_segments, (j + dj) / minor_segments)
+        ])
+        mesh.uv_layers.new(name="UVMap").uv.foreach_set("vector", uvs)
+
+    def _create_primitive_with_operator(self, obj_type, settings, location):
+        """Create a primitive through bpy.ops and return the new active object"""
         if obj_type == "cube":
-            bpy.ops.mesh.primitive_cube_add(size=params.get("size", 2.0), location=location)
+            bpy.ops.mesh.primitive_cube_add(size=settings["size"], location=location)
         elif obj_type == "sphere":
             bpy.ops.mesh.primitive_uv_sphere_add(
-                radius=params.get("radius", 1.0),
+                radius=settings["radius"],
                 location=location,
-                segments=params.get("segments", 32),
-                ring_count=params.get("ring_count", 16)
+                segments=settings["segments"],
+                ring_count=settings["ring_count"]
             )
         elif obj_type == "cylinder":
             bpy.ops.mesh.primitive_cylinder_add(
-                radius=params.get("radius", 1.0),
-                depth=params.get("depth", 2.0),
+                radius=settings["radius"],
+                depth=settings["depth"],
+                vertices=settings["vertices"],
                 location=location
             )
         elif obj_type == "cone":
             bpy.ops.mesh.primitive_cone_add(
-                radius1=params.get("radius", 1.0),
-                depth=params.get("depth", 2.0),
+                radius1=settings["radius"],
+                depth=settings["depth"],
+                vertices=settings["vertices"],
                 location=location
             )
         elif obj_type == "plane":
             bpy.ops.mesh.primitive_plane_add(
-                size=params.get("size", 2.0),
+                size=settings["size"],
                 location=location
             )
         elif obj_type == "torus":
             bpy.ops.mesh.primitive_torus_add(
-                major_radius=params.get("major_radius", 1.0),
-                minor_radius=params.get("minor_radius", 0.25),
+                major_radius=settings["major_radius"],
+                minor_radius=settings["minor_radius"],
+                major_segments=settings["major_segments"],
+                minor_segments=settings["minor_segments"],
                 location=location
             )
+        return bpy.context.active_object
+
+    def _handle_create_mesh(self, params):
+        """Create a mesh object from packed vertex and index buffers
+
+        "positions" holds 3 floats per vertex and "indices" the vertex
+        indices of every face: triangles, or faces of "face_sizes" corners.
+        Optional "normals" (3 floats per vertex, set as custom normals) and
+        "uvs" (2 floats per vertex or per face corner) complete the mesh.
+        Buffers take any form _packed_array accepts and are written with
+        foreach_set, the normals as a numpy view of their buffer. The result
+        reports milliseconds spent in each stage.
+        """
+        timings = {}
+        stage_start = time.perf_counter()
+
+        def lap(stage):
+            nonlocal stage_start
+            now = time.perf_counter()
+            timings[stage] = round((now - stage_start) * 1000.0, 3)
+            stage_start = now
+
+        if params.get("positions") is None or params.get("indices") is None:
+            return {"status": "error", "message": "positions and indices required"}
+
+        blob = params.get("_blob")
+        positions = _float_array(params["positions"], blob=blob)
+        if len(positions) % 3:
+            return {"status": "error", "message": "positions must hold 3 floats per vertex"}
+        vertex_count = len(positions) // 3
+
+        indices = _packed_array(params["indices"], 'i', blob=blob)
+        loop_count = len(indices)
+        if loop_count and (min(indices) < 0 or max(indices) >= vertex_count):
+            return {"status": "error", "message": f"indices must be in range 0..{vertex_count - 1}"}
+
+        if params.get("face_sizes") is not None:
+            face_sizes = _packed_array(params["face_sizes"], 'i', blob=blob)
+            if sum(face_sizes) != loop_count or (face_sizes and min(face_sizes) < 3):
+                return {"status": "error", "message": "face_sizes must be at least 3 each and sum to the number of indices"}
+            loop_starts = array.array('i', itertools.accumulate(face_sizes, initial=0))
+            loop_starts.pop()
         else:
-            return {"status": "error", "message": f"Unknown object type: {obj_type}"}
-
-        # Get the created object
-        obj = bpy.context.active_object
-
-        # Rename if name provided
-        if name:
-            obj.name = name
-
+            if loop_count % 3:
+                return {"status": "error", "message": "indices must hold 3 vertex indices per triangle"}
+            loop_starts = array.array('i', range(0, loop_count, 3))
+
+        normals = None
+        if params.get("normals") is not None:
+            normals = _float_array(params["normals"], vertex_count * 3, blob)
+        uvs = None
+        if params.get("uvs") is not None:
+            uvs = _float_array(params["uvs"], blob=blob)
+            if len(uvs) not in (vertex_count * 2, loop_count * 2):
+                return {"status": "error", "message": "uvs must hold 2 floats per vertex or per face corner"}
+        lap("decode")
+
+        name = params.get("name") or "Mesh"
+        mesh = bpy.data.meshes.new(name)
+        self._fill_mesh(mesh, positions, indices, loop_starts, lap)
+        if params.get("validate"):
+            mesh.validate()
+        lap("update")
+
+        if uvs is not None:
+            if len(uvs) != loop_count * 2:
+                # Per-vertex UVs: expand to face corners with strided array copies
+                corner_uvs = array.array('f', bytes(loop_count * 8))
+                corner_uvs[0::2] = array.array('f', map(uvs[0::2].__getitem__, indices))
+                corner_uvs[1::2] = array.array('f', map(uvs[1::2].__getitem__, indices))
+                uvs = corner_uvs
+            layer = mesh.uv_layers.new(name=params.get("uv_layer", "UVMap"))
+            layer.uv.foreach_set("vector", uvs)
+            lap("uvs")
+
+        if normals is not None:
+            # An (n, 3) view of the decoded buffer, which Blender copies in bulk
+            mesh.normals_split_custom_set_from_vertices(numpy.frombuffer(normals, numpy.float32).reshape(-1, 3))
+            lap("normals")
+
+        obj = bpy.data.objects.new(name, mesh)
+        obj.location = params.get("location", [0, 0, 0])
+        bpy.context.collection.objects.link(obj)
+        lap("link")
+
+        timings["total"] = round(sum(timings.values()), 3)
         return {
             "status": "success",
             "result": {
                 "name": obj.name,
-                "type": obj.type,
-                "location": list(obj.location)
+                "mesh": mesh.name,
+                "vertex_count": vertex_count,
+                "face_count": len(loop_starts),
+                "timings_ms": timings,
             }
         }
 
+    def _fill_mesh(self, mesh, positions, indices, loop_starts, lap=None):
+        """Write packed vertex/face arrays into an empty mesh with foreach_set"""
+        mesh.vertices.add(len(positions) // 3)
+        mesh.vertices.foreach_set("co", positions)
+        if lap:
+            lap("vertices")
+
+        mesh.loops.add(len(indices))
+        mesh.polygons.add(len(loop_starts))
+        mesh.polygons.foreach_set("loop_start", loop_starts)
+        mesh.loops.foreach_set("vertex_index", indices)
+        if lap:
+            lap("faces")
+
+        mesh.update(calc_edges=True)
+
+    def _handle_create_instances(self, params):
+        """Create many copies of one object or primitive in a single call
+
+        The copies come from "source" (an object name) or "primitive" (a
+        create_object spec, built once). "location", "rotation" and "scale"
+        are packed arrays of 3 floats per copy; "count" is only needed when
+        no location is given. mode "linked" (default) makes one object per
+        copy sharing the source's data; mode "geometry_nodes" makes a
+        single object instancing the source on points, which scales to far
+        larger counts.
+        """
+        mode = params.get("mode", "linked")
+        if mode not in ("linked", "geometry_nodes"):
+            return {"status": "error", "message": f"Unknown mode: {mode}"}
+        count = params.get("count")
+        if count is not None and not _is_count(count):
+            return {"status": "error", "message": "count must be a non-negative integer"}
+
+        if params.get("source"):
+            source = bpy.data.objects.get(params["source"])
+            if not source:
+                return {"status": "error", "message": f"Object '{params['source']}' not found"}
+            template = None
+        elif params.get("primitive"):
+            created = self._handle_create_object(params["primitive"])
+            if created["status"] != "success":
+                return created
+            source = template = bpy.data.objects[created["result"]["name"]]
+        else:
+            return {"status": "error", "message": "source or primitive required"}
+
+        blob = params.get("_blob")
+        if count is None:
+            if params.get("location") is None:
+                return {"status": "error", "message": "count or location required"}
+            count = len(_float_array(params["location"], blob=blob)) // 3
+        values = {
+            field: _float_array(params[field], count * 3, blob)
+            for field in TRANSFORM_ATTRIBUTES
+            if params.get(field) is not None
+        }
+
+        collection = bpy.context.collection
+        if params.get("collection"):
+            collection = bpy.data.collections.get(params["collection"])
+            if collection is None:
+                collection = bpy.data.collections.new(params["collection"])
+                bpy.context.scene.collection.children.link(collection)
+
+        name = params.get("name") or source.name
+        if mode == "geometry_nodes":
+            obj = self._create_instancer(name, source, count, values, collection)
+            if template is not None:
+                # Keep the primitive only as the instanced geometry
+                for user in list(template.users_collection):
+                    user.objects.unlink(template)
+            return {
+                "status": "success",
+                "result": {"mode": mode, "name": obj.name, "source": source.name, "count": count}
+            }
+
+        data = source.data
+        source_name = source.name
+        objects = []
+        for _ in range(count):
+            obj = bpy.data.objects.new(name, data)
+            collection.objects.link(obj)
+            objects.append(obj)
+        if values:
+            self._write_transforms(objects, values)
+        if template is not None:
+            # The primitive was only built for its mesh
+            bpy.data.objects.remove(template, do_unlink=True)
+
+        result = {"mode": mode, "source": source_name, "data": data.name if data else None, "count": count}
+        if params.get("return_names", True):
+            result["names"] = [obj.name for obj in objects]
+        return {"status": "success", "result": result}
+
+    def _create_instancer(self, name, source, count, values, collection):
+        """Point cloud object whose geometry-nodes modifier instances source
+
+        Points sit at the given locations and carry per-point mcp_rotation
+        and mcp_scale attributes that the shared node group reads.
+        """
+        mesh = bpy.data.meshes.new(name)
+        mesh.vertices.add(count)
+        if "location" in values:
+            mesh.vertices.foreach_set("co", values["location"])
+
+        rotation = values.get("rotation") or array.array('f', bytes(count * 12))
+        scale = values.get("scale") or array.array('f', [1.0]) * (count * 3)
+        mesh.attributes.new("mcp_rotation", 'FLOAT_VECTOR', 'POINT').data.foreach_set("vector", rotation)
+        mesh.attributes.new("mcp_scale", 'FLOAT_VECTOR', 'POINT').data.foreach_set("vector", scale)
+
+        obj = bpy.data.objects.new(name, mesh)
+        collection.objects.link(obj)
+
+        group = self._instancer_node_group()
+        modifier = obj.modifiers.new("MCP Instances", 'NODES')
+        modifier.node_group = group
+        modifier[group.interface.items_tree["Instance"].identifier] = source
+        return obj
+
+    def _instancer_node_group(self):
+        """Get or build the node group: Instance on Points of an Object Info"""
+        group = bpy.data.node_groups.get(INSTANCER_NODE_GROUP)
+        if group is not None:
+            return group
+
+        group = bpy.data.node_groups.new(INSTANCER_NODE_GROUP, 'GeometryNodeTree')
+        group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+        group.interface.new_socket(name="Instance", in_out='INPUT', socket_type='NodeSocketObject')
+        group.interface.new_socket(name="Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+
+        nodes, links = group.nodes, group.links
+        group_input = nodes.new('NodeGroupInput')
+        group_output = nodes.new('NodeGroupOutput')
+        object_info = nodes.new('GeometryNodeObjectInfo')
+        instance = nodes.new('GeometryNodeInstanceOnPoints')
+        rotation = nodes.new('GeometryNodeInputNamedAttribute')
+        rotation.data_type = 'FLOAT_VECTOR'
+        rotation.inputs["Name"].default_value = "mcp_rotation"
+        scale = nodes.new('GeometryNodeInputNamedAttribute')
+        scale.data_type = 'FLOAT_VECTOR'
+        scale.inputs["Name"].default_value = "mcp_scale"
+
+        links.new(group_input.outputs["Geometry"], instance.inputs["Points"])
+        links.new(group_input.outputs["Instance"], object_info.inputs["Object"])
+        links.new(object_info.outputs["Geometry"], instance.inputs["Instance"])
+        links.new(rotation.outputs["Attribute"], instance.inputs["Rotation"])
+        links.new(scale.outputs["Attribute"], instance.inputs["Scale"])
+        links.new(instance.outputs["Instances"], group_output.inputs["Geometry"])
+        return group
+
     def _handle_delete_object(self, params):
         """Delete an object"""
         obj_name = params.get("name")
@@ -384,30 +2465,174 @@ class BlenderMCPServer:
             "result": {"name": obj_name, "rotation": list(obj.rotation_euler)}
         }
 
+    def _lookup_objects(self, names):
+        """Resolve object names, raising ValueError naming any that are missing"""
+        if not isinstance(names, (list, tuple)):
+            # A bare string would otherwise be looked up character by character
+            raise ValueError("names must be a list of object names")
+        objects = [bpy.data.objects.get(name) for name in names]
+        missing = [name for name, obj in zip(names, objects) if obj is None]
+        if missing:
+            shown = ", ".join(missing[:10]) + (" ..." if len(missing) > 10 else "")
+            raise ValueError(f"{len(missing)} objects not found: {shown}")
+        return objects
+
+    def _bulk_indices(self, objects):
+        """Indices of objects in bpy.data.objects, or None if too few for a bulk pass"""
+        all_objects = bpy.data.objects
+        if len(objects) < len(all_objects) * TRANSFORM_BULK_FRACTION:
+            return None
+        positions = {name: index for index, name in enumerate(all_objects.keys())}
+        return numpy.fromiter((positions[obj.name] for obj in objects), numpy.intp, len(objects))
+
+    def _handle_set_transforms(self, params):
+        """Set location, rotation (Euler radians) and/or scale of many objects
+
+        Each value is a packed array of 3 floats per name: a list, base64
+        float32, or {"blob_offset": n} into the request's binary data.
+        """
+        names = params.get("names")
+        if not names:
+            return {"status": "error", "message": "Object names required"}
+
+        fields = [field for field in TRANSFORM_ATTRIBUTES if params.get(field) is not None]
+        if not fields:
+            return {"status": "error", "message": "At least one of location, rotation or scale required"}
+
+        objects = self._lookup_objects(names)
+        blob = params.get("_blob")
+        values = {field: _float_array(params[field], len(names) * 3, blob) for field in fields}
+        self._write_transforms(objects, values)
+
+        return {"status": "success", "result": {"count": len(objects), "fields": fields}}
+
+    def _write_transforms(self, objects, values):
+        """Assign packed transform arrays ({field: array('f')}) to objects
+
+        The bulk pass writes every object in bpy.data.objects back, the
+        others with exactly the values just read. Linked objects cannot be
+        edited, so files linking libraries always set objects one by one.
+        """
+        indices = self._bulk_indices(objects)
+        if indices is None or len(bpy.data.libraries):
+            for field, packed in values.items():
+                attribute = TRANSFORM_ATTRIBUTES[field]
+                for i, obj in enumerate(objects):
+                    setattr(obj, attribute, packed[i * 3:i * 3 + 3])
+            return
+
+        all_objects = bpy.data.objects
+        for field, packed in values.items():
+            attribute = TRANSFORM_ATTRIBUTES[field]
+            current = array.array('f', bytes(len(all_objects) * 12))
+            all_objects.foreach_get(attribute, current)
+            numpy.frombuffer(current, numpy.float32).reshape(-1, 3)[indices] = \
+                numpy.frombuffer(packed, numpy.float32).reshape(-1, 3)
+            all_objects.foreach_set(attribute, current)
+        # foreach_set bypasses RNA updates, so tag the depsgraph explicitly
+        for obj in objects:
+            obj.update_tag(refresh={'OBJECT'})
+
+    def _handle_get_transforms(self, params):
+        """Read location, rotation (Euler radians) and scale of many objects
+
+        Without "names" every object in the scene is returned. Values are
+        packed arrays of 3 floats per object, as lists, base64 float32
+        ("encoding": "base64") or one binary blob ("binary": true) whose
+        layout gives each field's byte offset.
+        """
+        fields = params.get("fields") or list(TRANSFORM_ATTRIBUTES)
+        unknown = [field for field in fields if field not in TRANSFORM_ATTRIBUTES]
+        if unknown:
+            return {"status": "error", "message": f"Unknown fields: {', '.join(unknown)}"}
+
+        names = params.get("names")
+        if names is None:
+            # The scene's object collection supports foreach_get directly
+            source = bpy.context.scene.objects
+            names = source.keys()
+            objects = None
+            indices = None
+        else:
+            source = bpy.data.objects
+            objects = self._lookup_objects(names)
+            indices = self._bulk_indices(objects)
+
+        values = {}
+        for field in fields:
+            attribute = TRANSFORM_ATTRIBUTES[field]
+            if objects is None:
+                packed = array.array('f', bytes(len(names) * 12))
+                source.foreach_get(attribute, packed)
+            elif indices is None:
+                packed = array.array('f')
+                for obj in objects:
+                    packed.extend(getattr(obj, attribute))
+            else:
+                current = array.array('f', bytes(len(source) * 12))
+                source.foreach_get(attribute, current)
+                packed = array.array('f')
+                packed.frombytes(numpy.frombuffer(current, numpy.float32).reshape(-1, 3)[indices].tobytes())
+            values[field] = packed
+
+        result = {"names": list(names), "count": len(names)}
+        if params.get("binary"):
+            layout = {}
+            offset = 0
+            for field in fields:
+                layout[field] = {"offset": offset, "length": len(values[field])}
+                offset += len(values[field]) * 4
+            result["layout"] = layout
+            blob = b"".join(values[field].tobytes() for field in fields)
+            return {"status": "success", "result": result, "blob": blob}
+
+        encoding = params.get("encoding", "list")
+        for field in fields:
+            result[field] = _encode_floats(values[field], encoding)
+        return {"status": "success", "result": result}
+
     def _handle_execute_code(self, params):
-        """Execute arbitrary Python code"""
+        """Execute arbitrary Python code
+
+        The source is compiled once and cached; "code_hash" from an earlier
+        response runs it again without resending it. With "session" the
+        namespace persists between calls until "reset" or eviction.
+        """
         code = params.get("code")
-        if not code:
+        code_hash = params.get("code_hash")
+        session = params.get("session")
+        runner = self.code_runner
+
+        if params.get("reset") and session is not None:
+            runner.reset(session)
+            if not code and not code_hash:
+                return {"status": "success", "result": f"Session '{session}' reset", "session": session}
+
+        if not code and not code_hash:
             return {"status": "error", "message": "Code required"}
 
         try:
+            code_hash, compiled = runner.compile(code, code_hash)
+
             # Create a namespace for execution
-            namespace = {
-                "bpy": bpy,
-                "C": bpy.context,
-                "D": bpy.data,
-            }
+            namespace = runner.namespace(session)
+            namespace.pop("result", None)
 
             # Execute code
-            exec(code, namespace)
+            exec(compiled, namespace)
 
             # Capture any output
             result = namespace.get("result", "Code executed successfully")
 
-            return {
+            response = {
                 "status": "success",
-                "result": str(result)
+                "result": str(result),
+                "code_hash": code_hash,
             }
+            if session is not None:
+                response["session"] = session
+                response["session_size"] = runner.check_memory(session)
+            return response
         except Exception as e:
             return {
                 "status": "error",
@@ -415,12 +2640,124 @@ class BlenderMCPServer:
                 "traceback": traceback.format_exc()
             }
 
+    def _handle_register_script(self, params):
+        """Compile and store a script to be run by name with run_script
+
+        The script reads its arguments from the "args" dict, validated
+        against "params_schema" (an object schema), and returns data by
+        assigning "result".
+        """
+        name = params.get("name")
+        code = params.get("code")
+        if not name or not code:
+            return {"status": "error", "message": "Script name and code required"}
+
+        schema = params.get("params_schema") or {"type": "object"}
+        if not isinstance(schema, dict) or schema.get("type", "object") != "object":
+            return {"status": "error", "message": "params_schema must be an object schema"}
+
+        replaced = name in self.code_runner.scripts
+        code_hash = self.code_runner.register(name, code, schema)
+        return {
+            "status": "success",
+            "result": {"name": name, "code_hash": code_hash, "replaced": replaced}
+        }
+
+    def _handle_run_script(self, params):
+        """Run a registered script and return its result as JSON data"""
+        name = params.get("name")
+        if not name:
+            return {"status": "error", "message": "Script name required"}
+
+        result = self.code_runner.run(name, params.get("args") or {})
+        return {"status": "success", "result": _json_safe(result)}
+
+    def _handle_list_scripts(self, params):
+        """Names, hashes and parameter schemas of the registered scripts"""
+        scripts = [
+            {"name": name, "code_hash": code_hash, "params_schema": schema}
+            for name, (code_hash, compiled, schema) in sorted(self.code_runner.scripts.items())
+        ]
+        return {"status": "success", "result": {"scripts": scripts}}
+
     def _handle_get_viewport_screenshot(self, params):
-        """Capture viewport screenshot"""
+        """Capture viewport screenshot
+
+        The 3D view is drawn into a GPU offscreen buffer and read back
+        directly; only when that is impossible (background mode, no 3D
+        view) does it fall back to rendering through a temporary file.
+        With "binary" the image is returned as the response blob instead
+        of base64 text. "format" may be "png" or "raw" (RGBA8, bottom row
+        first).
+        """
         width = params.get("width", 1920)
         height = params.get("height", 1080)
+        image_format = params.get("format", "png")
+
+        pixels = None
+        if params.get("method", "viewport") == "viewport":
+            pixels = self._read_viewport_pixels(width, height)
+
+        if pixels is None:
+            data = self._render_viewport_png(width, height)
+            image_format = "png"
+        elif image_format == "raw":
+            data = pixels
+        else:
+            data = _encode_png(pixels, width, height)
+            image_format = "png"
+
+        result = {
+            "width": width,
+            "height": height,
+            "format": image_format,
+            "mime_type": "image/png" if image_format == "png" else "application/octet-stream",
+        }
+        if params.get("binary"):
+            return {"status": "success", "result": result, "blob": data}
+
+        result["image_base64"] = base64.b64encode(data).decode('ascii')
+        return {"status": "success", "result": result}
+
+    def _read_viewport_pixels(self, width, height):
+        """Draw the first 3D view offscreen; returns RGBA8 bytes or None"""
+        if bpy.app.background:
+            return None
+
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                if area.type != 'VIEW_3D':
+                    continue
+                region = next((r for r in area.regions if r.type == 'WINDOW'), None)
+                if region is None:
+                    continue
+
+                space = area.spaces.active
+                offscreen = gpu.types.GPUOffScreen(width, height)
+                try:
+                    offscreen.draw_view3d(
+                        bpy.context.scene,
+                        window.view_layer,
+                        space,
+                        region,
+                        space.region_3d.view_matrix,
+                        _viewport_projection(region, space.region_3d.window_matrix, width, height),
+                        do_color_management=True
+                    )
+                    with offscreen.bind():
+                        framebuffer = gpu.state.active_framebuffer_get()
+                        buffer = framebuffer.read_color(0, 0, width, height, 4, 0, 'UBYTE')
+                    return memoryview(buffer).cast('B')
+                except Exception as e:
+                    print(f"Offscreen viewport capture failed, rendering instead: {e}")
+                    return None
+                finally:
+                    offscreen.free()
+
+        return None
 
-        # Create temporary file
+    def _render_viewport_png(self, width, height):
+        """Render the viewport through a temporary PNG file"""
         with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
             tmp_path = tmp.name
 
@@ -434,27 +2771,22 @@ class BlenderMCPServer:
             # Render viewport
             bpy.ops.render.opengl(write_still=True)
 
-            # Read image and encode as base64
             with open(tmp_path, "rb") as f:
-                image_data = base64.b64encode(f.read()).decode('utf-8')
-
-            return {
-                "status": "success",
-                "result": {
-                    "image_base64": image_data,
-                    "width": width,
-                    "height": height
-                }
-            }
+                return f.read()
         finally:
             # Clean up temp file
             if os.path.exists(tmp_path):
                 os.remove(tmp_path)
 
     def _handle_set_material(self, params):
-        """Set material properties for an object"""
+        """Set material properties for an object
+
+        By default the material comes from the shared pool, so objects
+        given identical properties use one material. Properties not given
+        keep the values of the object's current material. With
+        "shared": false the object gets its own "{name}_Material" as before.
+        """
         obj_name = params.get("name")
-        color = params.get("color")
 
         if not obj_name:
             return {"status": "error", "message": "Object name required"}
@@ -462,38 +2794,175 @@ class BlenderMCPServer:
         obj = bpy.data.objects.get(obj_name)
         if not obj:
             return {"status": "error", "message": f"Object '{obj_name}' not found"}
+        if obj.data is None or not hasattr(obj.data, "materials"):
+            return {"status": "error", "message": f"Object '{obj_name}' cannot have materials"}
 
-        # Create or get material
-        mat_name = f"{obj_name}_Material"
-        mat = bpy.data.materials.get(mat_name)
-        if not mat:
-            mat = bpy.data.materials.new(name=mat_name)
-            mat.use_nodes = True
-
-        # Set color if provided
-        if color:
-            nodes = mat.node_tree.nodes
-            principled = nodes.get("Principled BSDF")
-            if principled:
-                principled.inputs["Base Color"].default_value = tuple(color) + (1.0,) if len(color) == 3 else tuple(color)
-
-        # Assign material to object
-        if obj.data.materials:
-            obj.data.materials[0] = mat
+        spec = self._material_spec(params)
+        if params.get("shared", True):
+            mat = self._pooled_material(self._merged_material_spec(obj, spec))
         else:
-            obj.data.materials.append(mat)
+            # Create or get material
+            mat_name = f"{obj_name}_Material"
+            mat = bpy.data.materials.get(mat_name)
+            if not mat:
+                mat = bpy.data.materials.new(name=mat_name)
+                mat.use_nodes = True
+                mat[MATERIAL_OWNER_PROPERTY] = obj_name
+            self._apply_material_spec(mat, spec)
+
+        self._assign_material(obj, mat)
 
         return {
             "status": "success",
-            "result": {"object": obj_name, "material": mat_name}
+            "result": {"object": obj_name, "material": mat.name}
         }
 
+    def _handle_set_materials(self, params):
+        """Assign pooled materials to many objects in one pass
+
+        "assignments" is a list of {"names": [...], "color": ..., ...};
+        top-level "names" plus properties is shorthand for one assignment.
+        As with set_material, properties not given keep each object's
+        current values. With "cleanup_orphans" the materials this addon
+        created that are left without users are removed afterwards.
+        """
+        assignments = params.get("assignments")
+        if assignments is None:
+            if not params.get("names"):
+                return {"status": "error", "message": "names or assignments required"}
+            assignments = [params]
+
+        # Resolve everything first so a bad name changes nothing
+        resolved = []
+        for assignment in assignments:
+            objects = self._lookup_objects(assignment.get("names") or [])
+            for obj in objects:
+                if obj.data is None or not hasattr(obj.data, "materials"):
+                    raise ValueError(f"Object '{obj.name}' cannot have materials")
+            resolved.append((objects, self._material_spec(assignment)))
+
+        materials = {}
+        assigned = 0
+        for objects, spec in resolved:
+            # Objects sharing a current material merge to the same spec
+            merged = {}
+            for obj in objects:
+                current = obj.data.materials[0] if obj.data.materials else None
+                key = current.name if current is not None else None
+                if key not in merged:
+                    merged[key] = self._pooled_material(self._merged_material_spec(obj, spec))
+                mat = merged[key]
+                self._assign_material(obj, mat)
+                materials[mat.name] = materials.get(mat.name, 0) + 1
+            assigned += len(objects)
+
+        result = {"assigned": assigned, "materials": materials}
+        if params.get("cleanup_orphans"):
+            result["removed"] = self._remove_orphan_materials()
+        return {"status": "success", "result": result}
+
+    def _material_spec(self, params):
+        """Normalized material properties; equal specs share a pooled material"""
+        spec = {}
+        color = params.get("color")
+        if color:
+            color = list(color) + [1.0] if len(color) == 3 else list(color)
+            spec["color"] = [round(float(c), 6) for c in color]
+        for key in MATERIAL_PROPERTIES:
+            if params.get(key) is not None:
+                spec[key] = round(float(params[key]), 6)
+        return spec
+
+    def _merged_material_spec(self, obj, spec):
+        """spec over the properties of the object's current material
+
+        Pooled materials carry their spec; for any other material the
+        Principled BSDF inputs are read back, so an edit of one property
+        keeps the others.
+        """
+        materials = obj.data.materials
+        current = materials[0] if materials else None
+        if current is None:
+            return spec
+
+        stored = current.get(MATERIAL_SPEC_PROPERTY)
+        if stored:
+            merged = json.loads(stored)
+        else:
+            merged = self._read_material_spec(current)
+        merged.update(spec)
+        return merged
+
+    def _read_material_spec(self, mat):
+        """Material properties from a material's Principled BSDF inputs"""
+        principled = mat.node_tree.nodes.get("Principled BSDF") if mat.node_tree else None
+        if not principled:
+            return {}
+        values = {"color": principled.inputs["Base Color"].default_value}
+        for key, socket in MATERIAL_PROPERTIES.items():
+            values[key] = principled.inputs[socket].default_value
+        return self._material_spec(values)
+
+    def _pooled_material(self, spec):
+        """Get or create the shared material for a spec, named by its hash"""
+        key = json.dumps(spec, sort_keys=True)
+        mat_name = f"{MATERIAL_POOL_PREFIX}{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}"
+        mat = bpy.data.materials.get(mat_name)
+        if not mat:
+            mat = bpy.data.materials.new(name=mat_name)
+            mat.use_nodes = True
+            mat[MATERIAL_SPEC_PROPERTY] = key
+            self._apply_material_spec(mat, spec)
+        return mat
+
+    def _apply_material_spec(self, mat, spec):
+        principled = mat.node_tree.nodes.get("Principled BSDF")
+        if not principled:
+            return
+        if "color" in spec:
+            principled.inputs["Base Color"].default_value = tuple(spec["color"])
+        for key, socket in MATERIAL_PROPERTIES.items():
+            if key in spec:
+                principled.inputs[socket].default_value = spec[key]
+
+    def _assign_material(self, obj, mat):
+        """Put mat in the first material slot of the object's data"""
+        materials = obj.data.materials
+        if not materials:
+            materials.append(mat)
+        elif materials[0] != mat:
+            materials[0] = mat
+
+    def _remove_orphan_materials(self):
+        """Remove this addon's materials that no longer have users"""
+        removed = []
+        for mat in list(bpy.data.materials):
+            if mat.users or mat.use_fake_user:
+                continue
+            if MATERIAL_SPEC_PROPERTY in mat or MATERIAL_OWNER_PROPERTY in mat:
+                removed.append(mat.name)
+                bpy.data.materials.remove(mat)
+        return removed
+
     def _handle_render_scene(self, params):
-        """Render the scene"""
+        """Render the scene
+
+        With "async" the render is queued as a job and its ID returned at
+        once; follow it with get_job_status and stop it with cancel_job.
+        """
         output_path = params.get("output_path")
         if not output_path:
             return {"status": "error", "message": "Output path required"}
 
+        if params.get("async"):
+            settings = {
+                key: params[key]
+                for key in ("output_path", "resolution_x", "resolution_y", "samples", "animation")
+                if key in params
+            }
+            job = self.render_jobs.submit(settings)
+            return {"status": "success", "result": self.render_jobs.describe(job)}
+
         scene = bpy.context.scene
         scene.render.filepath = output_path
 
@@ -513,19 +2982,121 @@ class BlenderMCPServer:
             "result": {"output": output_path}
         }
 
+    def _handle_get_job_status(self, params):
+        """Status, progress and outputs of one render job, or of all of them"""
+        job_id = params.get("job_id")
+        if job_id is None:
+            jobs = [self.render_jobs.describe(job) for job in self.render_jobs.jobs.values()]
+            return {"status": "success", "result": {"jobs": jobs}}
+
+        job = self.render_jobs.jobs.get(job_id)
+        if not job:
+            return {"status": "error", "message": f"Job '{job_id}' not found"}
+        return {"status": "success", "result": self.render_jobs.describe(job)}
+
+    def _handle_cancel_job(self, params):
+        """Cancel a queued render job or stop a running one
+
+        When a running render cannot be stopped (see _RenderJobs.cancel)
+        the status is "cancel_unsupported" and the job is left running.
+        """
+        job_id = params.get("job_id")
+        job = self.render_jobs.jobs.get(job_id)
+        if not job:
+            return {"status": "error", "message": f"Job '{job_id}' not found"}
+        if not self.render_jobs.cancel(job):
+            return {
+                "status": "cancel_unsupported",
+                "message": "A running render can only be stopped from Python when Blender is started with "
+                           "--enable-event-simulate; press Esc in the render window to stop it",
+                "result": self.render_jobs.describe(job),
+            }
+        return {"status": "success", "result": self.render_jobs.describe(job)}
+
     def _handle_save_file(self, params):
-        """Save the blend file"""
+        """Save the blend file, or with copy=True a snapshot that leaves the session's file unchanged"""
         filepath = params.get("filepath")
         if not filepath:
             return {"status": "error", "message": "Filepath required"}
 
-        bpy.ops.wm.save_as_mainfile(filepath=filepath)
+        copy = bool(params.get("copy", False))
+        bpy.ops.wm.save_as_mainfile(filepath=filepath, copy=copy)
 
         return {
             "status": "success",
-            "result": {"saved": filepath}
+            "result": {"saved": filepath, "copy": copy}
         }
 
+    def _handle_batch(self, params):
+        """Run a list of commands in order within a single main-thread execution"""
+        commands = params.get("commands")
+        if not isinstance(commands, list):
+            return {"status": "error", "message": "Commands list required"}
+
+        stop_on_error = params.get("stop_on_error", True)
+
+        results = []
+        errors = 0
+        stopped_at = None
+        for index, command in enumerate(commands):
+            cmd_type = command.get("type") if isinstance(command, dict) else None
+            if cmd_type == "batch":
+                response = {"status": "error", "message": "Nested batch commands are not supported"}
+            elif cmd_type not in self.handlers:
+                response = {"status": "error", "message": f"Unknown command: {cmd_type}"}
+            else:
+                response = self._execute_command(command)
+                if isinstance(response, types.GeneratorType):
+                    response.close()
+                    response = {"status": "error", "message": "Streaming commands are not supported inside a batch"}
+
+            # Binary results can only travel at the top level of a response
+            blob = response.pop("blob", None)
+            if blob is not None:
+                response["blob"] = {"base64": base64.b64encode(blob).decode('ascii'), "size": len(blob)}
+
+            results.append(response)
+            if response.get("status") != "success":
+                errors += 1
+                if stop_on_error:
+                    stopped_at = index
+                    break
+
+        return {
+            "status": "success",
+            "result": {
+                "results": results,
+                "completed": len(results),
+                "errors": errors,
+                "stopped_at": stopped_at,
+            }
+        }
+
+    def _handle_get_metrics(self, params):
+        """Command counts and per-stage latencies, as JSON or Prometheus text
+
+        Stages are "read", "queue", "handler" and "serialize", see _Metrics.
+        With "reset" the counters start over after this snapshot.
+        """
+        output_format = params.get("format", "json")
+        if output_format not in ("json", "prometheus"):
+            raise ValueError(f"Unknown metrics format: {output_format}")
+
+        gauges = {
+            "queue_depth": ("Commands waiting for the main thread.", self.command_queue.qsize()),
+            "streams": ("Streaming commands in progress.", len(self.streams)),
+            "connections": ("Open client connections.", len(self.connections)),
+        }
+        if output_format == "prometheus":
+            result = {"format": "prometheus", "text": self.metrics.prometheus(gauges)}
+        else:
+            result = self.metrics.snapshot()
+            result.update((name, value) for name, (_, value) in gauges.items())
+
+        if params.get("reset"):
+            self.metrics.reset()
+        return {"status": "success", "result": result}
+
 
 # Blender UI Panel
 
@@ -545,6 +3116,15 @@ class BLENDERMCP_PT_MainPanel(bpy.types.Panel):
         if _server_instance and _server_instance.running:
             layout.label(text="Server Status: Running", icon='PLAY')
             layout.label(text=f"Port: {_server_instance.port}")
+            layout.label(text=f"Clients: {len(_server_instance.connections)}/{_server_instance.max_connections}")
+
+            rows = _server_instance.metrics.summary_rows()
+            if rows:
+                box = layout.box()
+                box.label(text="Commands (p95 queue / handler)")
+                for command_type, count, queue_ms, handler_ms in rows:
+                    box.label(text=f"{command_type}: {count}  {queue_ms:.1f} / {handler_ms:.1f} ms")
+
             layout.operator("blendermcp.stop_server", icon='PAUSE')
         else:
             layout.label(text="Server Status: Stopped", icon='PAUSE')
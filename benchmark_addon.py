@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the addon's command dispatch, without Blender
+
+Loads addon.py against the fakes in fake_blender.py, starts the real socket
+server and measures:
+- dispatch: _process_command() called directly (queue + main-thread timer + wakeup)
+- socket:   full round trip over TCP, newline JSON (v1) and framed (v2)
+- scene:    get_scene_info on a large scene, where message size dominates
+- scatter:  N create_object calls against one create_instances call
+
+Usage:
+    python benchmark_addon.py [--commands 2000] [--objects 20000] [--instances 2000]
+"""
+
+import argparse
+import json
+import socket
+import statistics
+import struct
+import time
+
+import fake_blender
+
+
+FRAME_HEADER = struct.Struct("!II")
+
+
+class Client:
+    """Minimal addon client speaking protocol v1 or v2"""
+
+    def __init__(self, port, version):
+        self.sock = socket.create_connection(("localhost", port))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+        self.version = version
+        if version >= 2:
+            self.sock.sendall(b"BMCP" + bytes([version]))
+            assert self.reader.read(5) == b"BMCP" + bytes([version])
+
+    def request(self, command):
+        body = json.dumps(command).encode("utf-8")
+        if self.version >= 2:
+            self.sock.sendall(FRAME_HEADER.pack(len(body), 0) + body)
+            json_len, blob_len = FRAME_HEADER.unpack(self.reader.read(FRAME_HEADER.size))
+            response = json.loads(self.reader.read(json_len))
+            if blob_len:
+                response["blob"] = self.reader.read(blob_len)
+            return response
+
+        self.sock.sendall(body + b"\n")
+        return json.loads(self.reader.readline())
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, samples):
+    ms = [s * 1000.0 for s in samples]
+    print(f"{label:<12} n={len(ms):<6} mean={statistics.mean(ms):7.3f} ms  "
+          f"p50={percentile(ms, 50):7.3f} ms  p99={percentile(ms, 99):7.3f} ms  "
+          f"rate={len(ms) / (sum(samples) or 1e-9):9.1f} cmd/s")
+
+
+def bench_dispatch(server, count):
+    command = {"type": "move_object", "params": {"name": "Bench", "location": [1, 2, 3]}}
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = server._process_command(command)
+        samples.append(time.perf_counter() - start)
+        assert response["status"] == "success", response
+    return samples
+
+
+def bench_socket(port, count, version, command=None):
+    command = command or {"type": "move_object", "params": {"name": "Bench", "location": [1, 2, 3]}}
+    client = Client(port, version)
+    samples = []
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            response = client.request(command)
+            samples.append(time.perf_counter() - start)
+            assert response["status"] == "success", response
+    finally:
+        client.close()
+    return samples
+
+
+def bench_scatter(port, count):
+    """Seconds to place count cubes one create_object at a time, and in one create_instances"""
+    client = Client(port, 2)
+    try:
+        start = time.perf_counter()
+        for index in range(count):
+            response = client.request({
+                "type": "create_object",
+                "params": {"type": "cube", "location": [index, 0, 0]},
+            })
+            assert response["status"] == "success", response
+        one_by_one = time.perf_counter() - start
+
+        location = [float(c) for index in range(count) for c in (index, 2, 0)]
+        start = time.perf_counter()
+        response = client.request({
+            "type": "create_instances",
+            "params": {"primitive": {"type": "cube"}, "location": location, "return_names": False},
+        })
+        instanced = time.perf_counter() - start
+        assert response["status"] == "success", response
+    finally:
+        client.close()
+    return one_by_one, instanced
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commands", type=int, default=2000, help="commands per measurement")
+    parser.add_argument("--objects", type=int, default=20000, help="scene size for the get_scene_info measurement")
+    parser.add_argument("--instances", type=int, default=2000, help="copies for the scatter measurement")
+    args = parser.parse_args()
+
+    bpy = fake_blender.install()
+    addon = fake_blender.load_addon()
+    bpy.data.objects.add(fake_blender.FakeObject("Bench"))
+
+    loop = fake_blender.MainThreadLoop(bpy.app.timers)
+    loop.start()
+
+    server = addon.BlenderMCPServer(port=0)
+    server.start()
+    port = server.server_socket.getsockname()[1]
+
+    try:
+        # Warm up
+        bench_dispatch(server, 50)
+
+        report("dispatch", bench_dispatch(server, args.commands))
+        report("socket v1", bench_socket(port, args.commands, 1))
+        report("socket v2", bench_socket(port, args.commands, 2))
+
+        for index in range(args.objects):
+            bpy.data.objects.add(fake_blender.FakeObject(f"Object{index}"))
+        scene_command = {"type": "get_scene_info", "params": {}}
+        report("scene v1", bench_socket(port, 10, 1, scene_command))
+        report("scene v2", bench_socket(port, 10, 2, scene_command))
+
+        bpy.data.objects.clear()
+        one_by_one, instanced = bench_scatter(port, args.instances)
+        print(f"{'scatter':<12} n={args.instances:<6} create_object={one_by_one * 1000.0:9.1f} ms  "
+              f"create_instances={instanced * 1000.0:9.1f} ms  speedup={one_by_one / (instanced or 1e-9):6.1f}x")
+    finally:
+        server.stop()
+        loop.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Load test for the addon socket server, without Blender
+
+Loads addon.py against the fakes in fake_blender.py, starts the real socket
+server and drives it with concurrent clients, each sending a weighted mix
+of commands back to back. Reports per command type latency percentiles
+and throughput, the addon's own stage latencies (get_metrics, on commits
+that have it) and memory. Results can be saved as JSON and compared with
+an earlier run, e.g. the same load on the previous commit.
+
+Usage:
+    python benchmark_load.py [--clients 8] [--duration 10] [--mix mixed] [--protocol 2]
+    python benchmark_load.py --mix "move_object=3,get_scene_info=1" --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import fake_blender
+from benchmark_addon import Client, percentile
+
+
+# Parameters of each command the load test can send: (rng, object count) -> params
+COMMANDS = {
+    "move_object": lambda rng, count: {
+        "name": f"Load{rng.randrange(count)}",
+        "location": [rng.uniform(-10, 10), rng.uniform(-10, 10), 0.0],
+    },
+    "get_object_info": lambda rng, count: {"name": f"Load{rng.randrange(count)}"},
+    "get_scene_info": lambda rng, count: {"limit": 100, "fields": ["name", "type", "location"]},
+    "get_transforms": lambda rng, count: {
+        "names": [f"Load{index}" for index in rng.sample(range(count), min(count, 50))],
+    },
+    "set_transforms": lambda rng, count: {
+        "names": [f"Load{index}" for index in range(min(count, 50))],
+        "location": [rng.uniform(-10, 10) for _ in range(min(count, 50) * 3)],
+    },
+    "set_material": lambda rng, count: {
+        "name": f"Load{rng.randrange(count)}",
+        "color": [rng.choice((0.2, 0.5, 0.8)), 0.5, 0.5],
+    },
+    "execute_code": lambda rng, count: {"code": "result = len(bpy.data.objects)"},
+}
+
+# Named command mixes: command -> relative weight
+MIXES = {
+    "read": {"get_object_info": 5, "get_scene_info": 2, "get_transforms": 3},
+    "write": {"move_object": 6, "set_transforms": 3, "set_material": 1},
+    "mixed": {"move_object": 4, "get_object_info": 3, "get_scene_info": 1, "get_transforms": 1, "set_transforms": 1},
+    "agent": {"get_scene_info": 2, "get_object_info": 3, "move_object": 3, "set_material": 1, "execute_code": 1},
+}
+
+
+def parse_mix(text):
+    """A MIXES name or "command=weight,..." """
+    if text in MIXES:
+        return MIXES[text]
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in COMMANDS:
+            raise SystemExit(f"Unknown command in mix: {name} (known: {', '.join(COMMANDS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def memory_usage():
+    """Current and peak resident set size in MiB, where the platform reports them"""
+    usage = {}
+    try:
+        # Current and peak from the same source, both in kB
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    usage["rss_mib"] = round(int(line.split()[1]) / 1024.0, 1)
+                elif line.startswith("VmHWM:"):
+                    usage["peak_rss_mib"] = round(int(line.split()[1]) / 1024.0, 1)
+    except OSError:
+        pass
+    if "peak_rss_mib" not in usage and resource:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        usage["peak_rss_mib"] = round(peak / (1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0), 1)
+    return usage
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "-uno"], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return None
+    return revision + ("-dirty" if dirty else "") if revision else None
+
+
+def run_client(port, protocol, mix, objects, seed, stop_at, record_from, samples, failures):
+    """One client thread: send commands until stop_at, recording those after record_from"""
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    client = Client(port, protocol)
+    try:
+        while True:
+            name = rng.choices(names, weights)[0]
+            command = {"type": name, "params": COMMANDS[name](rng, objects)}
+            start = time.perf_counter()
+            if start >= stop_at:
+                return
+            response = client.request(command)
+            elapsed = time.perf_counter() - start
+            if start >= record_from:
+                samples.setdefault(name, []).append(elapsed)
+                if response.get("status") != "success":
+                    failures[name] = failures.get(name, 0) + 1
+    finally:
+        client.close()
+
+
+def summarize(samples, failures, duration):
+    commands = {}
+    for name, values in sorted(samples.items()):
+        ms = [value * 1000.0 for value in values]
+        commands[name] = {
+            "count": len(ms),
+            "errors": failures.get(name, 0),
+            "rate": round(len(ms) / duration, 1),
+            "mean_ms": round(sum(ms) / len(ms), 3),
+            "p50_ms": round(percentile(ms, 50), 3),
+            "p95_ms": round(percentile(ms, 95), 3),
+            "p99_ms": round(percentile(ms, 99), 3),
+        }
+    every = [value * 1000.0 for values in samples.values() for value in values]
+    overall = {
+        "count": len(every),
+        "errors": sum(failures.values()),
+        "rate": round(len(every) / duration, 1),
+        "p50_ms": round(percentile(every, 50), 3) if every else 0.0,
+        "p95_ms": round(percentile(every, 95), 3) if every else 0.0,
+        "p99_ms": round(percentile(every, 99), 3) if every else 0.0,
+    }
+    return commands, overall
+
+
+def print_report(results):
+    config = results["config"]
+    print(f"{config['clients']} clients, protocol v{config['protocol']}, {config['objects']} objects, "
+          f"{results['duration']:.1f} s, revision {results.get('revision') or 'unknown'}")
+    print(f"{'command':<16} {'count':>8} {'errors':>6} {'cmd/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, row in list(results["commands"].items()) + [("overall", results["overall"])]:
+        print(f"{name:<16} {row['count']:>8} {row['errors']:>6} {row['rate']:>9.1f} "
+              f"{row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f} {row['p99_ms']:>8.3f}")
+
+    if results["server_stages"]:
+        print(f"\n{'addon p95 ms':<16} {'read':>8} {'queue':>8} {'handler':>8} {'serialize':>9}")
+    else:
+        print("\n(no addon stage latencies: this addon has no get_metrics)")
+    for name, stages in results["server_stages"].items():
+        print(f"{name:<16} " + " ".join(f"{stages.get(stage, 0.0):>8.3f}" for stage in ("read", "queue", "handler"))
+              + f" {stages.get('serialize', 0.0):>9.3f}")
+
+    memory = results["memory"]
+    print("\nmemory MiB: " + ", ".join(f"{key}={value}" for key, value in memory.items()))
+
+
+def compare(results, baseline, threshold):
+    """Print changes against a baseline run; returns the regressions beyond threshold percent"""
+    def change(new, old):
+        return (new - old) / old * 100.0 if old else 0.0
+
+    print(f"\nagainst {baseline.get('revision') or 'baseline'} (regression threshold {threshold:.0f}%)")
+    differing = [key for key in results["config"] if results["config"][key] != baseline["config"].get(key)]
+    if differing:
+        print(f"warning: runs differ in {', '.join(differing)}, the comparison may not be meaningful")
+    print(f"{'command':<16} {'cmd/s':>9} {'p50':>8} {'p95':>8} {'p99':>8}")
+    regressions = []
+    rows = [(name, row, baseline["commands"].get(name)) for name, row in results["commands"].items()]
+    rows.append(("overall", results["overall"], baseline["overall"]))
+    for name, row, old in rows:
+        if not old:
+            continue
+        deltas = {key: change(row[key], old[key]) for key in ("rate", "p50_ms", "p95_ms", "p99_ms")}
+        print(f"{name:<16} {deltas['rate']:>+8.1f}% {deltas['p50_ms']:>+7.1f}% "
+              f"{deltas['p95_ms']:>+7.1f}% {deltas['p99_ms']:>+7.1f}%")
+        if deltas["rate"] < -threshold:
+            regressions.append(f"{name} throughput {deltas['rate']:+.1f}%")
+        if deltas["p95_ms"] > threshold:
+            regressions.append(f"{name} p95 {deltas['p95_ms']:+.1f}%")
+    for regression in regressions:
+        print(f"✗ regression: {regression}")
+    if not regressions:
+        print("✓ no regressions")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds measured")
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds of load before measuring")
+    parser.add_argument("--mix", default="mixed", help=f"one of {', '.join(MIXES)} or \"command=weight,...\"")
+    parser.add_argument("--protocol", type=int, choices=(1, 2), default=2)
+    parser.add_argument("--objects", type=int, default=1000, help="objects in the fake scene")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the command sequence")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="percent change in throughput or p95 counted as a regression")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    bpy = fake_blender.install()
+    addon = fake_blender.load_addon()
+    for index in range(args.objects):
+        mesh = bpy.data.meshes.add(fake_blender.FakeMesh(f"Load{index}"))
+        bpy.data.objects.add(fake_blender.FakeObject(f"Load{index}", "MESH", mesh))
+
+    loop = fake_blender.MainThreadLoop(bpy.app.timers)
+    loop.start()
+    server = addon.BlenderMCPServer(port=0)
+    server.start()
+    port = server.server_socket.getsockname()[1]
+
+    try:
+        memory_before = memory_usage()
+        samples = {}
+        failures = {}
+        start = time.perf_counter()
+        record_from = start + args.warmup
+        stop_at = record_from + args.duration
+        threads = []
+        for index in range(args.clients):
+            # Each client records into its own dicts, merged afterwards
+            client_samples, client_failures = {}, {}
+            thread = threading.Thread(
+                target=run_client,
+                args=(port, args.protocol, mix, args.objects, args.seed * 1000 + index,
+                      stop_at, record_from, client_samples, client_failures),
+                daemon=True,
+            )
+            threads.append((thread, client_samples, client_failures))
+            thread.start()
+
+        # Start the addon's counters with the measured period; addons
+        # before get_metrics have none, the client numbers still compare
+        metrics = getattr(server, "metrics", None)
+        time.sleep(max(0.0, record_from - time.perf_counter()))
+        if metrics is not None:
+            metrics.reset()
+
+        for thread, client_samples, client_failures in threads:
+            thread.join()
+            for name, values in client_samples.items():
+                samples.setdefault(name, []).extend(values)
+            for name, count in client_failures.items():
+                failures[name] = failures.get(name, 0) + count
+        duration = min(time.perf_counter(), stop_at) - record_from
+
+        stages = metrics.snapshot()["commands"] if metrics is not None else {}
+        memory = memory_usage()
+        if "rss_mib" in memory_before:
+            memory["rss_mib_before"] = memory_before["rss_mib"]
+        # The peak can never be below a sample taken along the way
+        samples_mib = [value for value in (memory.get("rss_mib"), memory_before.get("rss_mib")) if value is not None]
+        if samples_mib:
+            memory["peak_rss_mib"] = max([memory.get("peak_rss_mib", 0.0)] + samples_mib)
+    finally:
+        server.stop()
+        loop.stop()
+
+    commands, overall = summarize(samples, failures, duration)
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "clients": args.clients,
+            "protocol": args.protocol,
+            "objects": args.objects,
+            "mix": mix,
+            "seed": args.seed,
+            "duration": args.duration,
+        },
+        "duration": round(duration, 3),
+        "commands": commands,
+        "overall": overall,
+        "server_stages": {
+            name: {stage: summary["p95_ms"] for stage, summary in entry["stages"].items()}
+            for name, entry in stages.items()
+        },
+        "memory": memory,
+    }
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nresults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of blender_mcp_server.py over stdio, without Blender
+
+Starts simulated_blender.py and the MCP server as subprocesses and speaks
+MCP's JSON-RPC to the server's stdin/stdout like Claude Desktop does:
+initialize, then tools/call requests with up to --concurrency in flight.
+The same commands are also sent straight to the simulated addon, so the
+difference is the MCP layer's own cost (tool mapping, result formatting,
+base64 images, stdio JSON-RPC). The formatting steps are also timed
+in-process on real responses.
+
+Usage:
+    python benchmark_mcp.py [--calls 200] [--concurrency 4] [--tools get_object_info,get_viewport_screenshot]
+    python benchmark_mcp.py --sim-args "--latency 2ms --failure-rate 0.01"
+"""
+
+import argparse
+import base64
+import json
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+
+from benchmark_addon import Client, percentile
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Tool arguments and the addon command the MCP server turns them into
+TOOL_CALLS = {
+    "get_scene_info": ({"limit": 100}, "get_scene_info", {"limit": 100}),
+    "get_object_info": ({"name": "Sim0"}, "get_object_info", {"name": "Sim0"}),
+    "move_object": ({"name": "Sim1", "location": [1, 2, 3]}, "move_object", {"name": "Sim1", "location": [1, 2, 3]}),
+    "execute_blender_code": ({"code": "result = len(bpy.data.objects)"}, "execute_code",
+                             {"code": "result = len(bpy.data.objects)"}),
+    "get_viewport_screenshot": ({"width": 640, "height": 360}, "get_viewport_screenshot",
+                                {"width": 640, "height": 360, "binary": True}),
+}
+
+# Seconds to wait for a subprocess to start or answer
+STARTUP_TIMEOUT = 30.0
+
+
+class JsonRpcClient:
+    """MCP client over a subprocess's stdin/stdout, newline-delimited JSON-RPC"""
+
+    def __init__(self, command, env):
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, env=env, cwd=HERE)
+        self.lock = threading.Lock()
+        self.waiting = {}
+        self.ids = 0
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            message = json.loads(line)
+            with self.lock:
+                slot = self.waiting.pop(message.get("id"), None)
+            if slot:
+                slot[1] = message
+                slot[0].set()
+        # Server gone: wake everyone
+        with self.lock:
+            for slot in self.waiting.values():
+                slot[0].set()
+
+    def _write(self, message):
+        with self.lock:
+            self.process.stdin.write(json.dumps(message).encode("utf-8") + b"\n")
+            self.process.stdin.flush()
+
+    def request(self, method, params=None, timeout=STARTUP_TIMEOUT):
+        slot = [threading.Event(), None]
+        with self.lock:
+            self.ids += 1
+            request_id = self.ids
+            self.waiting[request_id] = slot
+        self._write({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}})
+        if not slot[0].wait(timeout) or slot[1] is None:
+            raise RuntimeError(f"No response to {method}")
+        if "error" in slot[1]:
+            raise RuntimeError(f"{method} failed: {slot[1]['error']}")
+        return slot[1]["result"]
+
+    def notify(self, method, params=None):
+        self._write({"jsonrpc": "2.0", "method": method, "params": params or {}})
+
+    def initialize(self):
+        result = self.request("initialize", {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {"name": "benchmark_mcp", "version": "1.0.0"},
+        })
+        self.notify("notifications/initialized")
+        return result
+
+    def close(self):
+        self.process.stdin.close()
+        try:
+            self.process.wait(5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def start_simulator(sim_args):
+    """Start simulated_blender.py on a free port; returns (process, port)"""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "simulated_blender.py"), "--port", "0"] + shlex.split(sim_args),
+        stdout=subprocess.PIPE, text=True, cwd=HERE,
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    for line in process.stdout:
+        if line.startswith("Simulated Blender listening on"):
+            port = int(line.rsplit(":", 1)[1])
+            break
+        if time.monotonic() > deadline:
+            break
+    else:
+        process.kill()
+        raise RuntimeError("simulated_blender.py did not start")
+    # Keep draining its log so it never blocks on a full pipe
+    threading.Thread(target=lambda: process.stdout.read(), daemon=True).start()
+    return process, port
+
+
+def bench_direct(port, tools, calls):
+    """Latency of each tool's addon command sent straight to the addon"""
+    client = Client(port, 2)
+    samples = {}
+    responses = {}
+    try:
+        for tool in tools:
+            _, command_type, params = TOOL_CALLS[tool]
+            command = {"type": command_type, "params": params}
+            for _ in range(calls):
+                start = time.perf_counter()
+                responses[tool] = client.request(command)
+                samples.setdefault(tool, []).append(time.perf_counter() - start)
+    finally:
+        client.close()
+    return samples, responses
+
+
+def bench_formatting(responses):
+    """Milliseconds blender_mcp_server spends turning each response into MCP content"""
+    try:
+        import blender_mcp_server
+    except ImportError as e:
+        print(f"(skipping in-process formatting timings: {e})")
+        return {}
+
+    timings = {}
+    for tool, response in responses.items():
+        result = response.get("result", {})
+        repeats = 20
+        start = time.perf_counter()
+        for _ in range(repeats):
+            blender_mcp_server.COMMAND_MAPPING.get(tool)
+            if "blob" in response:
+                base64.b64encode(response["blob"]).decode("ascii")
+            else:
+                blender_mcp_server._format_json(result)
+        timings[tool] = (time.perf_counter() - start) / repeats * 1000.0
+    return timings
+
+
+def bench_mcp(rpc, tools, calls, concurrency):
+    """tools/call latencies through the MCP server, with concurrency calls in flight"""
+    work = [tool for tool in tools for _ in range(calls)]
+    samples = {}
+    failures = {}
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not work:
+                    return
+                tool = work.pop()
+            start = time.perf_counter()
+            result = rpc.request("tools/call", {"name": tool, "arguments": TOOL_CALLS[tool][0]}, timeout=180.0)
+            elapsed = time.perf_counter() - start
+            text = next((item["text"] for item in result.get("content", []) if item.get("type") == "text"), "")
+            with lock:
+                samples.setdefault(tool, []).append(elapsed)
+                if result.get("isError") or text.startswith("✗"):
+                    failures[tool] = failures.get(tool, 0) + 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, failures, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200, help="calls per tool")
+    parser.add_argument("--concurrency", type=int, default=4, help="tools/call requests in flight")
+    parser.add_argument("--tools", default=",".join(TOOL_CALLS), help="comma-separated tools to call")
+    parser.add_argument("--sim-args", default="", help="extra simulated_blender.py options")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+    tools = [tool.strip() for tool in args.tools.split(",") if tool.strip()]
+    unknown = [tool for tool in tools if tool not in TOOL_CALLS]
+    if unknown:
+        raise SystemExit(f"Unknown tools: {', '.join(unknown)} (known: {', '.join(TOOL_CALLS)})")
+
+    simulator, port = start_simulator(args.sim_args)
+    rpc = None
+    try:
+        direct, responses = bench_direct(port, tools, args.calls)
+        formatting = bench_formatting(responses)
+
+        env = dict(os.environ, BLENDER_HOST="localhost", BLENDER_PORT=str(port))
+        rpc = JsonRpcClient([sys.executable, os.path.join(HERE, "blender_mcp_server.py")], env)
+        rpc.initialize()
+        # First call connects to Blender; keep it out of the measurements
+        rpc.request("tools/call", {"name": tools[0], "arguments": TOOL_CALLS[tools[0]][0]})
+        samples, failures, elapsed = bench_mcp(rpc, tools, args.calls, args.concurrency)
+    finally:
+        if rpc:
+            rpc.close()
+        simulator.terminate()
+        simulator.wait(10)
+
+    results = {"config": vars(args), "calls_per_second": round(sum(map(len, samples.values())) / elapsed, 1),
+               "tools": {}}
+    print(f"{args.calls} calls per tool, {args.concurrency} in flight, "
+          f"{results['calls_per_second']:.1f} tools/call per second")
+    print(f"{'tool':<24} {'errors':>6} {'direct p50':>10} {'mcp p50':>8} {'mcp p95':>8} {'mcp p99':>8} "
+          f"{'overhead':>8} {'format':>7}")
+    for tool in tools:
+        direct_ms = [value * 1000.0 for value in direct[tool]]
+        mcp_ms = [value * 1000.0 for value in samples.get(tool, [])]
+        if not mcp_ms:
+            continue
+        row = {
+            "errors": failures.get(tool, 0),
+            "direct_p50_ms": round(percentile(direct_ms, 50), 3),
+            "p50_ms": round(percentile(mcp_ms, 50), 3),
+            "p95_ms": round(percentile(mcp_ms, 95), 3),
+            "p99_ms": round(percentile(mcp_ms, 99), 3),
+            "format_ms": round(formatting.get(tool, 0.0), 3),
+        }
+        row["overhead_ms"] = round(row["p50_ms"] - row["direct_p50_ms"], 3)
+        results["tools"][tool] = row
+        print(f"{tool:<24} {row['errors']:>6} {row['direct_p50_ms']:>10.3f} {row['p50_ms']:>8.3f} "
+              f"{row['p95_ms']:>8.3f} {row['p99_ms']:>8.3f} {row['overhead_ms']:>8.3f} {row['format_ms']:>7.3f}")
+    print("(ms; overhead = mcp p50 - direct p50; format = result JSON or base64 image encoding)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Screenshot transfer benchmark: temp-file + base64 path vs binary frames
+
+Loads addon.py against the fakes in fake_blender.py and captures a
+viewport screenshot end to end, the way blender_mcp_server.py consumes it:
+- before: render to a temp PNG, base64 in the JSON response (protocol v1),
+          base64-decoded by the client
+- after:  offscreen readback encoded to PNG in memory, sent as the v2 frame's
+          binary tail and base64-encoded once for the MCP ImageContent
+
+"copied" counts the bytes of every full-size buffer each path materializes
+after the pixels have been read back from the GPU (the readback itself is
+the same for both).
+
+Usage:
+    python benchmark_screenshot.py [--captures 10] [--width 1920] [--height 1080]
+"""
+
+import argparse
+import base64
+import statistics
+import time
+
+import fake_blender
+from benchmark_addon import Client
+
+
+def capture_before(client, width, height):
+    response = client.request({
+        "type": "get_viewport_screenshot",
+        "params": {"width": width, "height": height, "method": "render"},
+    })
+    encoded = response["result"]["image_base64"]
+    png = base64.b64decode(encoded)
+    # file write + file read, b64encode, json.dumps, utf-8 encode,
+    # client recv buffer + line, json.loads, b64decode
+    copied = 3 * len(png) + 6 * len(encoded)
+    return png, copied
+
+
+def capture_after(client, width, height):
+    response = client.request({
+        "type": "get_viewport_screenshot",
+        "params": {"width": width, "height": height, "binary": True},
+    })
+    png = response["blob"]
+    image_data = base64.b64encode(png)
+    # PNG scanlines, PNG assembly, client receive + copy out,
+    # one b64encode for MCP
+    copied = width * height * 4 + 3 * len(png) + len(image_data)
+    return png, copied
+
+
+def run(label, capture, client, args):
+    times = []
+    for _ in range(args.captures):
+        start = time.perf_counter()
+        png, copied = capture(client, args.width, args.height)
+        times.append(time.perf_counter() - start)
+    ms = [t * 1000.0 for t in times]
+    print(f"{label:<8} png={len(png) / 1e6:6.2f} MB  copied={copied / 1e6:7.2f} MB  "
+          f"mean={statistics.mean(ms):8.2f} ms  min={min(ms):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--captures", type=int, default=10)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    bpy = fake_blender.install()
+    addon = fake_blender.load_addon()
+    fake_blender.synthetic_pixels(args.width, args.height)  # warm the image cache
+
+    loop = fake_blender.MainThreadLoop(bpy.app.timers)
+    loop.start()
+    server = addon.BlenderMCPServer(port=0)
+    server.start()
+    port = server.server_socket.getsockname()[1]
+
+    try:
+        run("before", capture_before, Client(port, 1), args)
+        run("after", capture_after, Client(port, 2), args)
+    finally:
+        server.stop()
+        loop.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,63 @@ Blender MCP Server
 A Model Context Protocol server that connects to Blender via socket communication
 """
 
+import array
 import asyncio
+import base64
+import itertools
 import json
 import os
-import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
 from typing import Any, Sequence
 
 from mcp.server import Server
 from mcp.types import Tool, TextContent, ImageContent, EmbeddedResource
 
+from blender_render_pool import DEFAULT_WORKERS, RenderPool, parse_frames
+
 # Configuration
 BLENDER_HOST = os.environ.get("BLENDER_HOST", "localhost")
 BLENDER_PORT = int(os.environ.get("BLENDER_PORT", "9876"))
+# Wire protocol: 2 = length-prefixed frames, 1 = legacy newline-delimited JSON
+BLENDER_PROTOCOL = int(os.environ.get("BLENDER_PROTOCOL", "2"))
+# Unix domain socket path; when set it is used instead of BLENDER_HOST/PORT
+BLENDER_SOCKET = os.environ.get("BLENDER_SOCKET")
+# How Blender returns binary results: "frame" (inline) or "shm" (shared memory, same host only)
+BLENDER_BLOB_TRANSPORT = os.environ.get("BLENDER_BLOB_TRANSPORT", "frame")
+
+# Protocol v2 handshake and frame layout, see _ClientConnection in addon.py
+PROTOCOL_MAGIC = b"BMCP"
+FRAME_HEADER = struct.Struct("!II")
+
+# Seconds to wait for the handshake reply. Addons that predate protocol v2
+# never answer it, in which case we reconnect speaking newline JSON.
+HANDSHAKE_TIMEOUT = 2.0
+
+# Seconds to wait for the TCP or Unix socket connection to Blender
+CONNECT_TIMEOUT = 10.0
+
+# asyncio stream buffer limit; a newline-JSON response (e.g. a base64
+# screenshot) must fit in it, like a v2 frame in the addon's MAX_FRAME_SIZE
+STREAM_LIMIT = 1 << 30
+
+# Seconds to wait for the response to a single command
+COMMAND_TIMEOUT = 180.0
+
+# Chrome trace-event file that every command's spans are appended to, for
+# chrome://tracing or ui.perfetto.dev; unset to disable
+BLENDER_MCP_TRACE_FILE = os.environ.get("BLENDER_MCP_TRACE_FILE")
+
+# Results whose compact JSON exceeds this many characters are not pretty-printed
+PRETTY_PRINT_LIMIT = 64 * 1024
+
+# get_mesh_data results up to this many bytes are returned inline as
+# number lists when no output_path is given
+MESH_INLINE_LIMIT = 256 * 1024
 
 # Initialize MCP server
 server = Server("blender-mcp")
@@ -23,93 +68,539 @@ server = Server("blender-mcp")
 # Global connection
 _blender_connection = None
 
+# Map MCP tool names to Blender command types
+COMMAND_MAPPING = {
+    "get_scene_info": "get_scene_info",
+    "get_object_info": "get_object_info",
+    "get_mesh_data": "get_mesh_data",
+    "get_scene_changes": "get_scene_changes",
+    "create_object": "create_object",
+    "create_mesh": "create_mesh",
+    "create_instances": "create_instances",
+    "delete_object": "delete_object",
+    "move_object": "move_object",
+    "scale_object": "scale_object",
+    "rotate_object": "rotate_object",
+    "set_transforms": "set_transforms",
+    "get_transforms": "get_transforms",
+    "execute_blender_code": "execute_code",
+    "register_script": "register_script",
+    "run_script": "run_script",
+    "list_scripts": "list_scripts",
+    "get_viewport_screenshot": "get_viewport_screenshot",
+    "set_material": "set_material",
+    "set_materials": "set_materials",
+    "render_scene": "render_scene",
+    "get_job_status": "get_job_status",
+    "cancel_job": "cancel_job",
+    "save_blend_file": "save_file",
+    "batch": "batch",
+    "get_metrics": "get_metrics",
+}
+
+
+# Per-object fields the addon can report in get_scene_info / get_object_info
+OBJECT_FIELDS = ["name", "type", "location", "rotation", "rotation_euler", "scale", "dimensions", "visible", "parent", "collections", "data", "vertices", "edges", "faces"]
+
+
+# Stages the addon times for traced commands, in execution order
+ADDON_STAGES = ("read", "queue", "handler", "serialize")
+
+
+class _TraceFile:
+    """Appends spans to a Chrome trace-event file
+
+    Uses the JSON array format with one event per line. Its closing bracket
+    is optional, so the file loads in chrome://tracing and Perfetto while it
+    is still being written. Blender's stages are placed half the network
+    time after the request was sent, since only their durations are known.
+    """
+
+    CLIENT_THREAD = 1
+    BLENDER_THREAD = 2
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        # Converts perf_counter readings to epoch microseconds
+        self.epoch = time.time() - time.perf_counter()
+
+    def _event(self, name: str, thread: int, start: float, duration_ms: float, args: dict = None) -> dict:
+        event = {
+            "name": name,
+            "ph": "X",
+            "pid": self.pid,
+            "tid": thread,
+            "ts": round((self.epoch + start) * 1e6, 1),
+            "dur": round(duration_ms * 1000.0, 1),
+        }
+        if args:
+            event["args"] = args
+        return event
+
+    def write_span(self, span: dict, command_type: str, request_id, timings: dict, started: float, sent_at: float):
+        """One command: the client's encode/decode and Blender's stages"""
+        args = dict(span, id=request_id)
+        events = [
+            self._event(command_type, self.CLIENT_THREAD, started, timings["total"], dict(args, timings=timings)),
+            self._event("encode", self.CLIENT_THREAD, started, timings["encode"], args),
+        ]
+        cursor = sent_at + timings.get("network", 0.0) / 2000.0
+        for stage in ADDON_STAGES:
+            if stage in timings:
+                events.append(self._event(f"{command_type}.{stage}", self.BLENDER_THREAD, cursor, timings[stage], args))
+                cursor += timings[stage] / 1000.0
+        decode_start = started + (timings["total"] - timings["decode"]) / 1000.0
+        events.append(self._event("decode", self.CLIENT_THREAD, decode_start, timings["decode"], args))
+        self._append(events)
+
+    def write_tool_call(self, trace_id: str, name: str, started: float, ended: float):
+        """The enclosing span of an MCP tool call, which may send several commands"""
+        self._append([self._event(f"tool:{name}", self.CLIENT_THREAD, started, (ended - started) * 1000.0,
+                                  {"trace_id": trace_id})])
+
+    def _append(self, events: list):
+        lines = "".join(json.dumps(event, separators=(",", ":")) + ",\n" for event in events)
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                if f.tell() == 0:
+                    names = [("MCP server", self.CLIENT_THREAD), ("Blender", self.BLENDER_THREAD)]
+                    f.write("[\n" + "".join(
+                        json.dumps({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid,
+                                    "args": {"name": label}}, separators=(",", ":")) + ",\n"
+                        for label, tid in names
+                    ))
+                f.write(lines)
+
+
+_trace_file = _TraceFile(BLENDER_MCP_TRACE_FILE) if BLENDER_MCP_TRACE_FILE else None
+
+
+class _PendingReply:
+    """A command sent to Blender that is waiting for its response"""
+
+    def __init__(self, on_partial=None):
+        self.future = asyncio.get_running_loop().create_future()
+        # Streaming commands send "partial" responses before the final one
+        self.on_partial = on_partial
+        self.partials = []
+        # perf_counter times for traced commands
+        self.sent_at = None
+        self.received_at = None
+        self.decoded_at = None
+
 
 class BlenderConnection:
-    """Manages socket connection to Blender addon"""
+    """Manages socket connection to Blender addon
+
+    Built on asyncio streams, so waiting for Blender never blocks the event
+    loop. Commands are tagged with an "id" and many tool calls may await
+    their responses at once; a reader task resolves each caller's future.
+    """
 
-    def __init__(self, host: str, port: int):
+    def __init__(self, host: str, port: int, protocol: int = BLENDER_PROTOCOL,
+                 socket_path: str = None, blob_transport: str = "frame"):
         self.host = host
         self.port = port
-        self.socket = None
+        self.protocol = protocol
+        self.socket_path = socket_path
+        self.blob_transport = blob_transport
+        self.version = None
+        self.reader = None
+        self.writer = None
+        self.reader_task = None
+
+        # Serializes connecting and writing; responses are read by self.reader_task
+        self.lock = asyncio.Lock()
+        self.replies = {}
+        self.ids = itertools.count(1)
+        # Shared memory segments already read, released with the next command
+        self.consumed_segments = []
 
-    def connect(self):
+    async def connect(self):
         """Establish connection to Blender"""
-        if self.socket:
+        if self.writer:
             return  # Already connected
 
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.settimeout(180)  # 3 minute timeout
-            self.socket.connect((self.host, self.port))
-            print(f"Connected to Blender at {self.host}:{self.port}")
+            await self._open()
+            self.version = 1
+            if self.protocol >= 2:
+                version = await self._handshake()
+                if version is None:
+                    # Old addon, it is still waiting for the handshake to become JSON
+                    await self.disconnect()
+                    await self._open()
+                else:
+                    self.version = version
+
+            self.reader_task = asyncio.create_task(self._read_responses(self.reader, self.writer))
+            # stdout carries the MCP protocol
+            print(f"Connected to Blender at {self.address}", file=sys.stderr)
+        except asyncio.CancelledError:
+            await self.disconnect()
+            raise
         except Exception as e:
+            await self.disconnect()
             raise ConnectionError(f"Failed to connect to Blender: {e}. Make sure Blender is running with the MCP addon enabled.")
 
-    def disconnect(self):
+    @property
+    def address(self) -> str:
+        return self.socket_path or f"{self.host}:{self.port}"
+
+    async def _open(self):
+        # asyncio enables TCP_NODELAY on TCP connections itself
+        if self.socket_path:
+            opening = asyncio.open_unix_connection(self.socket_path, limit=STREAM_LIMIT)
+        else:
+            opening = asyncio.open_connection(self.host, self.port, limit=STREAM_LIMIT)
+        self.reader, self.writer = await asyncio.wait_for(opening, CONNECT_TIMEOUT)
+        # Segments belong to the old connection and were freed with it
+        self.consumed_segments = []
+
+    async def _handshake(self):
+        """Offer protocol v2; returns the agreed version or None if unsupported"""
+        self.writer.write(PROTOCOL_MAGIC + bytes([self.protocol]))
+        await self.writer.drain()
+        try:
+            reply = await asyncio.wait_for(self.reader.readexactly(len(PROTOCOL_MAGIC) + 1), HANDSHAKE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+
+        if not reply.startswith(PROTOCOL_MAGIC):
+            return None
+        return reply[-1]
+
+    async def disconnect(self):
         """Close connection"""
-        if self.socket:
+        writer, self.reader, self.writer = self.writer, None, None
+        if writer:
+            # The reader task sees end of stream and exits
+            writer.close()
             try:
-                self.socket.close()
-            except:
+                await writer.wait_closed()
+            except Exception:
                 pass
-            self.socket = None
 
-    def send_command(self, command_type: str, params: dict = None) -> dict:
-        """Send command to Blender and get response"""
-        if not self.socket:
-            self.connect()
+    async def _recv_response(self, reader: asyncio.StreamReader) -> tuple[dict, float]:
+        """Receive the next response message and the time it finished arriving"""
+        if self.version >= 2:
+            json_len, blob_len = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+            payload = await reader.readexactly(json_len + blob_len)
+            received_at = time.perf_counter()
+            response = json.loads(payload[:json_len])
+            if blob_len:
+                response["blob"] = payload[json_len:]
+        else:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("Connection closed by Blender")
+            received_at = time.perf_counter()
+            response = json.loads(line)
 
-        command = {
-            "type": command_type,
-            "params": params or {}
-        }
+        # Normalize the other blob encodings to bytes as well
+        blob = response.get("blob")
+        if isinstance(blob, dict):
+            if "shm" in blob:
+                response["blob"] = self._read_segment(blob["shm"], blob["size"])
+            elif "base64" in blob:
+                response["blob"] = base64.b64decode(blob["base64"])
+            else:
+                del response["blob"]
+        return response, received_at
 
+    def _read_segment(self, name: str, size: int) -> bytes:
+        """Copy a blob out of a shared memory segment created by the addon"""
+        segment = shared_memory.SharedMemory(name=name)
         try:
-            # Send command
-            command_json = json.dumps(command) + "\n"
-            self.socket.sendall(command_json.encode('utf-8'))
+            # The addon owns the segment; keep our resource tracker from unlinking it
+            if os.name == "posix":
+                resource_tracker.unregister(segment._name, "shared_memory")
+            data = bytes(segment.buf[:size])
+        finally:
+            segment.close()
+        self.consumed_segments.append(name)
+        return data
 
-            # Receive response (with chunking support for large responses)
-            buffer = ""
+    async def _read_responses(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Reader task: route each response to the command that sent it"""
+        try:
             while True:
-                chunk = self.socket.recv(4096).decode('utf-8')
-                if not chunk:
-                    raise ConnectionError("Connection closed by Blender")
-
-                buffer += chunk
-
-                # Try to parse complete JSON
-                try:
-                    response = json.loads(buffer)
-                    return response
-                except json.JSONDecodeError:
-                    # Incomplete JSON, continue receiving
+                response, received_at = await self._recv_response(reader)
+                if response.get("status") == "partial":
+                    reply = self.replies.get(response.get("id"))
+                    if reply and reply.on_partial:
+                        reply.on_partial(response)
+                    elif reply:
+                        reply.partials.append(response)
                     continue
 
+                if "id" in response:
+                    reply = self.replies.pop(response["id"], None)
+                elif self.replies:
+                    # Addons without request IDs answer strictly in order
+                    reply = self.replies.pop(next(iter(self.replies)))
+                else:
+                    reply = None
+                # The caller may have timed out or been cancelled meanwhile
+                if reply and not reply.future.done():
+                    reply.received_at = received_at
+                    reply.decoded_at = time.perf_counter()
+                    reply.future.set_result(response)
         except Exception as e:
-            # Connection error, reset socket
-            self.disconnect()
-            raise ConnectionError(f"Communication error: {e}")
+            if self.writer is writer:
+                self._fail_all(e)
+
+    def _fail_all(self, error):
+        """Drop the connection and fail every outstanding command"""
+        replies, self.replies = self.replies, {}
+        for reply in replies.values():
+            if not reply.future.done():
+                reply.future.set_exception(ConnectionError(f"Communication error: {error}"))
+        if self.writer:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def send_command(self, command_type: str, params: dict = None, on_partial=None, blob: bytes = None,
+                           trace_id: str = None) -> dict:
+        """Send command to Blender and await its response
+
+        Partial responses of streaming commands are passed to on_partial as
+        they arrive, or else collected in the final response's "partials".
+        A blob is sent as the frame's binary tail (base64 in protocol v1)
+        and is what {"blob_offset": n} values in params refer to.
+        With a trace_id the command becomes a span of that trace and the
+        response gets "trace" IDs and per-stage "timings", see _span_timings.
+        """
+        reply = _PendingReply(on_partial)
+        span = None
+
+        async with self.lock:
+            if not self.writer:
+                await self.connect()
+
+            request_id = next(self.ids)
+            command = {
+                "id": request_id,
+                "type": command_type,
+                "params": params or {}
+            }
+            if self.blob_transport == "shm":
+                command["blob_transport"] = "shm"
+            if self.consumed_segments:
+                command["release_shm"] = self.consumed_segments
+                self.consumed_segments = []
+            if trace_id:
+                span = {"trace_id": trace_id, "span_id": os.urandom(8).hex()}
+                command["trace"] = span
+
+            if blob is not None and self.version < 2:
+                command["params"] = dict(command["params"], _blob={"base64": base64.b64encode(blob).decode('ascii')})
+
+            try:
+                started = time.perf_counter()
+                body = json.dumps(command).encode('utf-8')
+                # The round trip starts before sending, the send itself is network time
+                encoded = reply.sent_at = time.perf_counter()
+                self.replies[request_id] = reply
+                # write() buffers the whole message at once, so a caller
+                # cancelled in drain() cannot leave a partial frame behind
+                if self.version >= 2:
+                    blob_len = len(blob) if blob is not None else 0
+                    self.writer.write(FRAME_HEADER.pack(len(body), blob_len) + body)
+                    if blob_len:
+                        self.writer.write(blob)
+                else:
+                    self.writer.write(body + b"\n")
+                await self.writer.drain()
+            except (OSError, RuntimeError) as e:
+                # Connection error, reset socket
+                self._fail_all(e)
+                raise ConnectionError(f"Communication error: {e}")
+
+        try:
+            response = await asyncio.wait_for(reply.future, COMMAND_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ConnectionError("Communication error: timed out waiting for Blender")
+        finally:
+            # Timed out or cancelled: a late response is dropped by the reader
+            self.replies.pop(request_id, None)
+
+        if reply.partials:
+            response["partials"] = reply.partials
+        if span:
+            self._span_timings(span, command_type, response, reply, started, encoded)
+        return response
+
+    def _span_timings(self, span: dict, command_type: str, response: dict, reply: _PendingReply,
+                      started: float, encoded: float):
+        """Combine our own and the addon's stage times into the response's "timings"
+
+        All values are milliseconds. "network" is the round trip minus the
+        addon's stages, so it includes the addon's thread hand-offs. Addons
+        that do not report timings only get the client-side stages.
+        """
+        addon = response.get("timings") or {}
+        round_trip = (reply.received_at - reply.sent_at) * 1000.0
+        timings = {"encode": round((encoded - started) * 1000.0, 3)}
+        if addon:
+            addon_total = sum(addon.get(stage, 0.0) for stage in ADDON_STAGES)
+            timings["network"] = round(max(0.0, round_trip - addon_total), 3)
+            timings.update((stage, addon.get(stage, 0.0)) for stage in ADDON_STAGES)
+        else:
+            timings["round_trip"] = round(round_trip, 3)
+        timings["decode"] = round((reply.decoded_at - reply.received_at) * 1000.0, 3)
+        timings["total"] = round((reply.decoded_at - started) * 1000.0, 3)
+        response["trace"] = span
+        response["timings"] = timings
+
+        if _trace_file:
+            _trace_file.write_span(span, command_type, response.get("id"), timings, started, reply.sent_at)
 
 
 def get_connection() -> BlenderConnection:
     """Get or create Blender connection"""
     global _blender_connection
     if not _blender_connection:
-        _blender_connection = BlenderConnection(BLENDER_HOST, BLENDER_PORT)
+        _blender_connection = BlenderConnection(
+            BLENDER_HOST,
+            BLENDER_PORT,
+            socket_path=BLENDER_SOCKET,
+            blob_transport=BLENDER_BLOB_TRANSPORT,
+        )
     return _blender_connection
 
 
+def _assemble_stream_blob(response: dict) -> bytearray:
+    """Join the binary chunks of a streamed response at their offsets"""
+    data = bytearray(response["result"]["size"])
+    for partial in response.get("partials", []):
+        chunk = partial.get("blob", b"")
+        offset = partial["result"]["offset"]
+        data[offset:offset + len(chunk)] = chunk
+    return data
+
+
+def _unpack_layout(data, layout: dict) -> dict:
+    """Decode the arrays described by a get_mesh_data layout into number lists"""
+    typecodes = {"float32": "f", "uint32": "I"}
+    arrays = {}
+    for name, entry in layout.items():
+        values = array.array(typecodes[entry["dtype"]])
+        values.frombytes(bytes(data[entry["offset"]:entry["offset"] + entry["size"]]))
+        arrays[name] = values.tolist()
+    return arrays
+
+
+def _format_json(value) -> str:
+    """Pretty-print small results; large ones stay compact"""
+    text = json.dumps(value, separators=(",", ":"))
+    if len(text) <= PRETTY_PRINT_LIMIT:
+        text = json.dumps(value, indent=2)
+    return text
+
+
 @server.list_tools()
 async def list_tools() -> list[Tool]:
     """List available Blender control tools"""
     return [
         Tool(
             name="get_scene_info",
-            description="Get information about the current Blender scene including all objects, frame range, and render settings",
+            description="Get information about the current Blender scene including objects, frame range, and render settings. Objects can be filtered by type, collection and name, and fields limits what is returned per object. Large scenes can be paged with limit and the returned next_cursor.",
             inputSchema={
                 "type": "object",
-                "properties": {},
+                "properties": {
+                    "fields": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": OBJECT_FIELDS},
+                        "description": "Per-object fields to return (default: name, type, location, rotation, scale, visible)"
+                    },
+                    "types": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Only include objects of these types, e.g. [\"MESH\", \"LIGHT\"]"
+                    },
+                    "collection": {
+                        "type": "string",
+                        "description": "Only include objects in this collection (including child collections)"
+                    },
+                    "name_pattern": {
+                        "type": "string",
+                        "description": "Only include objects whose name matches this glob pattern, e.g. \"Tree*\""
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "Index of the first object to return",
+                        "default": 0
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "Maximum number of objects to return (all if omitted)"
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "next_cursor from a previous call, to continue where it stopped"
+                    },
+                    "stream": {
+                        "type": "boolean",
+                        "description": "Collect objects in chunks across several Blender main-thread slices so the UI stays responsive",
+                        "default": False
+                    },
+                    "chunk_size": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Objects per chunk when streaming",
+                        "default": 1000
+                    }
+                },
+            }
+        ),
+        Tool(
+            name="get_mesh_data",
+            description="Export mesh geometry (vertex positions, normals, triangle indices, UVs) as packed float32/uint32 buffers. Small meshes are returned inline; otherwise pass output_path to write the raw buffers to a file laid out as described by the returned layout.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "name": {
+                        "type": "string",
+                        "description": "Name of the object"
+                    },
+                    "attributes": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": ["positions", "normals", "triangles", "triangle_loops", "uvs"]},
+                        "description": "Arrays to export (default: positions, normals, triangles). uvs are per loop and indexed by triangle_loops."
+                    },
+                    "evaluated": {
+                        "type": "boolean",
+                        "description": "Export the mesh after modifiers",
+                        "default": False
+                    },
+                    "uv_layer": {
+                        "type": "string",
+                        "description": "UV map name (default: the active one)"
+                    },
+                    "output_path": {
+                        "type": "string",
+                        "description": "File to write the raw buffers to"
+                    }
+                },
+                "required": ["name"]
+            }
+        ),
+        Tool(
+            name="get_scene_changes",
+            description="Get the objects added, removed or modified since a scene version, instead of re-reading the whole scene. Call without since_version to get the current version. If resync_required is true, call get_scene_info again.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "since_version": {
+                        "type": "integer",
+                        "description": "Scene version returned by a previous get_scene_changes call"
+                    }
+                },
             }
         ),
         Tool(
@@ -121,6 +612,11 @@ async def list_tools() -> list[Tool]:
                     "name": {
                         "type": "string",
                         "description": "Name of the object to query"
+                    },
+                    "fields": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": OBJECT_FIELDS},
+                        "description": "Fields to return (default: name, type, location, rotation_euler, scale, dimensions, visible, vertices, edges, faces)"
                     }
                 },
                 "required": ["name"]
@@ -163,6 +659,105 @@ async def list_tools() -> list[Tool]:
                 "required": ["type"]
             }
         ),
+        Tool(
+            name="create_mesh",
+            description="Create a mesh object from vertex positions and face indices. Faces are triangles unless face_sizes is given. Returns per-stage timings.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "name": {
+                        "type": "string",
+                        "description": "Name of the new object and mesh"
+                    },
+                    "positions": {
+                        "type": "array",
+                        "items": {"type": "number"},
+                        "description": "Vertex positions [x1, y1, z1, x2, ...]"
+                    },
+                    "indices": {
+                        "type": "array",
+                        "items": {"type": "integer"},
+                        "description": "Vertex indices of each face, concatenated"
+                    },
+                    "face_sizes": {
+                        "type": "array",
+                        "items": {"type": "integer"},
+                        "description": "Number of corners of each face (default: all triangles)"
+                    },
+                    "normals": {
+                        "type": "array",
+                        "items": {"type": "number"},
+                        "description": "Optional custom normals, 3 per vertex"
+                    },
+                    "uvs": {
+                        "type": "array",
+                        "items": {"type": "number"},
+                        "description": "Optional UVs, 2 per vertex or per face corner"
+                    },
+                    "location": {
+                        "type": "array",
+                        "items": {"type": "number"},
+                        "description": "Object location [x, y, z]"
+                    }
+                },
+                "required": ["positions", "indices"]
+            }
+        ),
+        Tool(
+            name="create_instances",
+            description="Create many copies of an object or primitive in one call. Copies share one mesh (mode linked) or are instanced by a single geometry-nodes object (mode geometry_nodes, best for very large counts).",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "source": {
+                        "type": "string",
+                        "description": "Name of the object to copy"
+                    },
+                    "primitive": {
+                        "type": "object",
+                        "description": "create_object parameters for a primitive to copy instead of source, e.g. {\"type\": \"cube\", \"size\": 0.5}"
+                    },
+                    "location": {
+                        "type": "array",
+                        "items": {"type": "number"},
+                        "description": "Locations [x1, y1, z1, x2, ...], one per copy"
+                    },
+                    "rotation": {
+                        "type": "array",
+                        "items": {"type": "number"},
+                        "description": "Optional Euler rotations in radians, 3 per copy"
+                    },
+                    "scale": {
+                        "type": "array",
+                        "items": {"type": "number"},
+                        "description": "Optional scales, 3 per copy"
+                    },
+                    "count": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "description": "Number of copies when no location is given"
+                    },
+                    "mode": {
+                        "type": "string",
+                        "enum": ["linked", "geometry_nodes"],
+                        "default": "linked"
+                    },
+                    "name": {
+                        "type": "string",
+                        "description": "Base name of the new objects"
+                    },
+                    "collection": {
+                        "type": "string",
+                        "description": "Collection to put the copies in (created if missing)"
+                    },
+                    "return_names": {
+                        "type": "boolean",
+                        "description": "Return the names of the created objects (linked mode)",
+                        "default": True
+                    }
+                },
+            }
+        ),
         Tool(
             name="delete_object",
             description="Delete an object from the scene",
@@ -232,18 +827,127 @@ async def list_tools() -> list[Tool]:
                 "required": ["name", "rotation"]
             }
         ),
+        Tool(
+            name="set_transforms",
+            description="Set location, rotation and/or scale of many objects in one call. Each value is a flat array of 3 numbers per object, in the order of names.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "names": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Names of the objects"
+                    },
+                    "location": {
+                        "type": "array",
+                        "items": {"type": "number"},
+                        "description": "Locations [x1, y1, z1, x2, ...]"
+                    },
+                    "rotation": {
+                        "type": "array",
+                        "items": {"type": "number"},
+                        "description": "Euler rotations in radians [x1, y1, z1, x2, ...]"
+                    },
+                    "scale": {
+                        "type": "array",
+                        "items": {"type": "number"},
+                        "description": "Scales [x1, y1, z1, x2, ...]"
+                    }
+                },
+                "required": ["names"]
+            }
+        ),
+        Tool(
+            name="get_transforms",
+            description="Get location, rotation (radians) and scale of many objects as flat arrays of 3 numbers per object",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "names": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Names of the objects (all objects in the scene if omitted)"
+                    },
+                    "fields": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": ["location", "rotation", "scale"]},
+                        "description": "Transform fields to return (default: all)"
+                    }
+                },
+            }
+        ),
         Tool(
             name="execute_blender_code",
-            description="Execute arbitrary Python code in Blender context. Has access to bpy, C (context), D (data). WARNING: This can modify or delete your scene. Save your work first!",
+            description="Execute arbitrary Python code in Blender context. Has access to bpy, C (context), D (data). Set a variable named result to return a value. Use session to keep definitions between calls, and code_hash from a previous response to rerun code without resending it. WARNING: This can modify or delete your scene. Save your work first!",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "code": {
                         "type": "string",
                         "description": "Python code to execute in Blender"
+                    },
+                    "code_hash": {
+                        "type": "string",
+                        "description": "code_hash of previously executed code to run again instead of code"
+                    },
+                    "session": {
+                        "type": "string",
+                        "description": "Name of a session whose variables and functions persist between calls"
+                    },
+                    "reset": {
+                        "type": "boolean",
+                        "description": "Clear the session before running (or only clear it, without code)",
+                        "default": False
+                    }
+                },
+            }
+        ),
+        Tool(
+            name="register_script",
+            description="Store a Python script in Blender to run later by name with run_script. The script reads its arguments from the dict args (checked against params_schema) and returns data by assigning result. Has access to bpy, C (context), D (data).",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "name": {
+                        "type": "string",
+                        "description": "Script name"
+                    },
+                    "code": {
+                        "type": "string",
+                        "description": "Python code of the script"
+                    },
+                    "params_schema": {
+                        "type": "object",
+                        "description": "JSON schema of args (type, properties, required, enum, items, default, additionalProperties)"
+                    }
+                },
+                "required": ["name", "code"]
+            }
+        ),
+        Tool(
+            name="run_script",
+            description="Run a script stored with register_script and return its result as JSON",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "name": {
+                        "type": "string",
+                        "description": "Script name"
+                    },
+                    "args": {
+                        "type": "object",
+                        "description": "Arguments matching the script's params_schema"
                     }
                 },
-                "required": ["code"]
+                "required": ["name"]
+            }
+        ),
+        Tool(
+            name="list_scripts",
+            description="List the scripts stored with register_script and their parameter schemas",
+            inputSchema={
+                "type": "object",
+                "properties": {},
             }
         ),
         Tool(
@@ -267,7 +971,7 @@ async def list_tools() -> list[Tool]:
         ),
         Tool(
             name="set_material",
-            description="Set material properties for an object",
+            description="Set material properties for an object. Objects given identical properties share one material.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -279,14 +983,56 @@ async def list_tools() -> list[Tool]:
                         "type": "array",
                         "items": {"type": "number"},
                         "description": "RGB or RGBA color values [r, g, b] or [r, g, b, a] (0-1 range)"
+                    },
+                    "metallic": {
+                        "type": "number",
+                        "description": "Metallic (0-1)"
+                    },
+                    "roughness": {
+                        "type": "number",
+                        "description": "Roughness (0-1)"
+                    },
+                    "shared": {
+                        "type": "boolean",
+                        "description": "Use a shared material for these properties instead of one per object",
+                        "default": True
                     }
                 },
                 "required": ["name"]
             }
         ),
+        Tool(
+            name="set_materials",
+            description="Assign materials to many objects in one call. Identical properties share one material.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "assignments": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "names": {"type": "array", "items": {"type": "string"}},
+                                "color": {"type": "array", "items": {"type": "number"}},
+                                "metallic": {"type": "number"},
+                                "roughness": {"type": "number"}
+                            },
+                            "required": ["names"]
+                        },
+                        "description": "Object names with the material properties to give them"
+                    },
+                    "cleanup_orphans": {
+                        "type": "boolean",
+                        "description": "Remove materials created by this server that are no longer used",
+                        "default": False
+                    }
+                },
+                "required": ["assignments"]
+            }
+        ),
         Tool(
             name="render_scene",
-            description="Render the current scene to an image file",
+            description="Render the current scene to an image file. Long renders should use async so Blender keeps answering other commands.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -308,11 +1054,48 @@ async def list_tools() -> list[Tool]:
                         "type": "integer",
                         "description": "Render samples (for Cycles)",
                         "default": 128
+                    },
+                    "async": {
+                        "type": "boolean",
+                        "description": "Return a job ID immediately and render in the background; check it with get_job_status",
+                        "default": False
+                    },
+                    "animation": {
+                        "type": "boolean",
+                        "description": "Render the frame range (async only); output_path is the frame path prefix",
+                        "default": False
                     }
                 },
                 "required": ["output_path"]
             }
         ),
+        Tool(
+            name="get_job_status",
+            description="Get the status (queued, running, finished, cancelled, failed), progress and output paths of an async render job, or of all jobs if job_id is omitted",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "Job ID returned by render_scene"
+                    }
+                },
+            }
+        ),
+        Tool(
+            name="cancel_job",
+            description="Cancel a queued render job or stop a running one. Stopping a running render needs Blender started with --enable-event-simulate; otherwise the tool reports cancel_unsupported and the render continues until Esc is pressed in its render window.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "Job ID returned by render_scene"
+                    }
+                },
+                "required": ["job_id"]
+            }
+        ),
         Tool(
             name="save_blend_file",
             description="Save the current Blender scene to a .blend file",
@@ -322,60 +1105,209 @@ async def list_tools() -> list[Tool]:
                     "filepath": {
                         "type": "string",
                         "description": "Path where to save the .blend file"
+                    },
+                    "copy": {
+                        "type": "boolean",
+                        "description": "Save a copy without changing the file the session is working on",
+                        "default": False
                     }
                 },
                 "required": ["filepath"]
             }
         ),
+        Tool(
+            name="render_pool",
+            description="Render a snapshot of the current scene on a pool of headless Blender processes on this machine, splitting the frame range (or one frame into tiles) between them. Returns output paths and per-worker throughput.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "output_prefix": {
+                        "type": "string",
+                        "description": "Output path prefix; frame numbers and .png are appended"
+                    },
+                    "frames": {
+                        "type": "string",
+                        "description": "Frames to render, e.g. \"1-48\" or \"1,5,9\" (default: the scene's frame range)"
+                    },
+                    "tiles": {
+                        "type": "array",
+                        "items": {"type": "integer", "minimum": 1},
+                        "minItems": 2,
+                        "maxItems": 2,
+                        "description": "Split the first frame into [columns, rows] border tiles instead of rendering whole frames"
+                    },
+                    "workers": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": f"Number of Blender processes (default: {DEFAULT_WORKERS})"
+                    },
+                    "chunk_size": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Frames rendered per worker process launch"
+                    }
+                },
+                "required": ["output_prefix"]
+            }
+        ),
+        Tool(
+            name="batch",
+            description="Run many tool calls in order with a single round trip to Blender, e.g. creating, moving and coloring hundreds of objects at once. Returns one result per command.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "commands": {
+                        "type": "array",
+                        "description": "Ordered list of tool calls to run",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "type": {
+                                    "type": "string",
+                                    "description": "Tool name, e.g. create_object, move_object, set_material"
+                                },
+                                "params": {
+                                    "type": "object",
+                                    "description": "Arguments for the tool"
+                                }
+                            },
+                            "required": ["type"]
+                        }
+                    },
+                    "stop_on_error": {
+                        "type": "boolean",
+                        "description": "Stop at the first failing command instead of continuing",
+                        "default": True
+                    }
+                },
+                "required": ["commands"]
+            }
+        ),
+        Tool(
+            name="get_metrics",
+            description="Get per-command counts, error counts and latency percentiles inside Blender, split into socket read, main-thread queue wait, handler execution and response serialization. Useful to find out why calls are slow.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "format": {
+                        "type": "string",
+                        "enum": ["json", "prometheus"],
+                        "description": "json summary or Prometheus text exposition format",
+                        "default": "json"
+                    },
+                    "reset": {
+                        "type": "boolean",
+                        "description": "Start counting from zero after this snapshot",
+                        "default": False
+                    }
+                }
+            }
+        ),
     ]
 
 
+async def _render_pool(conn: BlenderConnection, arguments: dict, trace_id: str) -> Sequence[TextContent]:
+    """Save a snapshot of the open scene and render it with local worker processes"""
+    frames = None
+    if arguments.get("frames"):
+        try:
+            frames = parse_frames(arguments["frames"])
+        except ValueError as e:
+            return [TextContent(type="text", text=f"✗ Error: Invalid frames '{arguments['frames']}': {e}")]
+        if not frames:
+            return [TextContent(type="text", text=f"✗ Error: No frames in '{arguments['frames']}'")]
+
+    # A directory of its own, so Blender's .blend1 backup goes with it
+    with tempfile.TemporaryDirectory(prefix="blender_mcp_") as directory:
+        snapshot = os.path.join(directory, "snapshot.blend")
+        # copy=True keeps the session's own file path and dirty state
+        response = await conn.send_command("save_file", {"filepath": snapshot, "copy": True}, trace_id=trace_id)
+        if response.get("status") != "success":
+            return [TextContent(type="text", text=f"✗ Error: {response.get('message', 'Could not save snapshot')}")]
+
+        if frames is None:
+            response = await conn.send_command("get_scene_info", {"fields": ["name"], "limit": 0}, trace_id=trace_id)
+            if response.get("status") != "success":
+                return [TextContent(type="text", text=f"✗ Error: {response.get('message', 'Could not read frame range')}")]
+            scene = response["result"]
+            frames = list(range(scene["frame_start"], scene["frame_end"] + 1))
+
+        pool = RenderPool(workers=arguments.get("workers", DEFAULT_WORKERS))
+        report = await asyncio.to_thread(
+            pool.render, snapshot, arguments["output_prefix"], frames,
+            arguments.get("tiles"), arguments.get("chunk_size"),
+        )
+
+    status = "✗ Error" if report["errors"] or report["missing"] else "✓ Success"
+    return [TextContent(type="text", text=f"{status}:\n{_format_json(report)}")]
+
+
 @server.call_tool()
 async def call_tool(name: str, arguments: Any) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
-    """Handle tool calls by sending commands to Blender"""
+    """Handle tool calls by sending commands to Blender
 
+    Each call is a trace, and every command it sends is a span tagged with
+    the trace ID; spans are appended to BLENDER_MCP_TRACE_FILE if set.
+    """
+    trace_id = os.urandom(16).hex()
+    started = time.perf_counter()
+    try:
+        return await _call_tool(name, arguments, trace_id)
+    finally:
+        if _trace_file:
+            _trace_file.write_tool_call(trace_id, name, started, time.perf_counter())
+
+
+async def _call_tool(name: str, arguments: Any, trace_id: str) -> Sequence[TextContent | ImageContent | EmbeddedResource]:
     try:
         conn = get_connection()
 
-        # Map MCP tool names to Blender command types
-        command_mapping = {
-            "get_scene_info": "get_scene_info",
-            "get_object_info": "get_object_info",
-            "create_object": "create_object",
-            "delete_object": "delete_object",
-            "move_object": "move_object",
-            "scale_object": "scale_object",
-            "rotate_object": "rotate_object",
-            "execute_blender_code": "execute_code",
-            "get_viewport_screenshot": "get_viewport_screenshot",
-            "set_material": "set_material",
-            "render_scene": "render_scene",
-            "save_blend_file": "save_file",
-        }
+        if name == "render_pool":
+            return await _render_pool(conn, arguments or {}, trace_id)
 
-        command_type = command_mapping.get(name)
+        command_type = COMMAND_MAPPING.get(name)
         if not command_type:
             return [TextContent(
                 type="text",
                 text=f"Unknown tool: {name}"
             )]
 
-        # Send command to Blender
-        response = conn.send_command(command_type, arguments)
+        if command_type == "get_viewport_screenshot":
+            arguments = dict(arguments or {}, binary=True)
+
+        # Batched tools are addressed by their MCP names, translate them too
+        if command_type == "batch":
+            arguments = dict(arguments or {})
+            arguments["commands"] = [
+                {
+                    "type": COMMAND_MAPPING.get(command.get("type"), command.get("type")),
+                    "params": command.get("params", {}),
+                }
+                for command in arguments.get("commands", [])
+            ]
+
+        # Mesh buffers are streamed in chunks and saved or decoded here
+        output_path = None
+        if command_type == "get_mesh_data":
+            arguments = dict(arguments or {}, stream=True)
+            output_path = arguments.pop("output_path", None)
+
+        # Send command to Blender without blocking the event loop, so other
+        # tool calls can share the connection while this one is in flight
+        response = await conn.send_command(command_type, arguments, trace_id=trace_id)
 
         # Handle response
         if response.get("status") == "success":
             result = response.get("result", {})
 
-            # Special handling for screenshots
-            if name == "get_viewport_screenshot" and "image_base64" in result:
-                import base64
-                image_data = base64.b64decode(result["image_base64"])
+            # Special handling for screenshots: the image arrives as raw bytes,
+            # MCP wants it base64 encoded exactly once
+            if name == "get_viewport_screenshot" and "blob" in response:
                 return [
                     ImageContent(
                         type="image",
-                        data=image_data,
-                        mimeType="image/png"
+                        data=base64.b64encode(response["blob"]).decode('ascii'),
+                        mimeType=result.get("mime_type", "image/png")
                     ),
                     TextContent(
                         type="text",
@@ -383,9 +1315,31 @@ async def call_tool(name: str, arguments: Any) -> Sequence[TextContent | ImageCo
                     )
                 ]
 
+            # Reassemble streamed objects into one list
+            if name == "get_scene_info" and "partials" in response:
+                result["objects"] = [
+                    obj
+                    for partial in response["partials"]
+                    for obj in partial["result"]["objects"]
+                ]
+
+            if name == "get_mesh_data":
+                data = _assemble_stream_blob(response)
+                if output_path:
+                    with open(output_path, "wb") as f:
+                        f.write(data)
+                    result["output_path"] = output_path
+                elif len(data) <= MESH_INLINE_LIMIT:
+                    result.update(_unpack_layout(data, result["layout"]))
+                else:
+                    result["note"] = f"{len(data)} bytes of geometry; pass output_path to save the buffers"
+
+            if name == "get_metrics" and result.get("format") == "prometheus":
+                return [TextContent(type="text", text=result["text"])]
+
             # Standard text response
             if isinstance(result, dict):
-                result_text = json.dumps(result, indent=2)
+                result_text = _format_json(result)
             else:
                 result_text = str(result)
 
@@ -402,6 +1356,7 @@ async def call_tool(name: str, arguments: Any) -> Sequence[TextContent | ImageCo
             error_text = f"✗ Error: {error_msg}"
             if traceback_info:
                 error_text += f"\n\nTraceback:\n{traceback_info}"
+            error_text += f"\n\nTrace ID: {trace_id}"
 
             return [TextContent(
                 type="text",
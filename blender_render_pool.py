@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Render pool: fan a render out over headless Blender worker processes
+
+Takes a saved .blend snapshot and splits its frames (or, for a single
+frame, a grid of border tiles) into chunks that up to N `blender -b`
+processes render in parallel. Reports where every output went and how
+busy and fast each worker was.
+
+Usage:
+    python blender_render_pool.py render scene.blend /tmp/out/frame_ --frames 1-48 --workers 4
+    python blender_render_pool.py render scene.blend /tmp/out/still_ --frames 1 --tiles 2x2
+    python blender_render_pool.py self-test
+"""
+
+import argparse
+import json
+import os
+import queue
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+
+# Blender executable used by the workers
+BLENDER_EXECUTABLE = os.environ.get("BLENDER_EXECUTABLE", "blender")
+
+# Every Blender process already renders with all cores, so a few
+# processes are enough to hide scene loading and per-frame overhead
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 1) // 4)
+
+# Seconds a worker process may run for one chunk
+WORKER_TIMEOUT = 3600.0
+
+# Border render setup run inside a worker before it renders a tile
+TILE_EXPR = (
+    "import bpy; r = bpy.context.scene.render; "
+    "r.use_border = True; r.use_crop_to_border = True; "
+    "r.border_min_x, r.border_min_y, r.border_max_x, r.border_max_y = {0}, {1}, {2}, {3}"
+)
+
+
+def parse_frames(text):
+    """Parse "1-10", "1,3,5" or "1-4,10" into a sorted list of frame numbers"""
+    frames = set()
+    for part in text.split(","):
+        start, _, end = part.strip().partition("-")
+        if start:
+            frames.update(range(int(start), int(end or start) + 1))
+    return sorted(frames)
+
+
+def format_frames(frames):
+    """Frames as Blender's -f argument, with consecutive runs as "a..b" """
+    runs = []
+    start = previous = frames[0]
+    for frame in frames[1:]:
+        if frame != previous + 1:
+            runs.append((start, previous))
+            start = frame
+        previous = frame
+    runs.append((start, previous))
+    return ",".join(str(a) if a == b else f"{a}..{b}" for a, b in runs)
+
+
+def frame_path(prefix, frame):
+    """Output file Blender writes for a frame with -o prefix -F PNG -x 1"""
+    return f"{prefix}{frame:04d}.png"
+
+
+class RenderPool:
+    """Runs render chunks on up to `workers` Blender processes at once"""
+
+    def __init__(self, command=None, workers=DEFAULT_WORKERS, threads=None, timeout=WORKER_TIMEOUT):
+        self.command = list(command or [BLENDER_EXECUTABLE])
+        self.workers = max(1, workers)
+        # Render threads per process, so the pool does not oversubscribe the CPU
+        self.threads = threads or max(1, (os.cpu_count() or 1) // self.workers)
+        self.timeout = timeout
+
+    def plan_frames(self, frames, output_prefix, chunk_size=None):
+        """Split frames into contiguous chunks, about two per worker"""
+        if chunk_size is None:
+            chunk_size = max(1, -(-len(frames) // (self.workers * 2)))
+        return [
+            {
+                "frames": frames[i:i + chunk_size],
+                "prefix": output_prefix,
+                "outputs": [frame_path(output_prefix, frame) for frame in frames[i:i + chunk_size]],
+            }
+            for i in range(0, len(frames), chunk_size)
+        ]
+
+    def plan_tiles(self, frame, output_prefix, columns, rows):
+        """One chunk per border tile of a single frame"""
+        chunks = []
+        for row in range(rows):
+            for column in range(columns):
+                region = [column / columns, row / rows, (column + 1) / columns, (row + 1) / rows]
+                prefix = f"{output_prefix}tile_{column}_{row}_"
+                chunks.append({
+                    "frames": [frame],
+                    "prefix": prefix,
+                    "tile": region,
+                    "outputs": [frame_path(prefix, frame)],
+                })
+        return chunks
+
+    def worker_args(self, blend_path, chunk):
+        args = self.command + ["-b", blend_path]
+        if "tile" in chunk:
+            args += ["--python-expr", TILE_EXPR.format(*chunk["tile"])]
+        args += [
+            "-o", chunk["prefix"], "-F", "PNG", "-x", "1",
+            "-t", str(self.threads),
+            "-f", format_frames(chunk["frames"]),
+        ]
+        return args
+
+    def render(self, blend_path, output_prefix, frames, tiles=None, chunk_size=None):
+        """Render frames (or tiles=(columns, rows) of frames[0]) and return a report"""
+        if not frames:
+            raise ValueError("No frames to render")
+        if tiles:
+            chunks = self.plan_tiles(frames[0], output_prefix, *tiles)
+        else:
+            chunks = self.plan_frames(frames, output_prefix, chunk_size)
+
+        work = queue.Queue()
+        for chunk in chunks:
+            work.put(chunk)
+        stats = [
+            {"worker": index, "chunks": 0, "frames": 0, "busy_time": 0.0}
+            for index in range(min(self.workers, len(chunks)))
+        ]
+        errors = []
+
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._work, args=(blend_path, work, worker, errors), daemon=True)
+            for worker in stats
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_time = time.perf_counter() - start
+
+        for worker in stats:
+            worker["busy_time"] = round(worker["busy_time"], 3)
+            worker["frames_per_second"] = round(worker["frames"] / worker["busy_time"], 3) if worker["busy_time"] else 0.0
+
+        report = {
+            "blend": blend_path,
+            "workers": len(stats),
+            "threads_per_worker": self.threads,
+            "chunks": len(chunks),
+            "wall_time": round(wall_time, 3),
+            "per_worker": stats,
+            # Busy time summed over workers divided by wall time: the parallelism achieved
+            "speedup": round(sum(worker["busy_time"] for worker in stats) / wall_time, 2) if wall_time else 0.0,
+            "errors": errors,
+        }
+        if tiles:
+            report["tiles"] = [
+                {"region": chunk["tile"], "path": chunk["outputs"][0], "exists": os.path.exists(chunk["outputs"][0])}
+                for chunk in chunks
+            ]
+            report["missing"] = [tile["path"] for tile in report["tiles"] if not tile["exists"]]
+        else:
+            report["outputs"] = {
+                str(frame): path
+                for chunk in chunks
+                for frame, path in zip(chunk["frames"], chunk["outputs"])
+            }
+            report["missing"] = [path for path in report["outputs"].values() if not os.path.exists(path)]
+            report["frames_per_second"] = round(len(frames) / wall_time, 3) if wall_time else 0.0
+        return report
+
+    def _work(self, blend_path, work, worker, errors):
+        """Worker thread: run chunks from the queue one process at a time"""
+        while True:
+            try:
+                chunk = work.get_nowait()
+            except queue.Empty:
+                return
+
+            started = time.perf_counter()
+            try:
+                process = subprocess.run(
+                    self.worker_args(blend_path, chunk),
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    timeout=self.timeout,
+                )
+                failure = process.returncode != 0 and {
+                    "returncode": process.returncode,
+                    "stderr": process.stderr.decode("utf-8", "replace")[-2000:],
+                }
+            except (OSError, subprocess.TimeoutExpired) as e:
+                failure = {"returncode": None, "stderr": str(e)}
+            worker["busy_time"] += time.perf_counter() - started
+            worker["chunks"] += 1
+
+            if failure:
+                failure.update(worker=worker["worker"], frames=chunk["frames"])
+                errors.append(failure)
+            else:
+                worker["frames"] += len(chunk["frames"])
+
+
+# Stand-in worker for the self-test
+
+FAKE_FRAME_TIME = 0.2
+
+
+def _tiny_png():
+    row = b"\x00" + b"\x80\x80\x80\xff"
+    def chunk(tag, data):
+        return struct.pack("!I", len(data)) + tag + data + struct.pack("!I", zlib.crc32(tag + data))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack("!IIBBBBB", 1, 1, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row)) + chunk(b"IEND", b""))
+
+
+def fake_worker(args):
+    """Mimic the subset of Blender's command line the pool uses"""
+    if "-b" not in args or "-o" not in args or "-f" not in args:
+        print("fake worker: missing -b, -o or -f", file=sys.stderr)
+        return 1
+    blend = args[args.index("-b") + 1]
+    if not os.path.exists(blend):
+        print(f"fake worker: cannot read {blend}", file=sys.stderr)
+        return 1
+
+    prefix = args[args.index("-o") + 1]
+    frames = []
+    for part in args[args.index("-f") + 1].split(","):
+        start, _, end = part.partition("..")
+        frames.extend(range(int(start), int(end or start) + 1))
+
+    png = _tiny_png()
+    for frame in frames:
+        time.sleep(FAKE_FRAME_TIME)
+        with open(frame_path(prefix, frame), "wb") as f:
+            f.write(png)
+    return 0
+
+
+def self_test():
+    """Render with the stand-in worker and check outputs and parallelism"""
+    print("Render pool self-test (stand-in worker)")
+    command = [sys.executable, os.path.abspath(__file__), "fake-worker"]
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        blend = os.path.join(directory, "snapshot.blend")
+        with open(blend, "wb") as f:
+            f.write(b"BLENDER-fake")
+
+        pool = RenderPool(command, workers=4, threads=1)
+        frames = list(range(1, 17))
+        report = pool.render(blend, os.path.join(directory, "frame_"), frames)
+        serial = len(frames) * FAKE_FRAME_TIME
+        checks = [
+            ("all frames written", not report["missing"] and len(report["outputs"]) == len(frames)),
+            ("no worker errors", not report["errors"]),
+            ("every worker used", all(worker["frames"] for worker in report["per_worker"])),
+            (f"faster than serial ({report['wall_time']:.2f}s vs {serial:.2f}s)", report["wall_time"] < serial / 2),
+        ]
+
+        report_tiles = pool.render(blend, os.path.join(directory, "still_"), [1], tiles=(2, 2))
+        checks += [
+            ("2x2 tiles written", len(report_tiles["tiles"]) == 4 and not report_tiles["missing"]),
+            ("tile regions cover the frame", report_tiles["tiles"][-1]["region"] == [0.5, 0.5, 1.0, 1.0]),
+        ]
+
+        report_bad = RenderPool(command, workers=2).render(os.path.join(directory, "missing.blend"), os.path.join(directory, "x_"), [1, 2])
+        checks.append(("failures reported", len(report_bad["errors"]) == 2 and len(report_bad["missing"]) == 2))
+
+        for label, passed in checks:
+            print(f"{'✓' if passed else '✗'} {label}")
+            ok = ok and passed
+        for worker in report["per_worker"]:
+            print(f"  worker {worker['worker']}: {worker['frames']} frames in {worker['busy_time']:.2f}s "
+                  f"({worker['frames_per_second']:.1f} frames/s)")
+        print(f"  overall: {report['frames_per_second']:.1f} frames/s, speedup {report['speedup']}x")
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    render = subparsers.add_parser("render", help="render a .blend with a pool of workers")
+    render.add_argument("blend", help="saved .blend snapshot")
+    render.add_argument("output_prefix", help="output path prefix; frame numbers and .png are appended")
+    render.add_argument("--frames", required=True, help='frames, e.g. "1-48" or "1,5,9"')
+    render.add_argument("--tiles", help='split the first frame into tiles, e.g. "2x2"')
+    render.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    render.add_argument("--chunk-size", type=int, help="frames per worker process")
+    render.add_argument("--blender", default=BLENDER_EXECUTABLE, help="Blender executable")
+
+    subparsers.add_parser("self-test", help="exercise the pool with a stand-in worker")
+
+    if len(sys.argv) > 1 and sys.argv[1] == "fake-worker":
+        return fake_worker(sys.argv[2:])
+
+    args = parser.parse_args()
+    if args.mode == "self-test":
+        return self_test()
+
+    tiles = tuple(int(n) for n in args.tiles.lower().split("x")) if args.tiles else None
+    pool = RenderPool([args.blender], workers=args.workers)
+    report = pool.render(args.blend, args.output_prefix, parse_frames(args.frames), tiles, args.chunk_size)
+    print(json.dumps(report, indent=2))
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,738 @@
+#!/usr/bin/env python3
+"""
+Fake Blender modules for running addon.py outside of Blender
+
+Installs minimal stand-ins for bpy, bmesh, gpu and mathutils into sys.modules and
+provides a simulated main-thread loop that drives bpy.app.timers the way
+Blender's event loop does. Only what the benchmark scripts exercise is
+implemented; this is not a general bpy emulation.
+"""
+
+import contextlib
+import functools
+import importlib.util
+import os
+import sys
+import threading
+import time
+import types
+
+
+# Blender's window manager never sleeps longer than this between event
+# loop iterations, even when no timer is due
+EVENT_LOOP_MAX_SLEEP = 0.005
+
+
+class Vector(list):
+    """Stand-in for mathutils.Vector"""
+
+
+class Matrix(list):
+    """Stand-in for mathutils.Matrix: rows of floats, @ multiplies"""
+
+    @classmethod
+    def Identity(cls, size):
+        return cls.Diagonal([1.0] * size)
+
+    @classmethod
+    def Diagonal(cls, values):
+        return cls([[value if i == j else 0.0 for j in range(len(values))] for i, value in enumerate(values)])
+
+    def __matmul__(self, other):
+        return Matrix([[sum(a * b for a, b in zip(row, column)) for column in zip(*other)] for row in self])
+
+
+class FakeID:
+    """Datablock base; renaming re-keys the owning collection like Blender does"""
+
+    _collection = None
+    _name = ""
+    bl_rna = types.SimpleNamespace(identifier="ID")
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        if self._collection is not None:
+            self._collection._rename(self, value)
+        else:
+            self._name = value
+
+    # Custom (ID) properties: datablock["key"]
+    @property
+    def _properties(self):
+        return self.__dict__.setdefault("_id_properties", {})
+
+    def __getitem__(self, key):
+        return self._properties[key]
+
+    def __setitem__(self, key, value):
+        self._properties[key] = value
+
+    def __contains__(self, key):
+        return key in self._properties
+
+    def get(self, key, default=None):
+        return self._properties.get(key, default)
+
+
+class FakeElements:
+    """Mesh element sequence (vertices, loops, ...) with bulk attribute access
+
+    Attributes are stored as whatever flat array was last foreach_set;
+    unset attributes read back as zeros.
+    """
+
+    def __init__(self, count=0):
+        self._count = count
+        self._attributes = {}
+
+    def __len__(self):
+        return self._count
+
+    def add(self, count):
+        self._count += count
+
+    def foreach_get(self, attr, seq):
+        stored = self._attributes.get(attr)
+        if stored is not None:
+            seq[:] = type(seq)(seq.typecode, stored[:len(seq)])
+
+    def foreach_set(self, attr, seq):
+        self._attributes[attr] = list(seq)
+
+
+class FakeUVLayer:
+    def __init__(self, name, loop_count):
+        self.name = name
+        self.uv = FakeElements(loop_count)
+
+
+class FakeUVLayers(list):
+    def __init__(self, layers=(), mesh=None):
+        super().__init__(layers)
+        self._mesh = mesh
+
+    def new(self, name="UVMap"):
+        layer = FakeUVLayer(name, len(self._mesh.loops))
+        self.append(layer)
+        return layer
+
+    @property
+    def active(self):
+        return self[0] if self else None
+
+    def get(self, name, default=None):
+        return next((layer for layer in self if layer.name == name), default)
+
+
+class FakeMesh(FakeID):
+    id_type = 'MESH'
+
+    def __init__(self, name, vertex_count=8, edge_count=12, face_count=6):
+        self.name = name
+        self.vertices = FakeElements(vertex_count)
+        self.edges = FakeElements(edge_count)
+        self.polygons = FakeElements(face_count)
+        self.loops = FakeElements(face_count * 4)
+        self.loop_triangles = FakeElements(face_count * 2)
+        self.vertex_normals = FakeElements(vertex_count)
+        self.uv_layers = FakeUVLayers([FakeUVLayer("UVMap", face_count * 4)], self)
+        self.materials = []
+
+    def copy(self):
+        duplicate = FakeMesh(self.name, len(self.vertices), len(self.edges), len(self.polygons))
+        return self._collection.add(duplicate) if self._collection is not None else duplicate
+
+    def calc_loop_triangles(self):
+        self.loop_triangles = FakeElements(sum(max(0, size - 2) for size in self._face_sizes()))
+
+    def _face_sizes(self):
+        starts = self.polygons._attributes.get("loop_start")
+        if starts is None:
+            return [4] * len(self.polygons)
+        return [end - start for start, end in zip(starts, starts[1:] + [len(self.loops)])]
+
+    def update(self, calc_edges=False):
+        if calc_edges:
+            self.edges = FakeElements(len(self.loops) // 2)
+
+    def validate(self, verbose=False):
+        return False
+
+    def normals_split_custom_set_from_vertices(self, normals):
+        self.vertex_normals.foreach_set("vector", [c for normal in normals for c in normal])
+
+
+class FakeMaterial(FakeID):
+    id_type = 'MATERIAL'
+
+    def __init__(self, name):
+        self.name = name
+        self.use_nodes = False
+        self.use_fake_user = False
+        principled = types.SimpleNamespace(inputs={
+            socket: types.SimpleNamespace(default_value=None)
+            for socket in ("Base Color", "Metallic", "Roughness", "Alpha")
+        })
+        self.node_tree = types.SimpleNamespace(nodes={"Principled BSDF": principled})
+
+    @property
+    def users(self):
+        meshes = sys.modules["bpy"].data.meshes
+        return sum(mesh.materials.count(self) for mesh in meshes)
+
+
+class FakeObject(FakeID):
+    id_type = 'OBJECT'
+
+    def __init__(self, name, obj_type="MESH", data=None, location=(0, 0, 0)):
+        self.name = name
+        self.type = obj_type
+        self.data = data
+        self.location = Vector(location)
+        self.rotation_euler = Vector((0.0, 0.0, 0.0))
+        self.scale = Vector((1.0, 1.0, 1.0))
+        self.dimensions = Vector((2.0, 2.0, 2.0))
+        self.parent = None
+        self.users_collection = []
+
+    def hide_get(self):
+        return False
+
+    def update_tag(self, refresh=None):
+        pass
+
+    def select_set(self, state):
+        self.selected = state
+
+    def evaluated_get(self, depsgraph):
+        return self
+
+    def to_mesh(self):
+        return self.data
+
+    def to_mesh_clear(self):
+        pass
+
+
+class FakeCollectionObjects(list):
+    def __init__(self, collection):
+        super().__init__()
+        self._collection = collection
+
+    def link(self, item):
+        self.append(item)
+        if hasattr(item, "users_collection"):
+            item.users_collection.append(self._collection)
+
+    def unlink(self, item):
+        self.remove(item)
+        if hasattr(item, "users_collection"):
+            item.users_collection.remove(self._collection)
+
+
+class FakeCollection(FakeID):
+    """bpy.types.Collection stand-in holding objects directly (no children)"""
+
+    id_type = 'COLLECTION'
+
+    def __init__(self, name):
+        self.name = name
+        self.objects = FakeCollectionObjects(self)
+        self.children = FakeCollectionObjects(self)
+
+    @property
+    def all_objects(self):
+        return self.objects
+
+
+class FakeLayerObjects:
+    """view_layer.objects: the active object and the selected ones"""
+
+    def __init__(self, objects):
+        self._objects = objects
+        self.active = None
+
+    @property
+    def selected(self):
+        return [obj for obj in self._objects if getattr(obj, "selected", False)]
+
+
+class FakeIDCollection:
+    """Name-keyed datablock collection like bpy.data.objects"""
+
+    def __init__(self, factory=None):
+        self._items = {}
+        self._factory = factory
+        self._suffixes = {}
+
+    def new(self, name, *args):
+        return self.add(self._factory(name, *args))
+
+    def get(self, name, default=None):
+        return self._items.get(name, default)
+
+    def _unique_name(self, name):
+        # Remember the next free suffix per base name, as Blender's name map does
+        unique = name
+        index = self._suffixes.get(name, 1)
+        while unique in self._items:
+            unique = f"{name}.{index:03d}"
+            index += 1
+        self._suffixes[name] = index
+        return unique
+
+    def _rename(self, item, name):
+        self._items.pop(item._name, None)
+        item._name = self._unique_name(name)
+        self._items[item._name] = item
+
+    def add(self, item):
+        item._name = self._unique_name(item.name)
+        item._collection = self
+        self._items[item.name] = item
+        return item
+
+    def remove(self, item, do_unlink=True):
+        self._items.pop(item.name, None)
+        item._collection = None
+
+    def clear(self):
+        self._items.clear()
+        self._suffixes.clear()
+
+    def keys(self):
+        return list(self._items)
+
+    def foreach_get(self, attr, seq):
+        """Flatten a vector attribute of every item into seq, like bpy's raw access"""
+        width = len(seq) // max(1, len(self._items))
+        for i, item in enumerate(self._items.values()):
+            seq[i * width:(i + 1) * width] = type(seq)(seq.typecode, getattr(item, attr))
+
+    def foreach_set(self, attr, seq):
+        width = len(seq) // max(1, len(self._items))
+        for i, item in enumerate(self._items.values()):
+            setattr(item, attr, Vector(seq[i * width:(i + 1) * width]))
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._items[key]
+        return list(self._items.values())[key]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, name):
+        return name in self._items
+
+
+class FakeScene:
+    id_type = 'SCENE'
+
+    def __init__(self, data):
+        self.name = "Scene"
+        self.frame_current = 1
+        self.frame_start = 1
+        self.frame_end = 250
+        self.render = types.SimpleNamespace(
+            engine="BLENDER_EEVEE", filepath="", resolution_x=1920, resolution_y=1080,
+            frame_path=lambda frame=None: f"{self.render.filepath}{frame:04d}.png",
+        )
+        self._data = data
+        self.collection = FakeCollection("Scene Collection")
+
+    @property
+    def objects(self):
+        return self._data.objects
+
+
+class Timers:
+    """bpy.app.timers replacement; callbacks are compared by identity like Blender does"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timers = []  # [due, function, persistent]
+
+    def register(self, function, first_interval=0.0, persistent=False):
+        with self._lock:
+            self._timers.append([time.perf_counter() + first_interval, function, persistent])
+
+    def unregister(self, function):
+        with self._lock:
+            for entry in self._timers:
+                if entry[1] is function:
+                    self._timers.remove(entry)
+                    return
+        raise ValueError("Error: function is not registered")
+
+    def is_registered(self, function):
+        with self._lock:
+            return any(entry[1] is function for entry in self._timers)
+
+    def run_due(self):
+        """Run every due timer once; return seconds until the next one is due"""
+        now = time.perf_counter()
+        with self._lock:
+            due = [entry for entry in self._timers if entry[0] <= now]
+
+        for entry in due:
+            interval = entry[1]()
+            with self._lock:
+                if entry not in self._timers:
+                    continue
+                if interval is None:
+                    self._timers.remove(entry)
+                else:
+                    entry[0] = time.perf_counter() + interval
+
+        with self._lock:
+            if not self._timers:
+                return EVENT_LOOP_MAX_SLEEP
+            return max(0.0, min(entry[0] for entry in self._timers) - time.perf_counter())
+
+
+class MainThreadLoop:
+    """Simulated Blender event loop running timers on a dedicated thread"""
+
+    def __init__(self, timers):
+        self.timers = timers
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="fake-blender-main", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def call(self, function):
+        """Run a function on the simulated main thread and return its result"""
+        box = {}
+        done = threading.Event()
+
+        def run():
+            box["result"] = function()
+            done.set()
+            return None
+
+        self.timers.register(run)
+        done.wait()
+        return box["result"]
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Always sleep, even for zero: Blender's C event loop does not hold
+            # the GIL between timers, so socket threads must get to run here too
+            time.sleep(min(self.timers.run_due(), EVENT_LOOP_MAX_SLEEP))
+
+
+def depsgraph_update(bpy, *ids):
+    """Call the depsgraph_update_post handlers as if ids had been re-evaluated"""
+    updates = [types.SimpleNamespace(id=id_block) for id_block in ids]
+    depsgraph = types.SimpleNamespace(updates=updates)
+    for handler in list(bpy.app.handlers.depsgraph_update_post):
+        handler(bpy.context.scene, depsgraph)
+
+
+class FakeBMesh:
+    """bmesh.types.BMesh stand-in that only tracks element counts"""
+
+    def __init__(self):
+        self.vertex_count = 0
+        self.face_count = 0
+        self.loop_count = 0
+        self.loops = types.SimpleNamespace(
+            layers=types.SimpleNamespace(uv=types.SimpleNamespace(new=lambda name="": name))
+        )
+
+    def _set(self, vertex_count, face_count, loop_count):
+        self.vertex_count, self.face_count, self.loop_count = vertex_count, face_count, loop_count
+
+    def to_mesh(self, mesh):
+        mesh.vertices = FakeElements(self.vertex_count)
+        mesh.polygons = FakeElements(self.face_count)
+        mesh.loops = FakeElements(self.loop_count)
+        mesh.edges = FakeElements(self.loop_count // 2)
+        mesh.vertex_normals = FakeElements(self.vertex_count)
+        mesh.uv_layers = FakeUVLayers([FakeUVLayer("UVMap", self.loop_count)], mesh)
+
+    def free(self):
+        pass
+
+
+def _bmesh_module():
+    bmesh = types.ModuleType("bmesh")
+    bmesh.new = FakeBMesh
+
+    def create_uvsphere(bm, u_segments, v_segments, radius, **kwargs):
+        bm._set(u_segments * (v_segments - 1) + 2, u_segments * v_segments,
+                u_segments * (v_segments - 2) * 4 + u_segments * 6)
+
+    def create_cone(bm, segments, **kwargs):
+        bm._set(segments * 2, segments + 2, segments * 6)
+
+    bmesh.ops = types.SimpleNamespace(
+        create_cube=lambda bm, **kwargs: bm._set(8, 6, 24),
+        create_uvsphere=create_uvsphere,
+        create_cone=create_cone,
+        create_grid=lambda bm, **kwargs: bm._set(4, 1, 4),
+    )
+    return bmesh
+
+
+@functools.lru_cache(maxsize=4)
+def synthetic_pixels(width, height):
+    """RGBA8 test image with smooth gradients and some noise-like detail"""
+    row = bytearray(width * 4)
+    pixels = bytearray(width * height * 4)
+    for y in range(height):
+        for x in range(width):
+            i = x * 4
+            row[i] = x * 255 // max(1, width - 1)
+            row[i + 1] = y * 255 // max(1, height - 1)
+            row[i + 2] = (x * 7 + y * 13) & 0xFF
+            row[i + 3] = 255
+        pixels[y * width * 4:(y + 1) * width * 4] = row
+    return pixels
+
+
+class FakeOffScreen:
+    """gpu.types.GPUOffScreen stand-in returning a synthetic image"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+    def draw_view3d(self, scene, view_layer, space, region, view_matrix, projection_matrix, **kwargs):
+        self.projection_matrix = projection_matrix
+        self.pixels = synthetic_pixels(self.width, self.height)
+
+    def bind(self):
+        return _FakeBind(self)
+
+    def free(self):
+        pass
+
+
+class _FakeBind:
+    def __init__(self, offscreen):
+        self.offscreen = offscreen
+
+    def __enter__(self):
+        _gpu_state.framebuffer = self
+        return self
+
+    def __exit__(self, *exc):
+        _gpu_state.framebuffer = None
+
+    def read_color(self, x, y, width, height, channels, slot, data_format):
+        # A fresh copy, like the GPU readback into a new gpu.types.Buffer
+        return bytearray(self.offscreen.pixels)
+
+
+_gpu_state = types.SimpleNamespace(framebuffer=None)
+
+
+class FakeRegion:
+    """Screen region counting redraw requests"""
+
+    def __init__(self, region_type, width=0, height=0):
+        self.type = region_type
+        self.width = width
+        self.height = height
+        self.redraws = 0
+
+    def tag_redraw(self):
+        self.redraws += 1
+
+
+def _fake_window(bpy):
+    region = FakeRegion('WINDOW', 1600, 900)
+    space = types.SimpleNamespace(region_3d=types.SimpleNamespace(view_matrix=Matrix.Identity(4),
+                                                                  window_matrix=Matrix.Identity(4)))
+    sidebar = FakeRegion('UI')
+    area = types.SimpleNamespace(type='VIEW_3D', regions=[region, sidebar], spaces=types.SimpleNamespace(active=space))
+    return types.SimpleNamespace(screen=types.SimpleNamespace(areas=[area]), view_layer=None,
+                                 event_simulate=_event_simulate)
+
+
+def _opengl_render(bpy):
+    def operator(write_still=False, **kwargs):
+        render = bpy.context.scene.render
+        pixels = synthetic_pixels(render.resolution_x, render.resolution_y)
+        png = sys.modules["addon"]._encode_png(pixels, render.resolution_x, render.resolution_y)
+        with open(render.filepath, "wb") as f:
+            f.write(png)
+        return {'FINISHED'}
+    return operator
+
+
+# Seconds a simulated INVOKE_DEFAULT render spends per frame
+RENDER_FRAME_TIME = 0.05
+
+
+def _render_operator(bpy):
+    """render.render: runs the render handlers, synchronously or as a timer-driven job"""
+    handlers = bpy.app.handlers
+
+    def call(name, *args):
+        for handler in list(getattr(handlers, name)):
+            handler(*args)
+
+    def frames(scene, animation):
+        return range(scene.frame_start, scene.frame_end + 1) if animation else [scene.frame_current]
+
+    def operator(*args, animation=False, write_still=False, **kwargs):
+        scene = bpy.context.scene
+        if not args or args[0] != 'INVOKE_DEFAULT':
+            for frame in frames(scene, animation):
+                scene.frame_current = frame
+                call("render_pre", scene)
+                call("render_stats", "Fra:%d | Sample 1/1" % frame)
+                call("render_post", scene)
+            call("render_complete", scene)
+            return {'FINISHED'}
+
+        remaining = list(frames(scene, animation))
+        _render_state.running = True
+
+        def step():
+            if _render_state.cancel:
+                _render_state.running = _render_state.cancel = False
+                call("render_cancel", scene)
+                return None
+            scene.frame_current = remaining.pop(0)
+            call("render_pre", scene)
+            call("render_stats", "Fra:%d | Sample 16/32" % scene.frame_current)
+            call("render_post", scene)
+            if remaining:
+                return RENDER_FRAME_TIME
+            _render_state.running = False
+            call("render_complete", scene)
+            return None
+
+        bpy.app.timers.register(step, first_interval=RENDER_FRAME_TIME)
+        return {'RUNNING_MODAL'}
+    return operator
+
+
+# Simulated render job; cancel mimics pressing Esc in the render window.
+# event_simulate stands for Blender's --enable-event-simulate option.
+_render_state = types.SimpleNamespace(running=False, cancel=False, event_simulate=False)
+
+
+def _event_simulate(type, value, **kwargs):
+    """Window.event_simulate: Esc stops the running render"""
+    if not _render_state.event_simulate:
+        raise RuntimeError("Not running with '--enable-event-simulate' enabled")
+    if type == 'ESC' and value == 'PRESS' and _render_state.running:
+        _render_state.cancel = True
+
+
+@contextlib.contextmanager
+def _temp_override(**kwargs):
+    yield
+
+
+def _save_as_mainfile(filepath, copy=False, **kwargs):
+    with open(filepath, "wb") as f:
+        f.write(b"BLENDER-fake")
+    return {'FINISHED'}
+
+
+def _primitive_add(bpy, default_name):
+    def operator(location=(0, 0, 0), **kwargs):
+        mesh = bpy.data.meshes.add(FakeMesh(default_name))
+        obj = bpy.data.objects.add(FakeObject(default_name, "MESH", mesh, location))
+        bpy.context.active_object = obj
+        return {'FINISHED'}
+    return operator
+
+
+def install():
+    """Install fake bpy, bmesh, gpu and mathutils modules and return the bpy module"""
+    if isinstance(sys.modules.get("bpy"), types.ModuleType) and getattr(sys.modules["bpy"], "_is_fake", False):
+        return sys.modules["bpy"]
+
+    bpy = types.ModuleType("bpy")
+    bpy._is_fake = True
+
+    bpy.app = types.SimpleNamespace(timers=Timers(), background=False)
+    bpy.app.handlers = types.SimpleNamespace(
+        depsgraph_update_post=[],
+        load_post=[],
+        render_pre=[],
+        render_post=[],
+        render_stats=[],
+        render_complete=[],
+        render_cancel=[],
+        persistent=lambda function: function,
+    )
+    bpy.app.is_job_running = lambda job_type: job_type == 'RENDER' and _render_state.running
+    bpy.types = types.SimpleNamespace(Panel=object, Operator=object)
+    bpy.utils = types.SimpleNamespace(
+        register_class=lambda cls: None,
+        unregister_class=lambda cls: None,
+    )
+    bpy.data = types.SimpleNamespace(
+        objects=FakeIDCollection(lambda name, data: FakeObject(name, "MESH" if data else "EMPTY", data)),
+        meshes=FakeIDCollection(lambda name: FakeMesh(name, 0, 0, 0)),
+        materials=FakeIDCollection(FakeMaterial),
+        collections=FakeIDCollection(FakeCollection),
+        libraries=FakeIDCollection(),
+    )
+    bpy.context = types.SimpleNamespace(scene=FakeScene(bpy.data), active_object=None)
+    bpy.context.evaluated_depsgraph_get = lambda: None
+    bpy.context.collection = FakeCollection("Collection")
+    bpy.context.temp_override = _temp_override
+    bpy.context.view_layer = types.SimpleNamespace(objects=FakeLayerObjects(bpy.data.objects))
+    bpy.context.window_manager = types.SimpleNamespace(windows=[_fake_window(bpy)])
+    bpy.ops = types.SimpleNamespace(
+        mesh=types.SimpleNamespace(
+            primitive_cube_add=_primitive_add(bpy, "Cube"),
+            primitive_uv_sphere_add=_primitive_add(bpy, "Sphere"),
+            primitive_cylinder_add=_primitive_add(bpy, "Cylinder"),
+            primitive_cone_add=_primitive_add(bpy, "Cone"),
+            primitive_plane_add=_primitive_add(bpy, "Plane"),
+            primitive_torus_add=_primitive_add(bpy, "Torus"),
+        ),
+        render=types.SimpleNamespace(opengl=_opengl_render(bpy), render=_render_operator(bpy)),
+        wm=types.SimpleNamespace(save_as_mainfile=_save_as_mainfile),
+    )
+
+    gpu = types.ModuleType("gpu")
+    gpu.types = types.SimpleNamespace(GPUOffScreen=FakeOffScreen)
+    gpu.state = types.SimpleNamespace(active_framebuffer_get=lambda: _gpu_state.framebuffer)
+
+    mathutils = types.ModuleType("mathutils")
+    mathutils.Vector = Vector
+    mathutils.Matrix = Matrix
+
+    sys.modules["bpy"] = bpy
+    sys.modules["gpu"] = gpu
+    sys.modules["bmesh"] = _bmesh_module()
+    sys.modules["mathutils"] = mathutils
+    return bpy
+
+
+def load_addon(path=None):
+    """Install the fakes and import addon.py as the module 'addon'"""
+    install()
+    if path is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "addon.py")
+
+    spec = importlib.util.spec_from_file_location("addon", path)
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules["addon"] = addon
+    spec.loader.exec_module(addon)
+    return addon
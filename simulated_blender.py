@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Simulated Blender: the real addon socket server on fake bpy, with injected
+handler latency, payload size and failures
+
+Runs addon.py against the fakes in fake_blender.py in a plain Python
+process, so blender_mcp_server.py and the benchmarks can run on a machine
+without Blender, e.g. in CI. Injected latency is spent on the simulated
+main thread, so like a slow handler in Blender it delays every command
+queued behind it.
+
+Usage:
+    python simulated_blender.py [--port 9876] [--objects 1000] [--seed 1]
+        [--latency 1ms] [--latency get_scene_info=20ms] [--jitter 0.2]
+        [--payload get_object_info=64KB] [--failure-rate 0.01] [--failure-rate render_scene=0.5]
+
+Options taking COMMAND=VALUE apply to one command, a bare VALUE to all.
+"""
+
+import argparse
+import random
+import re
+import signal
+import sys
+import threading
+import time
+
+import fake_blender
+
+
+UNITS = {"us": 1e-6, "ms": 1e-3, "s": 1.0, "b": 1, "kb": 1024, "mb": 1024 * 1024}
+
+
+def parse_quantity(text, default_unit):
+    """ "20ms" -> 0.02, "64KB" -> 65536; numbers without a unit use default_unit"""
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([a-zA-Z]*)\s*", text)
+    if not match:
+        raise ValueError(f"Invalid value: {text}")
+    number, unit = match.groups()
+    return float(number) * UNITS[(unit or default_unit).lower()]
+
+
+def parse_per_command(values, default_unit=None):
+    """Repeated COMMAND=VALUE / VALUE options -> ({command: value}, default)"""
+    per_command = {}
+    default = 0.0
+    for value in values or ():
+        command, _, quantity = value.rpartition("=")
+        parsed = parse_quantity(quantity, default_unit) if default_unit else float(quantity)
+        if command:
+            per_command[command] = parsed
+        else:
+            default = parsed
+    return per_command, default
+
+
+class Injector:
+    """Wraps addon command handlers with latency, padding and failures"""
+
+    def __init__(self, latency=None, jitter=0.0, payload=None, failure_rate=None, seed=1):
+        self.latency, self.default_latency = parse_per_command(latency, "ms")
+        self.payload, self.default_payload = parse_per_command(payload, "b")
+        self.failure_rate, self.default_failure_rate = parse_per_command(failure_rate)
+        self.jitter = jitter
+        # Handlers only run on the main thread, one at a time
+        self.rng = random.Random(seed)
+
+    def install(self, server):
+        for name, handler in list(server.handlers.items()):
+            server.handlers[name] = self.wrap(name, handler)
+
+    def wrap(self, name, handler):
+        latency = self.latency.get(name, self.default_latency)
+        padding = "x" * int(self.payload.get(name, self.default_payload))
+        failure_rate = self.failure_rate.get(name, self.default_failure_rate)
+        if not (latency or padding or failure_rate):
+            return handler
+
+        def run(params):
+            if latency:
+                time.sleep(max(0.0, latency * (1.0 + self.rng.uniform(-self.jitter, self.jitter))))
+            if failure_rate and self.rng.random() < failure_rate:
+                return {"status": "error", "message": f"Injected failure in {name}"}
+            response = handler(params)
+            if padding and isinstance(response, dict) and isinstance(response.get("result"), dict):
+                response["result"]["padding"] = padding
+            return response
+        return run
+
+
+def start(port=0, objects=1000, injector=None):
+    """Start the addon server on the fakes; returns (server, main-thread loop)"""
+    bpy = fake_blender.install()
+    addon = fake_blender.load_addon()
+    for index in range(objects):
+        mesh = bpy.data.meshes.add(fake_blender.FakeMesh(f"Sim{index}"))
+        bpy.data.objects.add(fake_blender.FakeObject(f"Sim{index}", "MESH", mesh, (index, 0, 0)))
+
+    loop = fake_blender.MainThreadLoop(bpy.app.timers)
+    loop.start()
+    server = addon.BlenderMCPServer(port=port)
+    if injector:
+        injector.install(server)
+    server.start()
+    return server, loop
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=9876, help="TCP port, 0 for any free port")
+    parser.add_argument("--objects", type=int, default=1000, help="mesh objects in the fake scene (Sim0, Sim1, ...)")
+    parser.add_argument("--latency", action="append", help="handler latency, e.g. 2ms or get_scene_info=20ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latency varies by up to this fraction")
+    parser.add_argument("--payload", action="append", help="padding added to results, e.g. 64KB or get_object_info=1MB")
+    parser.add_argument("--failure-rate", action="append", help="share of commands failing, e.g. 0.01 or render_scene=0.5")
+    parser.add_argument("--seed", type=int, default=1, help="seed for jitter and failures")
+    args = parser.parse_args()
+
+    injector = Injector(args.latency, args.jitter, args.payload, args.failure_rate, args.seed)
+    server, loop = start(args.port, args.objects, injector)
+    # Tools starting this script read the port from this line
+    print(f"Simulated Blender listening on {server.host}:{server.server_socket.getsockname()[1]}", flush=True)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    try:
+        while not stop.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        loop.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test set_transforms/get_transforms on the fake Blender modules
+
+Runs the addon's handlers directly, without a socket or Blender. The bulk
+pass writes all of bpy.data.objects back, so this checks that objects not
+named in the request keep their transforms.
+
+Usage:
+    python test_transforms.py
+"""
+
+import sys
+
+import fake_blender
+
+
+def main():
+    bpy = fake_blender.install()
+    addon = fake_blender.load_addon()
+    for index in range(20):
+        mesh = bpy.data.meshes.add(fake_blender.FakeMesh(f"Obj{index}"))
+        obj = bpy.data.objects.add(fake_blender.FakeObject(f"Obj{index}", "MESH", mesh, (index, index * 0.5, -index)))
+        obj.scale = fake_blender.Vector((1.0 + index * 0.25,) * 3)
+    server = addon.BlenderMCPServer(port=0)
+
+    def snapshot():
+        return {obj.name: (list(obj.location), list(obj.rotation_euler), list(obj.scale)) for obj in bpy.data.objects}
+
+    # Every other object: half of them, so the bulk pass is used
+    names = [f"Obj{index}" for index in range(0, 20, 2)]
+    locations = [value for index in range(len(names)) for value in (100.0 + index, 0.25, -7.5)]
+    before = snapshot()
+    response = server.handlers["set_transforms"]({"names": names, "location": locations})
+    after = snapshot()
+
+    checks = [("set_transforms succeeds", response.get("status") == "success")]
+    checks.append(("named objects moved", all(
+        after[name][0] == locations[i * 3:i * 3 + 3] for i, name in enumerate(names)
+    )))
+    checks.append(("named objects keep rotation and scale", all(
+        after[name][1:] == before[name][1:] for name in names
+    )))
+    untouched = [name for name in before if name not in names]
+    checks.append(("untouched objects keep their values", all(after[name] == before[name] for name in untouched)))
+
+    result = server.handlers["get_transforms"]({"names": names[::-1], "fields": ["location", "scale"]})["result"]
+    checks.append(("get_transforms reads the new values in request order", result["location"] == [
+        value for name in names[::-1] for value in after[name][0]
+    ] and result["scale"] == [value for name in names[::-1] for value in after[name][2]]))
+
+    # With a linked library the objects are set one by one
+    bpy.data.libraries.add(fake_blender.FakeID())
+    before = snapshot()
+    server.handlers["set_transforms"]({"names": names, "scale": [2.0] * len(names) * 3})
+    after = snapshot()
+    checks.append(("per-object path sets scale", all(after[name][2] == [2.0] * 3 for name in names)))
+    checks.append(("per-object path leaves others alone", all(after[name] == before[name] for name in untouched)))
+
+    ok = True
+    for label, passed in checks:
+        print(f"{'✓' if passed else '✗'} {label}")
+        ok = ok and passed
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())